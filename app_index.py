@@ -0,0 +1,408 @@
+"""Index of launchable applications for resolving spoken names on Linux.
+
+Built from the ``.desktop`` files in the XDG data directories and the
+executables on ``$PATH``. The index is saved as JSON in the cache directory
+together with the mtime of every directory it scanned; a later start loads
+it without rescanning unless one of those directories changed (installing
+or removing an application adds or removes a file, which bumps the mtime).
+
+Lookup tries, in order: an exact name or alias, the spoken words inside a
+name ("studio code"), a phonetic match ("fire fox", "libra office") and a
+bounded edit distance, and returns the best-scoring launch target. Bare
+executables on ``$PATH`` only match by name, or by name and a version
+("python" for python3): a near miss there is another command entirely
+("chat" is not cat, "mail" is not tail).
+"""
+import json
+import os
+import shlex
+import threading
+import time
+
+from normalizer import bounded_levenshtein, phonetic_key
+from process_tree import LAUNCHERS
+
+CACHE_VERSION = 2
+# Desktop entry field codes that expand to files, URLs or icons; a launch without arguments drops them
+_FIELD_CODES = {'%f', '%F', '%u', '%U', '%d', '%D', '%n', '%N', '%i', '%c', '%k', '%v', '%m'}
+MIN_SCORE = 0.6
+# Stopping by what the index would have launched needs a surer match than launching does
+CONFIDENT_SCORE = 0.85
+MIN_PHONETIC = 3
+# Commands that run another program; their own name says nothing about the application
+WRAPPERS = LAUNCHERS | {'env', 'nice', 'ionice', 'flatpak', 'snap', 'firejail', 'pkexec', 'xdg-open',
+                        'gtk-launch', 'gio', 'kioclient5', 'exec'}
+# Wrappers followed by options or VAR=value assignments and then the program itself
+_PASS_THROUGH = {'env', 'nice', 'ionice', 'nohup', 'exec'}
+_OPTION_VALUES = {'-u', '--unset', '-C', '--chdir', '-n', '--adjustment', '-c', '--class'}
+_SHELLS = {'sh', 'bash', 'dash', 'zsh', 'ksh'}
+
+
+def xdg_data_dirs():
+    home = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    system = os.environ.get('XDG_DATA_DIRS') or '/usr/local/share:/usr/share'
+    return [home] + [d for d in system.split(':') if d]
+
+
+def default_cache_path():
+    """``$VPM_APP_INDEX_CACHE``, else ``app_index.json`` in the XDG cache directory"""
+    path = os.environ.get('VPM_APP_INDEX_CACHE')
+    if path:
+        return path
+    cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache, 'voice-process-manager', 'app_index.json')
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _spoken(text):
+    """Lowercase words only, the way a transcript would have them"""
+    return ' '.join(''.join(ch if ch.isalnum() else ' ' for ch in text.lower()).split())
+
+
+def phonetic_phrase(text):
+    return ' '.join(key for key in (phonetic_key(word) for word in text.split()) if key)
+
+
+def parse_desktop_file(path):
+    """The ``[Desktop Entry]`` group of a .desktop file as a dict, or None if unreadable"""
+    entry = None
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('['):
+                    if entry is not None:
+                        break  # only the main group matters; actions follow it
+                    if line == '[Desktop Entry]':
+                        entry = {}
+                    continue
+                if entry is None or not line or line.startswith('#') or '=' not in line:
+                    continue
+                key, value = line.split('=', 1)
+                entry.setdefault(key.strip(), value.strip())
+    except OSError:
+        return None
+    return entry
+
+
+def exec_argv(command):
+    """Argument list for a desktop entry ``Exec`` value, field codes removed"""
+    try:
+        args = shlex.split(command)
+    except ValueError:
+        return []
+    return [arg.replace('%%', '%') for arg in args if arg not in _FIELD_CODES]
+
+
+def launched_program(argv):
+    """Name of the program ``argv`` runs, looking past ``env``, ``nice`` and ``sh -c "..."``.
+
+    None when only a wrapper is known, e.g. ``flatpak run com.spotify.Client``.
+    """
+    args = list(argv)
+    while args:
+        name = os.path.basename(args.pop(0))
+        if name in _PASS_THROUGH:
+            while args and (args[0].startswith('-') or '=' in args[0]):
+                if args.pop(0) in _OPTION_VALUES and args:
+                    args.pop(0)
+            continue
+        if name in _SHELLS and len(args) > 1 and args[0] == '-c':
+            args = exec_argv(args[1])
+            if any(arg in ('&&', '||', ';', '|') or arg.endswith(';') for arg in args):
+                return None  # a script, not one program
+            continue
+        return None if name in WRAPPERS else name
+    return None
+
+
+class AppEntry:
+    __slots__ = ('name', 'argv', 'source', 'desktop_id', 'wm_class', 'aliases')
+
+    def __init__(self, name, argv, source, desktop_id=None, wm_class=None, aliases=()):
+        self.name = name
+        self.argv = argv
+        self.source = source  # 'desktop' or 'path'
+        self.desktop_id = desktop_id
+        self.wm_class = wm_class
+        self.aliases = list(aliases)
+
+    @property
+    def executable(self):
+        return os.path.basename(self.argv[0]) if self.argv else None
+
+    @property
+    def program(self):
+        """The program this entry runs, past any wrapper; None if it is hidden behind one"""
+        return launched_program(self.argv)
+
+    def process_names(self):
+        """Names its running processes may have: the window class, then the program; never a wrapper"""
+        names = {}
+        for name in (self.wm_class, self.program):
+            if name and name.lower() not in WRAPPERS:
+                names.setdefault(name.lower(), name)  # process lookups ignore case
+        return list(names.values())
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class AppIndex:
+    """Launch targets keyed by the names a user might say"""
+
+    def __init__(self, data_dirs=None, path_dirs=None, cache_path=None):
+        self.data_dirs = list(data_dirs) if data_dirs is not None else xdg_data_dirs()
+        if path_dirs is None:
+            path_dirs = [d for d in os.environ.get('PATH', '').split(os.pathsep) if d]
+        self.path_dirs = list(dict.fromkeys(path_dirs))
+        self.cache_path = cache_path
+        self.entries = []
+        self.scanned = {}  # directory -> mtime_ns (None if missing) at scan time
+        self.loaded_from = None  # 'cache' or 'scan'
+        self._names = []
+        self._exact = {}
+        self._phonetic = {}
+        self._words = {}
+
+    # Scanning
+
+    def scan(self):
+        entries = []
+        scanned = {}
+        seen_ids = set()
+        commands = set()
+        for data_dir in self.data_dirs:
+            root = os.path.join(data_dir, 'applications')
+            scanned[root] = _mtime(root)
+            for current, subdirs, files in os.walk(root):
+                subdirs.sort()
+                if current != root:
+                    scanned[current] = _mtime(current)
+                for filename in sorted(files):
+                    if not filename.endswith('.desktop'):
+                        continue
+                    # Desktop file IDs use '-' for subdirectories; the first data dir that has one wins
+                    desktop_id = os.path.relpath(os.path.join(current, filename), root).replace(os.sep, '-')
+                    if desktop_id in seen_ids:
+                        continue
+                    seen_ids.add(desktop_id)
+                    entry = self._desktop_entry(os.path.join(current, filename), desktop_id)
+                    if entry is not None:
+                        entries.append(entry)
+                        commands.add(entry.program)
+        for directory in self.path_dirs:
+            scanned[directory] = _mtime(directory)
+            try:
+                names = sorted(os.listdir(directory))
+            except OSError:
+                continue
+            for name in names:
+                if name in commands:
+                    continue  # already known by a friendlier name
+                path = os.path.join(directory, name)
+                if os.access(path, os.X_OK) and not os.path.isdir(path):
+                    commands.add(name)
+                    entries.append(AppEntry(name, [name], 'path'))
+        self.entries = entries
+        self.scanned = scanned
+        self.loaded_from = 'scan'
+        self._build_lookup()
+        return self
+
+    @staticmethod
+    def _desktop_entry(path, desktop_id):
+        fields = parse_desktop_file(path)
+        if not fields or fields.get('Type', 'Application') != 'Application':
+            return None
+        if fields.get('Hidden') == 'true' or fields.get('NoDisplay') == 'true' or not fields.get('Name'):
+            return None
+        argv = exec_argv(fields.get('Exec', ''))
+        if not argv:
+            return None
+        stem = desktop_id[:-len('.desktop')]
+        aliases = [fields.get('GenericName', ''), stem.rsplit('.', 1)[-1], launched_program(argv)]
+        aliases += [k for k in fields.get('Keywords', '').split(';') if k]
+        return AppEntry(fields['Name'], argv, 'desktop', desktop_id, fields.get('StartupWMClass'),
+                        [a for a in aliases if a])
+
+    # Cache
+
+    def is_fresh(self, scanned):
+        """True if none of the directories recorded at scan time changed.
+
+        A new subdirectory bumps its parent's mtime and a directory that did
+        not exist was recorded as None, so neither can slip through.
+        """
+        return bool(scanned) and all(_mtime(directory) == mtime for directory, mtime in scanned.items())
+
+    def load_cache(self):
+        if not self.cache_path:
+            return False
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if (data.get('version') != CACHE_VERSION or data.get('data_dirs') != self.data_dirs
+                or data.get('path_dirs') != self.path_dirs or not self.is_fresh(data.get('scanned', {}))):
+            return False
+        self.entries = [AppEntry(**entry) for entry in data['entries']]
+        self.scanned = data['scanned']
+        self.loaded_from = 'cache'
+        # The lookup maps are saved too: rebuilding the phonetic keys costs more than parsing them
+        lookup = data['lookup']
+        self._names, self._exact = lookup['names'], lookup['exact']
+        self._phonetic, self._words = lookup['phonetic'], lookup['words']
+        return True
+
+    def save_cache(self):
+        if not self.cache_path:
+            return
+        data = {'version': CACHE_VERSION, 'data_dirs': self.data_dirs, 'path_dirs': self.path_dirs,
+                'scanned': self.scanned, 'entries': [entry.as_dict() for entry in self.entries],
+                'lookup': {'names': self._names, 'exact': self._exact, 'phonetic': self._phonetic,
+                           'words': self._words}}
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            temporary = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(temporary, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temporary, self.cache_path)  # readers never see a half-written file
+        except OSError as e:
+            print(f"Could not save the application index to {self.cache_path}: {e}")
+
+    def load(self):
+        """Load from the cache if it is still fresh, otherwise rescan and save"""
+        if not self.load_cache():
+            self.scan()
+            self.save_cache()
+        return self
+
+    def refresh_if_stale(self):
+        if not self.is_fresh(self.scanned):
+            self.scan()
+            self.save_cache()
+            return True
+        return False
+
+    # Lookup
+
+    def _build_lookup(self):
+        self._names = []  # per entry: [spoken, phonetic key] for the name, then each alias
+        self._exact = {}
+        self._phonetic = {}
+        self._words = {}
+        for index, entry in enumerate(self.entries):
+            names = []
+            for alias in [entry.name] + entry.aliases:
+                spoken = _spoken(alias)
+                if not spoken:
+                    continue
+                key = phonetic_phrase(spoken)
+                names.append([spoken, key])
+                # Recognizers split and join compound names freely: "fire fox", "libreoffice"
+                compact = spoken.replace(' ', '')
+                for form, form_key in ((spoken, key), (compact, phonetic_key(compact))):
+                    self._add(self._exact, form, index)
+                    if form_key:
+                        self._add(self._phonetic, form_key, index)
+                for word in spoken.split():
+                    self._add(self._words, word, index)
+            self._names.append(names)
+
+    @staticmethod
+    def _add(table, key, index):
+        found = table.setdefault(key, [])
+        if not found or found[-1] != index:
+            found.append(index)
+
+    def _score(self, query, index):
+        """Best similarity between ``query`` and any name of entry ``index``, 0..1"""
+        query_key = phonetic_phrase(query)
+        compact = query.replace(' ', '')
+        compact_key = phonetic_key(compact)
+        best = 0.0
+        if self.entries[index].source == 'path':
+            for spoken, _ in self._names[index]:
+                if spoken.replace(' ', '') == compact:
+                    best = 1.0
+                elif spoken.startswith(query) and not any(ch.isalpha() for ch in spoken[len(query):]):
+                    best = max(best, 0.9)  # a versioned name: python3, gimp-2.10
+            # Prefer real applications over same-named helper binaries on $PATH
+            return best - 0.05 if best else 0.0
+        for rank, (spoken, key) in enumerate(self._names[index]):
+            if spoken == query or spoken.replace(' ', '') == compact:
+                score = 1.0
+            elif f' {query} ' in f' {spoken} ' or f' {spoken} ' in f' {query} ':  # whole words only
+                score = 0.75 + 0.2 * min(len(query), len(spoken)) / max(len(query), len(spoken))
+            else:
+                limit = max(1, len(query) // 4)
+                distance = bounded_levenshtein(query, spoken, limit)
+                score = 1 - distance / max(len(query), len(spoken)) if distance <= limit else 0.0
+                # Keys of one or two consonants match too much to count on their own
+                if len(compact_key) >= MIN_PHONETIC and (query_key == key or compact_key == key.replace(' ', '')):
+                    score = max(score, 0.8)
+            best = max(best, score - 0.02 * (rank > 0))  # the display name beats aliases and keywords
+        return best
+
+    def candidates(self, spoken):
+        query = _spoken(spoken)
+        if not query:
+            return set()
+        compact = query.replace(' ', '')
+        found = set(self._exact.get(query, ()))
+        found.update(self._exact.get(compact, ()))
+        found.update(self._phonetic.get(phonetic_phrase(query), ()))
+        found.update(self._phonetic.get(phonetic_key(compact), ()))
+        for word in query.split():
+            found.update(self._words.get(word, ()))
+        if not found:
+            # Nothing shares a word or a sound: fall back to edit distance, skipping names
+            # whose length alone rules them out
+            limit = max(1, len(query) // 4)
+            found = {index for index, names in enumerate(self._names)
+                     if any(abs(len(spoken) - len(query)) <= limit for spoken, _ in names)}
+        return found
+
+    def search(self, spoken, limit=5):
+        """``[(score, entry)]`` best first"""
+        query = _spoken(spoken)
+        scored = [(self._score(query, index), index) for index in self.candidates(spoken)]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(score, self.entries[index]) for score, index in scored[:limit] if score > 0]
+
+    def resolve(self, spoken, min_score=MIN_SCORE, sources=None):
+        """The best launch target for a spoken application name, or None.
+
+        ``sources`` limits the answer to entries from ``'desktop'`` files or
+        ``'path'``; a better match from the other kind still means None.
+        """
+        results = self.search(spoken, limit=1)
+        if results and results[0][0] >= min_score and (sources is None or results[0][1].source in sources):
+            return results[0][1]
+        return None
+
+
+_app_index = None
+_app_index_lock = threading.Lock()
+
+
+def get_app_index():
+    """The shared index, loaded on first use and rescanned when an application directory changes"""
+    global _app_index
+    with _app_index_lock:
+        if _app_index is None:
+            started = time.perf_counter()
+            _app_index = AppIndex(cache_path=default_cache_path()).load()
+            print(f"Application index: {len(_app_index.entries)} entries from {_app_index.loaded_from} "
+                  f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+        else:
+            _app_index.refresh_if_stale()
+        return _app_index
@@ -0,0 +1,272 @@
+"""Continuous, callback-driven microphone capture.
+
+PyAudio fills a preallocated ring buffer from its own callback thread, so the
+microphone is never closed between listens and no audio is lost while the
+voice thread is busy. Utterances are handed out as memoryview slices of that
+buffer, which keeps memory constant no matter how long the session runs.
+"""
+import threading
+import time
+
+import numpy as np
+
+SAMPLE_WIDTH = 2  # 16-bit mono
+
+
+class RingBuffer:
+    """Fixed-size byte ring addressed by absolute stream offsets.
+
+    Every write lands twice, at ``pos`` and ``pos + capacity``, so any span of
+    up to ``capacity`` bytes is contiguous in memory and can be returned as a
+    memoryview without copying.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = bytearray(capacity * 2)
+        self._view = memoryview(self._data)
+        self.written = 0  # total bytes ever written
+        self.lock = threading.Condition()
+
+    def write(self, data):
+        data = memoryview(data)
+        if len(data) > self.capacity:
+            data = data[-self.capacity:]
+        with self.lock:
+            start = self.written % self.capacity
+            first = min(len(data), self.capacity - start)
+            self._view[start:start + first] = data[:first]
+            self._view[start + self.capacity:start + self.capacity + first] = data[:first]
+            rest = len(data) - first
+            if rest:
+                self._view[:rest] = data[first:]
+                self._view[self.capacity:self.capacity + rest] = data[first:]
+            self.written += len(data)
+            self.lock.notify_all()
+
+    def oldest(self):
+        return max(0, self.written - self.capacity)
+
+    def view(self, start, end):
+        """Zero-copy view of stream bytes [start, end).
+
+        The view aliases the ring, so it is only valid until the writer laps
+        it; callers that need the data for longer than the buffer length must
+        copy it.
+        """
+        if start < self.oldest() or end > self.written or end < start:
+            raise ValueError(f"Range {start}-{end} is outside the buffered audio")
+        offset = start % self.capacity
+        return self._view[offset:offset + (end - start)]
+
+    def wait(self, position, timeout=None):
+        """Block until data past ``position`` is available; returns False on timeout"""
+        with self.lock:
+            return self.lock.wait_for(lambda: self.written > position, timeout)
+
+
+class NoiseFloorTracker:
+    """Incremental estimate of the background energy level.
+
+    Tracks the floor with an asymmetric moving average (falls quickly, rises
+    slowly) on every non-speech chunk, replacing the blocking
+    ``adjust_for_ambient_noise`` calibration windows.
+    """
+
+    def __init__(self, initial=100.0, ratio=1.5, minimum=300.0, attack=0.05, release=0.3):
+        self.floor = initial
+        self.ratio = ratio
+        self.minimum = minimum
+        self.attack = attack
+        self.release = release
+
+    def update(self, energy):
+        rate = self.release if energy < self.floor else self.attack
+        self.floor += (energy - self.floor) * rate
+
+    @property
+    def threshold(self):
+        return max(self.floor * self.ratio, self.minimum)
+
+
+class Utterance:
+    """A detected phrase as a memoryview into the capture ring buffer"""
+
+    def __init__(self, data, sample_rate, start, end):
+        self.data = data
+        self.sample_rate = sample_rate
+        self.start = start
+        self.end = end
+
+    @property
+    def duration(self):
+        return len(self.data) / SAMPLE_WIDTH / self.sample_rate
+
+    def detach(self):
+        """Copy the audio out of the ring so it stays valid however long it waits for recognition"""
+        return Utterance(bytes(self.data), self.sample_rate, self.start, self.end)
+
+    def to_audio_data(self):
+        """Wrap the slice for speech_recognition without copying it"""
+        import speech_recognition as sr
+        return sr.AudioData(self.data, self.sample_rate, SAMPLE_WIDTH)
+
+
+class ContinuousCapture:
+    """Always-on microphone stream with incremental noise tracking and endpointing"""
+
+    def __init__(self, sample_rate=16000, chunk=1024, buffer_seconds=30, device_index=None,
+                 pause_threshold=0.5, phrase_threshold=0.1, pre_roll=0.3, noise_floor=None):
+        self.sample_rate = sample_rate
+        self.chunk = chunk
+        self.device_index = device_index
+        self.bytes_per_second = sample_rate * SAMPLE_WIDTH
+        self.ring = RingBuffer(int(buffer_seconds * self.bytes_per_second))
+        self.pause_threshold = pause_threshold
+        self.phrase_threshold = phrase_threshold
+        self.pre_roll = pre_roll
+        self.noise = noise_floor or NoiseFloorTracker()
+        self.cursor = 0  # consumer position in the stream
+        self.skip_before = 0  # audio before this offset is never returned
+        self.in_speech = False
+        self.overruns = 0
+        self._audio = None
+        self._stream = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        import pyaudio
+        self.ring.write(in_data)
+        return (None, pyaudio.paContinue)
+
+    def start(self):
+        import pyaudio
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(
+            format=pyaudio.paInt16, channels=1, rate=self.sample_rate, input=True,
+            input_device_index=self.device_index, frames_per_buffer=self.chunk,
+            stream_callback=self._callback
+        )
+        self._stream.start_stream()
+        self.cursor = self.skip_before = self.ring.written
+        return self
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def skip_to_now(self):
+        """Drop everything captured so far, e.g. our own notification sound.
+
+        Safe to call from any thread; a phrase that is being listened to is
+        abandoned on the next chunk.
+        """
+        self.skip_before = self.ring.written
+
+    def _catch_up(self):
+        # If the consumer fell a whole buffer behind, skip the lost audio
+        oldest = self.ring.oldest()
+        if self.cursor < oldest:
+            self.overruns += 1
+            self.cursor = oldest
+
+    def next_chunk(self, timeout=None, track_noise=True):
+        """Return all audio captured since the last call as a memoryview, or None on timeout.
+
+        The noise floor is updated from every chunk that is not part of an
+        utterance, so it keeps tracking the room between listens. Pass
+        ``track_noise=False`` while our own speech output is playing.
+        """
+        if self.cursor < self.skip_before:
+            self.cursor = self.skip_before
+        if not self.ring.wait(self.cursor, timeout):
+            return None
+        self._catch_up()
+        end = self.ring.written
+        end -= (end - self.cursor) % SAMPLE_WIDTH
+        data = self.ring.view(self.cursor, end)
+        self.cursor = end
+        if track_noise and not self.in_speech:
+            self.noise.update(self.energy(data))
+        return data
+
+    @staticmethod
+    def energy(data):
+        samples = np.frombuffer(data, dtype=np.int16)
+        if len(samples) == 0:
+            return 0.0
+        return float(np.sqrt(np.mean(samples.astype(np.float32) ** 2)))
+
+    def listen(self, timeout=None, phrase_time_limit=None, on_audio=None):
+        """Wait for the next phrase and return it as an Utterance.
+
+        Mirrors ``Recognizer.listen``: returns None if no speech starts within
+        ``timeout`` seconds, and cuts the phrase at ``phrase_time_limit``.
+        ``on_audio(data, phrase_start)`` is called with every piece of the
+        phrase as it is captured, pre-roll included, for streaming
+        recognition; a new ``phrase_start`` means the earlier audio was
+        dropped as a click.
+        """
+        started = time.monotonic()
+        phrase_start = None
+        last_voiced = None
+        voiced_bytes = 0
+        while True:
+            wait = 0.1
+            if phrase_start is None and timeout is not None:
+                remaining = timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    return None
+                wait = min(wait, remaining)
+            data = self.next_chunk(wait)
+            if data is None:
+                continue
+            chunk_end = self.cursor
+            chunk_start = chunk_end - len(data)
+            if phrase_start is not None and phrase_start < self.skip_before:
+                # skip_to_now was called mid-phrase; start over
+                phrase_start = None
+                last_voiced = None
+                voiced_bytes = 0
+                self.in_speech = False
+            loud = self.energy(data) > self.noise.threshold
+
+            if phrase_start is None:
+                if not loud:
+                    continue
+                # Include a little audio from before the onset so first syllables survive
+                phrase_start = max(self.ring.oldest(), self.skip_before,
+                                   chunk_start - int(self.pre_roll * self.bytes_per_second))
+                phrase_start -= phrase_start % SAMPLE_WIDTH
+                self.in_speech = True
+                fed = phrase_start
+            if on_audio is not None:
+                on_audio(self.ring.view(max(fed, self.ring.oldest()), chunk_end), phrase_start)
+                fed = chunk_end
+            if loud:
+                last_voiced = chunk_end
+                voiced_bytes += chunk_end - chunk_start
+
+            limit_hit = (phrase_time_limit is not None and
+                         chunk_end - phrase_start >= phrase_time_limit * self.bytes_per_second)
+            paused = chunk_end - last_voiced >= self.pause_threshold * self.bytes_per_second
+            if limit_hit or paused:
+                self.in_speech = False
+                if voiced_bytes < self.phrase_threshold * self.bytes_per_second and not limit_hit:
+                    # Too short to be speech, treat it as a click and keep waiting
+                    phrase_start = None
+                    last_voiced = None
+                    voiced_bytes = 0
+                    continue
+                phrase_start = max(phrase_start, self.ring.oldest())
+                return Utterance(self.ring.view(phrase_start, chunk_end), self.sample_rate, phrase_start, chunk_end)
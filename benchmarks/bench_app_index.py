@@ -0,0 +1,233 @@
+"""Application index: cold scan, warm cache load and spoken-name lookup.
+
+Builds a fake XDG data directory with ``.desktop`` files and a fake ``$PATH``
+directory of executables in a temporary folder, so the numbers do not depend
+on what is installed here. Reports:
+
+- cold: scanning every directory and writing the cache;
+- warm: loading the cache when no directory changed (the normal startup);
+- stale: loading after an application was installed, which rescans;
+- lookup: microseconds per ``resolve`` and how many spoken variants resolve
+  to the intended application, or to nothing when the only near match is an
+  unrelated command on ``$PATH`` ("chat" must not launch cat);
+- stop: what ``stop`` would fall back to when no process has the spoken
+  name, which must be a desktop entry matched with confidence or nothing,
+  and the process names it would then look for, which must never be a
+  wrapper such as sh, env or flatpak.
+
+    python benchmarks/bench_app_index.py [path_executables] [repeat]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_index import CONFIDENT_SCORE, WRAPPERS, AppIndex  # noqa: E402
+
+APPLICATIONS = {
+    'firefox.desktop': ('Firefox', 'Web Browser', 'firefox %u', 'firefox', 'Internet;WWW;Browser;'),
+    'code.desktop': ('Visual Studio Code', 'Text Editor', '/usr/share/code/code --unity-launch %F', 'Code',
+                     'vscode;'),
+    'libreoffice-writer.desktop': ('LibreOffice Writer', 'Word Processor', 'libreoffice --writer %U',
+                                   'libreoffice-writer', 'Text;Document;'),
+    'libreoffice-calc.desktop': ('LibreOffice Calc', 'Spreadsheet', 'libreoffice --calc %U', 'libreoffice-calc',
+                                 'Spreadsheet;'),
+    'google-chrome.desktop': ('Google Chrome', 'Web Browser', '/usr/bin/google-chrome-stable %U', 'Google-chrome',
+                              ''),
+    'org.gnome.Terminal.desktop': ('Terminal', 'Terminal', 'gnome-terminal', 'gnome-terminal-server', 'shell;'),
+    'org.gnome.Nautilus.desktop': ('Files', 'File Manager', 'nautilus --new-window %U', 'org.gnome.Nautilus',
+                                   'folder;manager;explore;'),
+    'spotify.desktop': ('Spotify', 'Music Player', 'spotify %U', 'spotify', ''),
+    'thunderbird.desktop': ('Thunderbird', 'Mail Client', 'thunderbird %u', 'thunderbird', 'Email;'),
+    'gimp.desktop': ('GNU Image Manipulation Program', 'Image Editor', 'gimp-2.10 %U', 'gimp-2.10', 'GIMP;'),
+    'vlc.desktop': ('VLC media player', 'Media player', '/usr/bin/vlc --started-from-file %U', 'vlc', 'Player;'),
+    'obs.desktop': ('OBS Studio', 'Streaming and Recording', 'obs', 'obs', ''),
+    'slack.desktop': ('Slack', '', '/usr/bin/slack %U', 'Slack', ''),
+    'org.kde.kcalc.desktop': ('KCalc', 'Calculator', 'kcalc', 'kcalc', ''),
+    'steam.desktop': ('Steam', '', '/usr/games/steam %U', 'Steam', ''),
+    # Launched through wrappers
+    'discord.desktop': ('Discord', 'Internet Messenger', 'env GDK_BACKEND=x11 /usr/bin/discord %U', '', ''),
+    'signal-desktop.desktop': ('Signal', '', 'sh -c "exec /opt/Signal/signal-desktop --no-sandbox %U"', '', ''),
+    'org.telegram.desktop.desktop': ('Telegram', 'Messenger',
+                                     '/usr/bin/flatpak run --branch=stable --command=telegram-desktop '
+                                     'org.telegram.desktop -- %u', 'TelegramDesktop', ''),
+    'zoom.desktop': ('Zoom', '', 'bash -c "cd /opt/zoom && ./ZoomLauncher %U"', '', ''),
+}
+
+# spoken -> the application name it should resolve to
+SPOKEN = {
+    'firefox': 'Firefox',
+    'fire fox': 'Firefox',
+    'web browser': 'Firefox',
+    'visual studio code': 'Visual Studio Code',
+    'studio code': 'Visual Studio Code',
+    'vs code': 'Visual Studio Code',
+    'code': 'Visual Studio Code',
+    'libre office writer': 'LibreOffice Writer',
+    'libreoffice calc': 'LibreOffice Calc',
+    'chrome': 'Google Chrome',
+    'google chrome': 'Google Chrome',
+    'terminal': 'Terminal',
+    'files': 'Files',
+    'spotifi': 'Spotify',
+    'thunder bird': 'Thunderbird',
+    'gimp': 'GNU Image Manipulation Program',
+    'vlc': 'VLC media player',
+    'obs studio': 'OBS Studio',
+    'slack': 'Slack',
+    'calculator': 'KCalc',
+    'steam': 'Steam',
+    'htop': 'htop',
+    'python': 'python3',
+    'mail': 'Thunderbird',
+    'music': 'Spotify',
+    'chat': None,
+    's': None,
+    'top': None,
+    'discord': 'Discord',
+    'signal': 'Signal',
+    'telegram': 'Telegram',
+    'env': None,
+    'flatpak': None,
+}
+
+# spoken -> the application "stop <spoken>" may fall back to when nothing runs under that name
+STOP = {
+    'visual studio code': 'Visual Studio Code',
+    'studio code': 'Visual Studio Code',
+    'thunder bird': 'Thunderbird',
+    'mail': None,
+    'music': None,
+    'chat': None,
+    's': None,
+    'python': None,
+    'discord': 'Discord',
+    'signal': 'Signal',
+    'telegram': 'Telegram',
+    'zoom': 'Zoom',
+}
+
+
+def write_desktop(directory, filename, name, generic, exec_line, wm_class, keywords):
+    lines = ['[Desktop Entry]', 'Type=Application', f'Name={name}', f'Exec={exec_line}',
+             f'StartupWMClass={wm_class}', 'Icon=application-x-executable', 'Categories=Utility;']
+    if generic:
+        lines.append(f'GenericName={generic}')
+    if keywords:
+        lines.append(f'Keywords={keywords}')
+    lines += ['', '[Desktop Action new-window]', 'Name=New Window', 'Exec=ignored']
+    with open(os.path.join(directory, filename), 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def build_tree(root, executables):
+    """A data dir with the applications above and a bin dir of ``executables`` commands"""
+    applications = os.path.join(root, 'share', 'applications')
+    os.makedirs(applications)
+    for filename, fields in APPLICATIONS.items():
+        write_desktop(applications, filename, *fields)
+    write_desktop(applications, 'hidden-helper.desktop', 'Hidden Helper', '', 'helper', 'helper', '')
+    with open(os.path.join(applications, 'hidden-helper.desktop'), 'a') as f:
+        f.write('NoDisplay=true\n')
+    bin_dir = os.path.join(root, 'bin')
+    os.makedirs(bin_dir)
+    names = ['htop', 'python3', 'grep', 'gimp-2.10', 'firefox', 'cat', 'tail', 'memusage', 'ss', 'chattr']
+    names += [f'tool{i:05d}' for i in range(max(0, executables - len(names)))]
+    for name in names:
+        path = os.path.join(bin_dir, name)
+        with open(path, 'w') as f:
+            f.write('#!/bin/sh\n')
+        os.chmod(path, 0o755)
+    return [os.path.join(root, 'share')], [bin_dir]
+
+
+def timed(fn, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000, result
+
+
+def run(executables=3000, repeat=5):
+    with tempfile.TemporaryDirectory() as root:
+        data_dirs, path_dirs = build_tree(root, executables)
+        cache = os.path.join(root, 'cache', 'app_index.json')
+
+        def cold():
+            if os.path.exists(cache):
+                os.remove(cache)
+            return AppIndex(data_dirs, path_dirs, cache).load()
+
+        def warm():
+            return AppIndex(data_dirs, path_dirs, cache).load()
+
+        cold_ms, index = timed(cold, repeat)
+        warm_ms, warm_index = timed(warm, repeat)
+        write_desktop(os.path.join(data_dirs[0], 'applications'), 'krita.desktop', 'Krita', 'Painting',
+                      'krita %F', 'krita', '')
+        stale_started = time.perf_counter()
+        stale_index = warm()
+        stale_ms = (time.perf_counter() - stale_started) * 1000
+
+        queries = list(SPOKEN) * 50
+        started = time.perf_counter()
+        for query in queries:
+            warm_index.resolve(query)
+        lookup_us = (time.perf_counter() - started) / len(queries) * 1e6
+
+        rows = []
+        for spoken, expected in SPOKEN.items():
+            entry = warm_index.resolve(spoken)
+            rows.append({'spoken': spoken, 'expected': expected, 'resolved': entry.name if entry else None,
+                         'argv': entry.argv if entry else None})
+        stops = []
+        for spoken, expected in STOP.items():
+            entry = warm_index.resolve(spoken, CONFIDENT_SCORE, sources=('desktop',))
+            stops.append({'spoken': spoken, 'expected': expected, 'resolved': entry.name if entry else None,
+                          'argv': entry.process_names() if entry else None})
+        return {
+            'entries': len(index.entries),
+            'cold_ms': cold_ms,
+            'warm_ms': warm_ms,
+            'warm_from': warm_index.loaded_from,
+            'stale_ms': stale_ms,
+            'stale_from': stale_index.loaded_from,
+            'new_app_found': stale_index.resolve('krita') is not None,
+            'lookup_us': lookup_us,
+            'rows': rows,
+            'correct': sum(row['resolved'] == row['expected'] for row in rows),
+            'stops': stops,
+            'stops_correct': sum(row['resolved'] == row['expected'] for row in stops),
+            'wrapper_targets': sum(name.lower() in WRAPPERS for row in stops for name in row['argv'] or ()),
+        }
+
+
+def main():
+    executables = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    results = run(executables, repeat)
+    for title, rows, last in (('launch', results['rows'], 'argv'), ('stop fallback', results['stops'], 'looks for')):
+        print(f"{title:22}{'resolved':34}{last}")
+        for row in rows:
+            mark = '' if row['resolved'] == row['expected'] else f"  (expected {row['expected'] or 'nothing'})"
+            print(f"{row['spoken']:22}{row['resolved'] or '-':34}{' '.join(row['argv'] or [])}{mark}")
+        print()
+    print(f"entries              {results['entries']}")
+    print(f"cold scan            {results['cold_ms']:.1f} ms")
+    print(f"warm load            {results['warm_ms']:.1f} ms (from {results['warm_from']})")
+    print(f"after an install     {results['stale_ms']:.1f} ms (from {results['stale_from']}, "
+          f"new app {'found' if results['new_app_found'] else 'missing'})")
+    print(f"lookup               {results['lookup_us']:.0f} us")
+    print(f"resolved correctly   {results['correct']} of {len(results['rows'])}")
+    print(f"stop fallback        {results['stops_correct']} of {len(results['stops'])}, "
+          f"{results['wrapper_targets']} wrapper names looked for")
+
+
+if __name__ == '__main__':
+    main()
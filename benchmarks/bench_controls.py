@@ -0,0 +1,104 @@
+"""Brightness and volume backends: latency per command.
+
+- sysfs: the Linux backend against a fake ``/sys/class/backlight`` tree,
+  for "brightness 70" (one write) and "brightness up" (a read and a write).
+- helper: the persistent helper protocol, with a Python stand-in for the
+  macOS ``osascript`` helper, against starting a helper for each request.
+- keys: a lower bound for the old macOS path, which started one
+  ``osascript`` per simulated key press with 0.1 s between presses. This
+  uses the measured cost of starting ``true``; a real ``osascript`` start
+  takes much longer.
+
+    python benchmarks/bench_controls.py [repeat]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controls import HelperBackend, LinuxBackend  # noqa: E402
+
+# Speaks the helper protocol: one request per line, "ok <value>" back
+FAKE_HELPER = r'''
+import sys
+levels = {'brightness': 50, 'volume': 50}
+for line in sys.stdin:
+    what, action, *value = line.split()
+    if action == 'set':
+        levels[what] = int(value[0])
+    sys.stdout.write(f"ok {levels[what]}\n")
+    sys.stdout.flush()
+'''
+KEY_STEP = 6.25  # percent per brightness key press
+KEY_PAUSE = 0.1
+
+
+def fake_sysfs(root):
+    """Two backlight devices; the firmware one should be picked over the raw GPU one"""
+    for name, kind, maximum, value in (('intel_backlight', 'raw', 19393, 9000), ('acpi_video0', 'firmware', 100, 40)):
+        device = os.path.join(root, 'sys', 'class', 'backlight', name)
+        os.makedirs(device)
+        for filename, content in (('type', kind), ('max_brightness', maximum), ('brightness', value)):
+            with open(os.path.join(device, filename), 'w') as f:
+                f.write(f"{content}\n")
+
+
+def per_call_ms(fn, repeat):
+    times = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000
+
+
+def run(repeat=200):
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        fake_sysfs(root)
+        backend = LinuxBackend(root)
+        results['sysfs_device'] = backend.backlight.name
+        results['sysfs_set_ms'] = per_call_ms(lambda i: backend.set_brightness(i % 101), repeat)
+        results['sysfs_adjust_ms'] = per_call_ms(
+            lambda i: backend.set_brightness(min(100, backend.brightness() + 25) if i % 2 else 0), repeat)
+        backend.set_brightness(70)
+        results['sysfs_readback'] = backend.brightness()
+
+    helper = HelperBackend([sys.executable, '-c', FAKE_HELPER])
+    helper.volume()  # start it outside the measurement
+    results['helper_ms'] = per_call_ms(lambda i: helper.set_volume(i % 101), repeat)
+    results['helper_starts'] = helper.started
+    helper.close()
+
+    def spawn_per_request(i):
+        one_shot = HelperBackend([sys.executable, '-c', FAKE_HELPER])
+        one_shot.set_volume(i % 101)
+        one_shot.close()
+    results['spawn_per_request_ms'] = per_call_ms(spawn_per_request, max(5, repeat // 20))
+
+    spawn_ms = per_call_ms(lambda i: subprocess.run(['true']), max(5, repeat // 10))
+    presses = int(abs(100 - 50) / KEY_STEP)  # "brightness 100" from the middle
+    results['keys_spawn_ms'] = spawn_ms
+    results['keys_presses'] = presses
+    results['keys_ms'] = spawn_ms * (presses + 1) + presses * KEY_PAUSE * 1000  # + system_profiler
+    return results
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    results = run(repeat)
+    print(f"sysfs device          {results['sysfs_device']} (read back {results['sysfs_readback']}% after 70%)")
+    print(f"sysfs set             {results['sysfs_set_ms'] * 1000:.0f} us per command")
+    print(f"sysfs up/down         {results['sysfs_adjust_ms'] * 1000:.0f} us per command")
+    print(f"persistent helper     {results['helper_ms']:.2f} ms per command ({results['helper_starts']} start)")
+    print(f"helper per request    {results['spawn_per_request_ms']:.1f} ms per command")
+    print(f"old key presses       >= {results['keys_ms']:.0f} ms for brightness 50 -> 100 "
+          f"({results['keys_presses'] + 1} spawns at {results['keys_spawn_ms']:.1f} ms + {results['keys_presses']} pauses)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Dispatch latency of the command grammar over synthetic transcripts.
+
+    python benchmarks/bench_dispatch.py [count]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commands import registry  # noqa: E402
+
+APPS = ['chrome', 'safari', 'visual studio code', 'terminal', 'slack', 'spotify', 'google chrome']
+TEMPLATES = [
+    lambda r: f"kill {r.randint(1, 99999)}",
+    lambda r: f"force kill {r.randint(1, 99999)}",
+    lambda r: 'kill pids ' + ' '.join(str(r.randint(1, 99999)) for _ in range(r.randint(2, 8))),
+    lambda r: f"info {r.randint(1, 99999)}",
+    lambda r: f"find {r.choice(APPS)}",
+    lambda r: f"monitor {r.randint(1, 99999)} {r.randint(10, 90)}",
+    lambda r: f"start {r.choice(APPS)}",
+    lambda r: f"stop {r.choice(APPS)}",
+    lambda r: f"switch to {r.choice(APPS)}",
+    lambda r: f"volume {r.randint(0, 100)}",
+    lambda r: f"brightness {r.randint(0, 100)} percent",
+    lambda r: r.choice(['brightness up', 'brightness down', 'brightness max']),
+    lambda r: r.choice(['screenshot', 'screenshot window', 'screenshot selection']),
+    lambda r: r.choice(['system stats', 'list processes', 'help', 'lock screen', 'go to sleep']),
+    lambda r: f"open {r.choice(['gmail', 'youtube', 'github', 'example.com'])}",
+    lambda r: r.choice(['what time is it', 'force', 'kill', 'volume loud', 'tell me a joke']),
+]
+
+
+def synthetic_transcripts(count, seed=0):
+    rng = random.Random(seed)
+    return [rng.choice(TEMPLATES)(rng) for _ in range(count)]
+
+
+def run(count=5000):
+    transcripts = synthetic_transcripts(count)
+    per_command = {}
+    started = time.perf_counter()
+    for text in transcripts:
+        t0 = time.perf_counter()
+        found = registry.match(text)
+        elapsed = time.perf_counter() - t0
+        name = found[0].name if found else '(no match)'
+        per_command.setdefault(name, []).append(elapsed)
+    total = time.perf_counter() - started
+    return {
+        'transcripts': count,
+        'total_ms': total * 1000,
+        'us_per_dispatch': total / count * 1e6,
+        'per_command_us': {name: sum(times) / len(times) * 1e6 for name, times in sorted(per_command.items())},
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    result = run(count)
+    print(f"{result['transcripts']} transcripts in {result['total_ms']:.1f} ms "
+          f"({result['us_per_dispatch']:.2f} us/dispatch)")
+    for name, us in result['per_command_us'].items():
+        print(f"  {name:22} {us:6.2f} us")
+
+
+if __name__ == '__main__':
+    main()
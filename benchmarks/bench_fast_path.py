@@ -0,0 +1,125 @@
+"""Single-utterance "hey chanti <command>" vs the two-step wake-then-command flow.
+
+Replays the sessions in ``fixtures/wake_commands.json`` through VoiceThread
+with the fake recognizer, in real time. Each fixture gives how long the
+speaker takes to say the wake phrase and the command:
+
+- two-step: "hey chanti", end-of-speech pause, recognition, the
+  notification sound, the speaker's reaction to it, the command, another
+  pause and a second recognition;
+- one breath: "hey chanti <command>" as one utterance, one pause, one
+  recognition.
+
+Reports the time from the first word to ``command_received`` and the
+number of recognizer calls per command.
+
+    python benchmarks/bench_fast_path.py [--delay 0.8] [--pause 0.5] [--notification 0.3] [--reaction 0.4]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_recognition import QuietProcessManager, voiced_audio  # noqa: E402  (sets the fake recognizer)
+from PyQt5.QtCore import Qt  # noqa: E402
+from voice_thread import VoiceThread  # noqa: E402
+
+FIXTURES = os.path.join(BENCH_DIR, 'fixtures', 'wake_commands.json')
+
+
+class NotifyingProcessManager(QuietProcessManager):
+    """Takes as long as the real notification sound and records when it finished"""
+
+    def __init__(self, notification):
+        super().__init__()
+        self.notification = notification
+        self.notified = threading.Event()
+
+    def play_notification(self):
+        time.sleep(self.notification)
+        self.notified.set()
+
+
+def session(thread, fixture, one_breath, pause, reaction, seed):
+    """Seconds from the first word to the command coming out, and the transcript that did"""
+    backend = thread.recognition.backend
+    received = []
+    done = threading.Event()
+
+    def on_command(text, trace):
+        received.append(text)
+        trace.release()
+        done.set()
+
+    thread.command_received.connect(on_command, Qt.DirectConnection)
+    thread.process_manager.notified.clear()
+    started = time.monotonic()
+    if one_breath:
+        audio = voiced_audio(seed, fixture['wake_seconds'] + fixture['command_seconds'])
+        backend.transcripts[bytes(audio.frame_data)] = f"hey chanti {fixture['command']}"
+        time.sleep(fixture['wake_seconds'] + fixture['command_seconds'] + pause)
+        thread.handle_audio(audio)
+    else:
+        wake = voiced_audio(seed, fixture['wake_seconds'])
+        command = voiced_audio(seed + 1, fixture['command_seconds'])
+        backend.transcripts[bytes(wake.frame_data)] = 'hey chanti'
+        backend.transcripts[bytes(command.frame_data)] = fixture['command']
+        time.sleep(fixture['wake_seconds'] + pause)
+        thread.handle_audio(wake)
+        thread.process_manager.notified.wait(10)
+        time.sleep(reaction + fixture['command_seconds'] + pause)
+        thread.handle_audio(command)
+    done.wait(10)
+    elapsed = time.monotonic() - started
+    thread.command_received.disconnect(on_command)
+    return elapsed, received[0] if received else None
+
+
+def run(delay=0.8, pause=0.5, notification=0.3, reaction=0.4, path=FIXTURES):
+    with open(path) as f:
+        fixtures = json.load(f)
+    results = {}
+    for mode, one_breath in (('two_step', False), ('one_breath', True)):
+        thread = VoiceThread(NotifyingProcessManager(notification))
+        thread.recognition.backend.delay = delay
+        rows = []
+        for i, fixture in enumerate(fixtures):
+            calls = thread.recognition.backend.calls
+            elapsed, text = session(thread, fixture, one_breath, pause, reaction, seed=10 * i)
+            rows.append({'command': fixture['command'], 'received': text, 'ms': elapsed * 1000,
+                         'recognizer_calls': thread.recognition.backend.calls - calls})
+        thread.recognition.close()
+        thread.process_manager.speech.close()
+        results[mode] = {'rows': rows, 'median_ms': statistics.median(row['ms'] for row in rows),
+                         'correct': sum(row['received'] == row['command'] for row in rows),
+                         'recognizer_calls': sum(row['recognizer_calls'] for row in rows) / len(rows),
+                         'fast_path': thread.fast_path_commands}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--delay', type=float, default=0.8, help='recognizer round trip (s)')
+    parser.add_argument('--pause', type=float, default=0.5, help='silence that ends an utterance (s)')
+    parser.add_argument('--notification', type=float, default=0.3, help='notification sound length (s)')
+    parser.add_argument('--reaction', type=float, default=0.4, help='time to start talking after the sound (s)')
+    parser.add_argument('--fixtures', default=FIXTURES)
+    args = parser.parse_args()
+
+    results = run(args.delay, args.pause, args.notification, args.reaction, args.fixtures)
+    print(f"\n{'command':22}{'two-step ms':>13}{'one breath ms':>15}")
+    for two, one in zip(results['two_step']['rows'], results['one_breath']['rows']):
+        print(f"{two['command']:22}{two['ms']:>13.0f}{one['ms']:>15.0f}")
+    for mode, result in results.items():
+        print(f"\n{mode}: median {result['median_ms']:.0f} ms, {result['correct']}/{len(result['rows'])} correct, "
+              f"{result['recognizer_calls']:.1f} recognizer calls per command, fast path {result['fast_path']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Launch registry: reaping, resource use and spawn latency over many launches.
+
+Starts ``launches`` short-lived children (``true``) the old way, dropping the
+Popen handle, and through ``LaunchRegistry``. After the last launch it waits
+``settle`` seconds and counts what is left behind: zombie children, open file
+descriptors, threads and resident memory. For the registry it also reports
+the spawn time per launch and how long after starting a child its exit was
+reaped (``true`` exits almost at once, so this is mostly the waiter's
+reaction time).
+
+Then ``long_running`` children (``sleep 60``) are started and terminated
+together, as "stop what I started" does, until the registry has seen every
+exit.
+
+    python benchmarks/bench_launches.py [launches] [long_running] [settle]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from launches import LaunchRegistry  # noqa: E402
+
+
+def resources():
+    me = psutil.Process()
+    zombies = sum(child.status() == psutil.STATUS_ZOMBIE for child in me.children())
+    return {'zombies': zombies, 'fds': me.num_fds(), 'threads': threading.active_count(),
+            'rss_mb': me.memory_info().rss / 2 ** 20}
+
+
+def run_discarding(launches, settle):
+    before = resources()
+    started = time.perf_counter()
+    for _ in range(launches):
+        subprocess.Popen(['true'])
+    elapsed = time.perf_counter() - started
+    time.sleep(settle)
+    after = resources()
+    subprocess._cleanup()  # do not leave the previous run's zombies to the next measurement
+    return {'per_launch_us': elapsed / launches * 1e6, 'before': before, 'after': after}
+
+
+def run_registry(launches, settle):
+    reaped_after = []
+    registry = LaunchRegistry(on_exit=lambda launch: reaped_after.append(time.time() - launch.started))
+    before = resources()
+    started = time.perf_counter()
+    for _ in range(launches):
+        registry.launch(['true'])
+    elapsed = time.perf_counter() - started
+    time.sleep(settle)
+    after = resources()
+    stats = registry.stats()
+    spawns = sorted(launch.spawn_s for launch in registry.exited)
+    reaped_after.sort()
+    registry.close()
+    return {'per_launch_us': elapsed / launches * 1e6, 'before': before, 'after': after, 'stats': stats,
+            'spawn_p50_ms': statistics.median(spawns) * 1000,
+            'reap_p50_ms': reaped_after[len(reaped_after) // 2] * 1000,
+            'reap_p99_ms': reaped_after[int(len(reaped_after) * 0.99)] * 1000}
+
+
+def run_stop(long_running):
+    registry = LaunchRegistry()
+    for _ in range(long_running):
+        registry.launch(['sleep', '60'], start_new_session=True)
+    started = time.perf_counter()
+    procs = [psutil.Process(launch.pid) for launch in registry.running()]
+    for proc in procs:
+        proc.terminate()
+    psutil.wait_procs(procs, timeout=5)
+    deadline = time.monotonic() + 5
+    while registry.running() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - started
+    left = len(registry.running())
+    registry.close()
+    return {'stopped': long_running - left, 'left': left, 'stop_ms': elapsed * 1000}
+
+
+def run(launches=2000, long_running=20, settle=0.5):
+    return {'discarding': run_discarding(launches, settle), 'registry': run_registry(launches, settle),
+            'stop': run_stop(long_running)}
+
+
+def main():
+    launches = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    long_running = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    settle = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
+    results = run(launches, long_running, settle)
+    print(f"{launches} launches of 'true', counted {settle:g}s after the last one\n")
+    print(f"{'':22}{'per launch':>12}{'zombies':>9}{'fds':>7}{'threads':>9}{'rss MB':>9}")
+    for mode in ('discarding', 'registry'):
+        result = results[mode]
+        after = result['after']
+        print(f"{mode:22}{result['per_launch_us']:>10.0f}us{after['zombies']:>9}{after['fds']:>7}"
+              f"{after['threads']:>9}{after['rss_mb']:>9.1f}")
+    registry = results['registry']
+    print(f"\nregistry waiter      {registry['stats']['waiter']}, {registry['stats']['watched']} still watched")
+    print(f"spawn p50            {registry['spawn_p50_ms']:.2f} ms")
+    print(f"reaped after start   p50 {registry['reap_p50_ms']:.1f} ms, p99 {registry['reap_p99_ms']:.1f} ms")
+    stop = results['stop']
+    print(f"stop what I started  {stop['stopped']} stopped, {stop['left']} left, {stop['stop_ms']:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
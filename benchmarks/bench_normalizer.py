@@ -0,0 +1,110 @@
+"""Per-call cost and accuracy of wake word normalization.
+
+Compares the compiled WakeWordNormalizer against the original
+dict-and-str.replace implementation on a corpus of recognizer transcripts.
+
+    python benchmarks/bench_normalizer.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from normalizer import WakeWordNormalizer  # noqa: E402
+
+# (transcript, expected normalization)
+CORPUS = [
+    ('hey chanti', 'hey chanti'),
+    ('hey chandi', 'hey chanti'),
+    ('hey shanty', 'hey chanti'),
+    ('hey shanti', 'hey chanti'),
+    ('hmt chanti', 'hey chanti'),
+    ('hint chanti', 'hey chanti'),
+    ('hand chanti', 'hey chanti'),
+    ('a chanti', 'hey chanti'),
+    ('hey chuntu', 'hey chanti'),
+    ('hey chantee', 'hey chanti'),
+    # Spellings that are not in the table
+    ('hey chonti', 'hey chanti'),
+    ('hey shantee', 'hey chanti'),
+    ('hey chandy', 'hey chanti'),
+    ('hey janti', 'hey chanti'),
+    ('hay chanti', 'hey chanti'),
+    ('hey chaunty', 'hey chanti'),
+    # Commands that must not be rewritten
+    ('handle the file', 'handle the file'),
+    ('start hint app', 'start hint app'),
+    ('find mtr', 'find mtr'),
+    ('open amazon', 'open amazon'),
+    ('stop chrome', 'stop chrome'),
+    ('kill pids 123 456', 'kill pids 123 456'),
+    ('brightness 50 percent', 'brightness 50 percent'),
+    ('start handbrake', 'start handbrake'),
+    ('list processes', 'list processes'),
+    ('what is the weather', 'what is the weather'),
+    ('switch to smartgit', 'switch to smartgit'),
+    ('find country music', 'find country music'),
+    ('stop shanty', 'stop shanty'),
+    ('find chandy', 'find chandy'),
+    ('open shanty town', 'open shanty town'),
+]
+
+
+def legacy_normalize(text):
+    """The original VoiceThread.normalize_text, kept for comparison"""
+    corrections = {
+        'hmt': 'hey', 'hint': 'hey', 'hand': 'hey', 'hnd': 'hey', 'mt': 'hey',
+        'hey chandi': 'hey chanti', 'hey shanty': 'hey chanti', 'hey shanti': 'hey chanti',
+        'hey chunti': 'hey chanti', 'hey chante': 'hey chanti', 'hey chantee': 'hey chanti',
+        'hey chanthi': 'hey chanti', 'hey chanty': 'hey chanti', 'hey shunty': 'hey chanti',
+        'hey chunty': 'hey chanti', 'hey chuntu': 'hey chanti', 'a chanti': 'hey chanti',
+    }
+    for wrong, correct in corrections.items():
+        if wrong in text:
+            text = text.replace(wrong, correct)
+    words = text.split()
+    if len(words) >= 2:
+        if words[0] in ['hmt', 'hint', 'hand', 'hnd', 'mt']:
+            words[0] = 'hey'
+        if words[1] in ['chandi', 'shanty', 'shanti', 'chunti', 'chante', 'chantee', 'chanthi', 'chanty',
+                        'shunty', 'chunty', 'chuntu']:
+            words[1] = 'chanti'
+        text = ' '.join(words)
+    return text.strip()
+
+
+def measure(normalize, corpus, repeat=200):
+    correct = sum(normalize(text) == expected for text, expected in corpus)
+    texts = [text for text, _ in corpus]
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            normalize(text)
+    elapsed = time.perf_counter() - started
+    return {
+        'accuracy': correct / len(corpus),
+        'us_per_call': elapsed / (repeat * len(texts)) * 1e6,
+    }
+
+
+def run():
+    compiled = WakeWordNormalizer()
+    return {
+        'legacy': measure(legacy_normalize, CORPUS),
+        'compiled': measure(compiled.normalize, CORPUS),
+    }
+
+
+def main():
+    for name, result in run().items():
+        print(f"{name:9} accuracy {result['accuracy']:.0%}  {result['us_per_call']:.2f} us/call")
+    compiled = WakeWordNormalizer()
+    for text, expected in CORPUS:
+        got = compiled.normalize(text)
+        if got != expected:
+            print(f"  miss: {text!r} -> {got!r} (expected {expected!r})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""Process history ring file: recording cost, bounded size and query latency.
+
+Records ``hours`` of simulated history for ``processes`` synthetic
+processes at a 10 second interval into a ``size_mb`` file, so the ring wraps
+more than twice. Reports the cost of recording one round, the file size and
+resident memory halfway and at the end (neither grows once the ring is full;
+resident memory includes the file's mapped pages), and the latency of the
+voice commands' queries against a baseline that unpacks every stored record
+into Python tuples and adds up the ones in the window, checking that both
+rank the same processes.
+
+    python benchmarks/bench_process_history.py [processes] [hours] [size_mb]
+"""
+import collections
+import os
+import random
+import sys
+import tempfile
+import time
+
+import psutil
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_process_table import NAMES  # noqa: E402
+from process_history import RECORD, HistoryFile, HistoryRecorder  # noqa: E402
+
+INTERVAL = 10
+
+
+class SyntheticSource:
+    """A recorder source with 1% churn per round, a few busy processes and growing I/O counters"""
+
+    def __init__(self, count, seed=0):
+        self.rng = random.Random(seed)
+        self.next_pid = 100
+        self.procs = [self._spawn() for _ in range(count)]
+
+    def _spawn(self):
+        self.next_pid += 1
+        name = self.rng.choice(NAMES)
+        if self.rng.random() < 0.3:
+            name = f"{name}-{self.rng.randint(1, 500)}"
+        busy = self.rng.random() < 0.05
+        return [self.next_pid, 1.7e9 + self.next_pid, name, busy, self.rng.randint(1, 2000) * 2 ** 20, 0, 0]
+
+    def __call__(self):
+        rng = self.rng
+        for _ in range(len(self.procs) // 100):
+            self.procs[rng.randrange(len(self.procs))] = self._spawn()
+        rows = []
+        for proc in self.procs:
+            pid, created, name, busy, rss, read, write = proc
+            proc[5] += rng.randrange(2 ** 20) if busy else 0
+            proc[6] += rng.randrange(2 ** 16)
+            rows.append((pid, created, name, rng.random() * (90 if busy else 2), rss, proc[5], proc[6]))
+        return rows
+
+
+def python_top(history, metric, since, until, limit=10):
+    """Baseline: unpack each record in the window and add up per process in a dict"""
+    names = history.names()
+    rounds = set()
+    totals = collections.defaultdict(lambda: [0.0, 0, 0])
+    size = RECORD.size
+    for lo, hi in history._segments(history.written):
+        for slot in range(lo, hi):
+            t, pid, name_id, cpu, rss, read, write = RECORD.unpack_from(history._mm, history.records_offset + slot * size)
+            if since < t <= until:
+                rounds.add(t)
+                total = totals[(pid, name_id)]
+                total[0] += cpu
+                total[1] = max(total[1], rss)
+                total[2] += read + write
+    column = {'cpu': 0, 'memory': 1, 'io': 2}[metric]
+    # Ties go to the lower pid, as in the numpy version
+    ranked = sorted(totals.items(), key=lambda item: (-item[1][column], item[0]))[:limit]
+    return [(pid, names[name_id]) for (pid, name_id), _ in ranked]
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def rss_mb():
+    return psutil.Process().memory_info().rss / 2 ** 20
+
+
+def run(processes=500, hours=24, size_mb=64, repeat=5):
+    results = {'processes': processes, 'hours': hours}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'history.bin')
+        history = HistoryFile(path, size_mb, interval=INTERVAL)
+        recorder = HistoryRecorder(history, INTERVAL, source=SyntheticSource(processes))
+        rounds = int(hours * 3600 / INTERVAL)
+        start = time.time() - rounds * INTERVAL
+        round_ms = []
+        for i in range(rounds):
+            started = time.perf_counter()
+            recorder.sample(start + i * INTERVAL)
+            round_ms.append((time.perf_counter() - started) * 1000)
+            if i == rounds // 2:
+                results['file_mb_at_half'] = os.path.getsize(path) / 2 ** 20
+                results['rss_mb_at_half'] = rss_mb()
+        round_ms.sort()
+        results['record_round_p50_ms'] = round_ms[len(round_ms) // 2]
+        results['record_round_p99_ms'] = round_ms[int(len(round_ms) * 0.99)]
+        results['records_per_s'] = processes / (results['record_round_p50_ms'] / 1000)
+        results['file_mb'] = os.path.getsize(path) / 2 ** 20
+        results['rss_mb'] = rss_mb()
+        stats = history.stats()
+        results['written'] = stats['written']
+        results['stored'] = stats['stored']
+        results['kept_hours'] = (stats['newest'] - stats['oldest']) / 3600
+        results['names'] = stats['names']
+
+        now = time.time()
+        mismatches = []
+        for label, metric, window, ago in (('cpu last hour', 'cpu', 3600, 0), ('cpu last 10 minutes', 'cpu', 600, 0),
+                                           ('memory 10 minutes ago', 'memory', 60, 600),
+                                           ('disk last hour', 'io', 3600, 0)):
+            until = now - ago
+            elapsed, rows = timed(lambda: history.top(metric, until - window, until), repeat)
+            baseline_ms, expected = timed(lambda: python_top(history, metric, until - window, until), 1)
+            if [(row.pid, row.name) for row in rows] != expected:
+                mismatches.append(label)
+            results[f"top {label}"] = (elapsed, baseline_ms, rows.rounds)
+        elapsed, rows = timed(lambda: history.top('cpu'), repeat)
+        results['top cpu whole file'] = (elapsed, None, rows.rounds)
+        elapsed, _ = timed(lambda: history.top('memory', now - 3600, now, by='name'), repeat)
+        results['top memory by name last hour'] = (elapsed, None, None)
+        results['mismatches'] = mismatches
+        history.close()
+    return results
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    hours = float(sys.argv[2]) if len(sys.argv) > 2 else 24
+    size_mb = float(sys.argv[3]) if len(sys.argv) > 3 else 64
+    for key, value in run(processes, hours, size_mb).items():
+        if isinstance(value, tuple):
+            elapsed, baseline, rounds = value
+            line = f"{key:32} {elapsed:8.2f} ms"
+            if baseline is not None:
+                line += f"  (python loop {baseline:.0f} ms)"
+            if rounds is not None:
+                line += f"  {rounds} rounds"
+            print(line)
+        elif isinstance(value, float):
+            print(f"{key:32} {value:8.2f}")
+        else:
+            print(f"{key:32} {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Trigram process search against a linear scan, on a synthetic process list.
+
+Processes come from bench_process_table's synthetic provider with command
+lines, executables and working directories made up to look like a busy
+server: JVM and Python services named by their jar or script, browser
+helpers with long flag lists, and kernel threads with no command line at all.
+Reports index build time, the cost of applying a 1% churn refresh, and the
+latency of substring and regex queries compared with checking every process,
+and verifies that both return the same processes. Queries are timed with
+the ``find`` command's limit of 50 results; the hit counts are totals.
+
+    python benchmarks/bench_process_search.py [process count] [repeat]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_process_table import SyntheticProcesses  # noqa: E402
+from process_search import ProcessSearch  # noqa: E402
+from process_table import ProcessTable  # noqa: E402
+
+SERVICES = ['billing', 'inventory', 'search-api', 'auth', 'gateway', 'reports', 'scheduler', 'notifier']
+
+QUERIES = ['billing', 'search-api.jar', 'manage.py', 'chrome', 'kworker', '/srv/reports', 'alice', 'zzz-missing']
+REGEXES = [r'java .*billing-\d+\.jar', r'manage\.py (runserver|celery)', r'--port[= ]80\d\d', r'renderer.*lang=en']
+
+
+class SyntheticDetails:
+    """``(cmdline, exe, cwd)`` for a synthetic PID, stable across calls"""
+
+    def __init__(self, seed=0):
+        self.seed = seed
+
+    def __call__(self, pid):
+        rng = random.Random(self.seed * 1000003 + pid)
+        service = rng.choice(SERVICES)
+        kind = rng.random()
+        if kind < 0.25:
+            version = rng.randint(1, 3)
+            return (f"/usr/lib/jvm/java-17/bin/java -Xmx2g -Dlog.dir=/var/log/{service} "
+                    f"-cp /opt/{service}/lib/* -jar /opt/{service}/{service}-{version}.jar --port {8000 + rng.randint(0, 99)}",
+                    '/usr/lib/jvm/java-17/bin/java', f"/opt/{service}")
+        if kind < 0.45:
+            task = rng.choice(['runserver', 'celery worker', 'migrate'])
+            return (f"/srv/{service}/venv/bin/python3 /srv/{service}/manage.py {task} --settings={service}.settings",
+                    '/usr/bin/python3.11', f"/srv/{service}")
+        if kind < 0.7:
+            flags = ' '.join(f"--field-trial-handle={rng.randint(0, 10 ** 9)}" for _ in range(4))
+            return (f"/opt/google/chrome/chrome --type=renderer --lang=en-US {flags}",
+                    '/opt/google/chrome/chrome', '/home/alice')
+        if kind < 0.85:
+            return '', '', ''  # kernel threads
+        return (f"/usr/bin/node /srv/{service}/server.js", '/usr/bin/node', f"/srv/{service}")
+
+
+def linear_scan(table, details, match):
+    """The baseline: read every process's fields and check each one"""
+    found = set()
+    for record in table.records.values():
+        cmdline, exe, cwd = details(record.pid)
+        fields = (record.name, exe, cmdline, cwd, record.username or '')
+        if any(match(field.lower()) for field in fields):
+            found.add(record.pid)
+    return found
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def run(count=20000, repeat=20, limit=50):
+    procs = SyntheticProcesses(count, seed=3)
+    details = SyntheticDetails()
+    table = ProcessTable(provider=procs, interval=3600)
+    table.refresh()
+    results = {'processes': count}
+
+    def churn():
+        procs.step()
+        return table.refresh()
+    results['delta_refresh_ms'], _ = timed(churn, 5)
+    results['build_ms'], index = timed(lambda: ProcessSearch(table, details), 1)
+    results.update(index.stats())
+    results['delta_refresh_indexed_ms'], _ = timed(churn, 5)
+
+    mismatches = []
+    query_ms, scan_ms = [], []
+    for query in QUERIES:
+        elapsed, hits = timed(lambda: index.search(query, limit), repeat)
+        query_ms.append(elapsed)
+        baseline_ms, expected = timed(lambda: linear_scan(table, details, lambda text: query in text), 1)
+        scan_ms.append(baseline_ms)
+        if {hit.record.pid for hit in index.search(query)} != expected:
+            mismatches.append(query)
+        results[f"search {query!r}"] = (elapsed, hits.total)
+    for pattern in REGEXES:
+        compiled = re.compile(pattern, re.IGNORECASE)
+        elapsed, hits = timed(lambda: index.search_regex(pattern, limit), repeat)
+        query_ms.append(elapsed)
+        baseline_ms, expected = timed(lambda: linear_scan(table, details, compiled.search), 1)
+        scan_ms.append(baseline_ms)
+        if {hit.record.pid for hit in index.search_regex(pattern)} != expected:
+            mismatches.append(pattern)
+        results[f"regex {pattern!r}"] = (elapsed, hits.total)
+    results['query_median_ms'] = sorted(query_ms)[len(query_ms) // 2]
+    results['query_max_ms'] = max(query_ms)
+    results['linear_scan_median_ms'] = sorted(scan_ms)[len(scan_ms) // 2]
+    results['mismatches'] = mismatches
+    top = index.search('billing', limit=1)
+    results['top_billing'] = f"{top[0].record.name} via {top[0].field}" if top else None
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    for key, value in run(count, repeat).items():
+        if isinstance(value, tuple):
+            print(f"{key:44} {value[0]:8.2f} ms  {value[1]:>6} hits")
+        elif isinstance(value, float):
+            print(f"{key:44} {value:8.2f}")
+        else:
+            print(f"{key:44} {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Process table lookups versus a full process walk per command.
+
+Uses a synthetic provider, so the numbers show the cost of the table itself;
+on a real host every full walk additionally pays several syscalls per
+process.
+
+    python benchmarks/bench_process_table.py [process count]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from process_table import ProcessTable  # noqa: E402
+
+NAMES = ['chrome', 'Google Chrome Helper', 'python3', 'node', 'java', 'postgres', 'nginx', 'bash', 'zsh',
+         'sshd', 'systemd', 'kworker/0:1', 'Slack Helper', 'code', 'dockerd', 'containerd-shim', 'redis-server']
+
+
+class SyntheticProcesses:
+    """A fake process list of ``count`` entries with a configurable churn per refresh"""
+
+    def __init__(self, count, churn=0.01, seed=0):
+        self.rng = random.Random(seed)
+        self.next_pid = 1
+        self.churn = churn
+        self.procs = [self._spawn() for _ in range(count)]
+
+    def _spawn(self):
+        pid = self.next_pid
+        self.next_pid += 1
+        name = self.rng.choice(NAMES)
+        if self.rng.random() < 0.3:
+            name = f"{name}-{self.rng.randint(1, 500)}"
+        return {'pid': pid, 'ppid': max(1, pid // 7), 'name': name, 'username': self.rng.choice(['root', 'alice']),
+                'create_time': 1.7e9 + pid, 'cpu_percent': 0.0, 'memory_percent': self.rng.random()}
+
+    def step(self):
+        for _ in range(int(len(self.procs) * self.churn)):
+            self.procs[self.rng.randrange(len(self.procs))] = self._spawn()
+
+    def __call__(self):
+        for info in self.procs:
+            yield dict(info, cpu_percent=self.rng.random() * 5)
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def run(count=10000, repeat=20):
+    procs = SyntheticProcesses(count)
+    table = ProcessTable(provider=procs, interval=3600)
+    results = {'processes': count}
+    results['cold_refresh_ms'], _ = timed(table.refresh, 1)
+
+    def delta_refresh():
+        procs.step()
+        return table.refresh()
+    results['delta_refresh_ms'], _ = timed(delta_refresh, 5)
+
+    def full_walk_find():
+        return [info for info in procs() if 'chrome' in info['name'].lower()]
+    results['full_walk_find_ms'], walk_matches = timed(full_walk_find, repeat)
+    results['table_search_ms'], table_matches = timed(lambda: table.search('chrome'), repeat)
+    results['table_exact_ms'], _ = timed(lambda: table.find_exact('python3'), repeat)
+    results['table_prefix_ms'], _ = timed(lambda: table.find_prefix('java'), repeat)
+    results['table_snapshot_ms'], _ = timed(table.snapshot, repeat)
+    results['matches'] = (len(walk_matches), len(table_matches))
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    for key, value in run(count).items():
+        print(f"{key:20} {value:.3f}" if isinstance(value, float) else f"{key:20} {value}")
+
+
+if __name__ == '__main__':
+    main()
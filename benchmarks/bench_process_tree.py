@@ -0,0 +1,142 @@
+"""Process tree: one-pass build, incremental updates and application rollups.
+
+Uses the synthetic provider from bench_process_table, whose processes form
+a tree (each PID's parent is PID // 7) and include shells and init among
+their names, so there are applications with helpers underneath launchers.
+Reports the time to index the table in one pass, to work out applications
+and subtree totals, to apply a 1% churn refresh, and to answer "stop
+chrome"/"info chrome". The baseline has every process walk up its own
+parents, as per-process ``parents()`` calls would, but with table lookups
+instead of their system calls; what one real ``parents()`` call costs on
+this host is reported next to it. After the churn the incrementally updated
+tree is checked against one rebuilt from scratch.
+
+    python benchmarks/bench_process_tree.py [process count] [repeat]
+"""
+import os
+import sys
+import time
+
+import psutil
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_process_table import SyntheticProcesses  # noqa: E402
+from process_table import ProcessTable  # noqa: E402
+from process_tree import ProcessTree  # noqa: E402
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def parent_walk(table, tree):
+    """Baseline: each process climbs its own ancestors to find its application and add itself to their totals"""
+    app_of = {}
+    totals = {pid: [0, 0.0, 0.0] for pid in table.by_pid}
+    by_pid = table.by_pid
+    for record in table.records.values():
+        app = None
+        seen = set()
+        ancestor = record
+        while ancestor is not None and ancestor.pid not in seen:
+            seen.add(ancestor.pid)
+            total = totals[ancestor.pid]
+            total[0] += 1
+            total[1] += record.cpu_percent or 0.0
+            total[2] += record.memory_percent or 0.0
+            if app is None and (ancestor is not record and tree.is_launcher(ancestor)):
+                app = last
+            last = ancestor
+            ancestor = by_pid.get(ancestor.ppid)
+        app_of[record.pid] = (app or last).pid
+    return app_of, totals
+
+
+def tree_rollups(tree):
+    """Application and subtree totals of every process from the tree"""
+    view = tree.view()
+    return ({pid: view.app_of(pid) for pid in view.order},
+            {pid: view.totals(pid) for pid in view.order}, tree.applications())
+
+
+def same_totals(left, right):
+    return left.keys() == right.keys() and all(
+        left[pid][0] == right[pid][0] and abs(left[pid][1] - right[pid][1]) < 1e-6
+        and abs(left[pid][2] - right[pid][2]) < 1e-6 for pid in left)
+
+
+def psutil_parents_ms(sample=200):
+    """What one ``parents()`` call costs on this host, for a few real processes"""
+    pids = psutil.pids()[:sample]
+    started = time.perf_counter()
+    for pid in pids:
+        try:
+            psutil.Process(pid).parents()
+        except psutil.Error:
+            pass
+    return (time.perf_counter() - started) / len(pids) * 1000
+
+
+def run(count=10000, repeat=20, churn_steps=20):
+    procs = SyntheticProcesses(count, seed=5)
+    table = ProcessTable(provider=procs, interval=3600)
+    table.refresh()
+    results = {'processes': count}
+
+    def churn():
+        procs.step()
+        return table.refresh()
+    results['delta_refresh_ms'], _ = timed(churn, 5)
+    results['build_ms'], tree = timed(lambda: ProcessTree(table), 1)
+    results['rebuild_ms'], _ = timed(lambda: tree.rebuild(table.snapshot()), repeat)
+    results['applications_view_ms'], view = timed(tree.view, 1)  # worked out on first use
+    results['subtree_totals_ms'], _ = timed(lambda: view.totals(view.order[0]), 1)
+    results['application_totals_ms'], apps = timed(tree.applications, 1)
+    results['applications'] = len(apps)
+    results['parent_walk_ms'], (walked_apps, walked_totals) = timed(lambda: parent_walk(table, tree), 1)
+    results['psutil_parents_call_ms'] = psutil_parents_ms()
+    results['psutil_parents_estimate_ms'] = results['psutil_parents_call_ms'] * count
+    app_of, totals, _ = tree_rollups(tree)
+    results['parent_walk_agrees'] = walked_apps == app_of and same_totals(walked_totals, totals)
+
+    results['delta_refresh_tree_ms'], _ = timed(churn, 5)
+    after_refresh = []
+    for _ in range(churn_steps):
+        procs.step()
+        table.refresh()
+        started = time.perf_counter()
+        tree.applications()
+        tree.subtree_usage(1)
+        after_refresh.append((time.perf_counter() - started) * 1000)
+    results['all_rollups_after_refresh_ms'] = sorted(after_refresh)[len(after_refresh) // 2]
+    app_of, totals, _ = tree_rollups(tree)
+    fresh_app_of, fresh_totals, _ = tree_rollups(ProcessTree(table))
+    results['incremental_matches_rebuild'] = app_of == fresh_app_of and same_totals(totals, fresh_totals)
+
+    procs.step()
+    table.refresh()
+    results['find_chrome_after_refresh_ms'], groups = timed(lambda: tree.find('chrome'), 1)
+    results['find_chrome_ms'], groups = timed(lambda: tree.find('chrome'), repeat)
+    results['chrome_groups'] = len(groups)
+    results['chrome_processes'] = sum(len(group.members) for group in groups)
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    for key, value in run(count, repeat).items():
+        if isinstance(value, float):
+            print(f"{key:32} {value:8.2f}")
+        else:
+            print(f"{key:32} {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""/proc fast-path collector versus psutil.process_iter.
+
+Builds a synthetic /proc-like tree (default 5000 processes) in a temporary
+directory, checks that ProcfsCollector parses every entry correctly, then
+times both collectors on it. psutil is pointed at the same tree through
+``psutil.PROCFS_PATH``, so both pay for the same file reads. On Linux the
+real /proc is timed as well.
+
+    python benchmarks/bench_procfs.py [process count]
+"""
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil  # noqa: E402
+
+from procfs import ProcfsCollector, procfs_available  # noqa: E402
+from process_table import ATTRS  # noqa: E402
+
+BOOT_TIME = 1700000000
+NAMES = ['chrome', 'python3', 'node', 'bash', 'Web Content', 'kworker/0:1-events', '(sd-pam)',
+         'a very long process name']
+
+
+def fake_name(pid):
+    return NAMES[pid % len(NAMES)]
+
+
+def expected_name(pid):
+    # Kernel threads have an empty cmdline, so only the truncated comm is known
+    name = fake_name(pid)
+    return name[:15] if '/' in name else name
+
+
+def build_fake_proc(root, count):
+    """Write ``count`` fake process directories plus the system-wide files"""
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    with open(os.path.join(root, 'stat'), 'w') as f:
+        f.write(f"cpu  100 0 100 1000 0 0 0 0 0 0\nbtime {BOOT_TIME}\n")
+    with open(os.path.join(root, 'meminfo'), 'w') as f:
+        f.write("MemTotal:       16384000 kB\nMemFree:         8192000 kB\nMemAvailable:    8192000 kB\n"
+                "Buffers:          100000 kB\nCached:          1000000 kB\nShared:            10000 kB\n"
+                "Active:          4000000 kB\nInactive:        2000000 kB\nSReclaimable:      50000 kB\n")
+    os.makedirs(os.path.join(root, 'self'), exist_ok=True)
+    for pid in range(1, count + 1):
+        directory = os.path.join(root, str(pid))
+        os.mkdir(directory)
+        name = fake_name(pid)
+        comm = name[:15]
+        rest = ['0'] * 41
+        rest[0] = 'S'
+        rest[1] = str(max(0, pid // 10))  # ppid
+        rest[11] = str(pid % 500)  # utime
+        rest[12] = str(pid % 70)  # stime
+        rest[17] = '1'  # num_threads
+        rest[19] = str(pid * 10)  # starttime
+        rest[20] = str(pid * 4096 * 300)  # vsize
+        rest[21] = str(pid % 1000)  # rss pages
+        with open(os.path.join(directory, 'stat'), 'w') as f:
+            f.write(f"{pid} ({comm}) {' '.join(rest)}\n")
+        with open(os.path.join(directory, 'statm'), 'w') as f:
+            f.write(f"{pid * 300} {pid % 1000} 100 10 0 200 0\n")
+        with open(os.path.join(directory, 'status'), 'w') as f:
+            f.write(f"Name:\t{comm}\nState:\tS (sleeping)\nPid:\t{pid}\nPPid:\t{max(0, pid // 10)}\n"
+                    f"Uid:\t{uid}\t{uid}\t{uid}\t{uid}\nGid:\t0\t0\t0\t0\n")
+        with open(os.path.join(directory, 'cmdline'), 'wb') as f:
+            f.write(b'' if '/' in name else f"/usr/bin/{name}\0--flag\0".encode())
+
+
+def check_fake_proc(collector, count):
+    """The collector must see every fake process with the values written for it"""
+    snap = collector.snapshot()
+    assert len(snap) == count, (len(snap), count)
+    for info in snap.infos():
+        pid = info['pid']
+        assert info['name'] == expected_name(pid), info
+        assert info['ppid'] == max(0, pid // 10), info
+        assert info['create_time'] == BOOT_TIME + pid * 10 / collector.clock_ticks, info
+        assert info['username'] is not None, info
+        expected_memory = (pid % 1000) * collector.page_size / (16384000 * 1024) * 100
+        assert abs(info['memory_percent'] - expected_memory) < 1e-9, info
+
+
+def timed(fn, repeat):
+    fn()  # warm caches (uid lookups, psutil's Process objects)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def psutil_walk():
+    return [proc.info for proc in psutil.process_iter(ATTRS, ad_value=None)]
+
+
+def run(count=5000, repeat=5):
+    results = {'processes': count}
+    with tempfile.TemporaryDirectory() as root:
+        build_fake_proc(root, count)
+        collector = ProcfsCollector(root)
+        check_fake_proc(collector, count)
+        results['fake_procfs_ms'], _ = timed(lambda: list(collector()), repeat)
+        original = psutil.PROCFS_PATH
+        psutil.PROCFS_PATH = root
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)  # the fake meminfo is minimal
+                results['fake_psutil_ms'], infos = timed(psutil_walk, repeat)
+        finally:
+            psutil.PROCFS_PATH = original
+        results['fake_psutil_seen'] = len(infos)
+    if procfs_available():
+        collector = ProcfsCollector()
+        results['real_processes'] = len(collector.snapshot())
+        results['real_procfs_ms'], _ = timed(lambda: list(collector()), repeat)
+        results['real_psutil_ms'], _ = timed(psutil_walk, repeat)
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    for key, value in run(count).items():
+        print(f"{key:20} {value:.3f}" if isinstance(value, float) else f"{key:20} {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Pipelined vs inline recognition, with a fake recognizer and no microphone.
+
+A scripted session of "hey chanti" / command pairs is fed to VoiceThread's
+capture hand-off at the moments each utterance would finish, with the fake
+backend taking ``delay`` seconds per transcript. ``inline`` reproduces the
+old behaviour: the microphone is not read while a transcription is in
+flight, so anything said in that window is lost. ``pipelined`` keeps
+capturing and lets the worker pool catch up. Reports commands delivered,
+utterances lost, wake phrases mistaken for commands, whether commands came
+out in order, and the latency from the end of each command to
+``command_received``.
+
+    python benchmarks/bench_recognition.py [pairs] [delay] [gap]
+"""
+import collections
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['VPM_WAKE_WORD_ENGINE'] = 'recognizer'
+os.environ['VPM_RECOGNIZER'] = 'fake'
+
+import speech_recognition as sr  # noqa: E402
+from PyQt5.QtCore import Qt  # noqa: E402
+
+from speech_output import FakeBackend as FakeSpeech, SpeechQueue  # noqa: E402
+from voice_thread import VoiceThread  # noqa: E402
+
+COMMANDS = ['list processes', 'find chrome', 'system stats', 'stop notepad', 'volume 40']
+SAMPLE_RATE = 16000
+
+
+class QuietProcessManager:
+    """Just what the voice thread touches, without sound"""
+
+    def __init__(self):
+        self.speech = SpeechQueue(FakeSpeech())
+
+    def play_notification(self):
+        pass
+
+
+def voiced_audio(seed, seconds=0.8):
+    """A vowel-like harmonic tone between short silences; ``seed`` makes every clip unique"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 120 + rng.uniform(0, 80)
+    tone = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+    tone *= 0.6 + 0.4 * np.sin(2 * np.pi * 3 * t)
+    silence = np.zeros(SAMPLE_RATE // 5)
+    samples = np.concatenate([silence, tone * 6000, silence]) + rng.normal(0, 30, len(silence) * 2 + len(t))
+    return sr.AudioData(samples.astype(np.int16).tobytes(), SAMPLE_RATE, 2)
+
+
+def script(pairs):
+    utterances = []
+    for i in range(pairs):
+        utterances.append(('hey chanti', voiced_audio(2 * i)))
+        utterances.append((COMMANDS[i % len(COMMANDS)], voiced_audio(2 * i + 1)))
+    return utterances
+
+
+def run_session(pairs, delay, gap, inline):
+    thread = VoiceThread(QuietProcessManager())
+    backend = thread.recognition.backend
+    backend.delay = delay
+    utterances = script(pairs)
+    backend.transcripts = {bytes(audio.frame_data): text for text, audio in utterances}
+    thread.vad.accept(utterances[0][1].frame_data, SAMPLE_RATE)  # warm up numpy
+
+    arrived = collections.defaultdict(collections.deque)
+    received = []
+    done = threading.Event()
+
+    def on_command(text, trace):
+        received.append((text, time.monotonic() - arrived[text].popleft()))
+        trace.release()
+        if len(received) == pairs:
+            done.set()
+
+    thread.command_received.connect(on_command, Qt.DirectConnection)  # no event loop here
+    lost = 0
+    started = time.monotonic()
+    for i, (text, audio) in enumerate(utterances):
+        due = started + (i + 1) * gap
+        now = time.monotonic()
+        if now > due:
+            lost += 1  # the microphone was not being read when this was said
+            continue
+        time.sleep(due - now)
+        arrived[text].append(time.monotonic())
+        thread.handle_audio(audio)
+        if inline:
+            thread.recognition.wait_until_idle()
+    thread.recognition.wait_until_idle(timeout=60)
+    done.wait(0.1)
+    thread.recognition.close()
+    thread.process_manager.speech.close()
+
+    commands = [(text, latency) for text, latency in received if text in COMMANDS]
+    latencies = sorted(latency for _, latency in commands)
+    expected = [text for text, _ in utterances if text in COMMANDS]
+    delivered = [text for text, _ in commands]
+    return {
+        'commands': len(commands),
+        'expected': pairs,
+        'wrong_commands': len(received) - len(commands),  # e.g. a wake phrase taken as the command
+        'lost_utterances': lost,
+        'in_order': delivered == [text for text in expected if text in delivered],
+        'p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else None,
+        'max_ms': latencies[-1] * 1000 if latencies else None,
+        'session_s': time.monotonic() - started,
+    }
+
+
+def run(pairs=10, delay=0.8, gap=0.6):
+    return {'inline': run_session(pairs, delay, gap, inline=True),
+            'pipelined': run_session(pairs, delay, gap, inline=False)}
+
+
+def main():
+    pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.8
+    gap = float(sys.argv[3]) if len(sys.argv) > 3 else 0.6
+    print(f"{pairs} wake/command pairs, one utterance every {gap:g}s, recognizer takes {delay:g}s")
+    for mode, result in run(pairs, delay, gap).items():
+        print(f"\n{mode}")
+        for key, value in result.items():
+            print(f"  {key:16} {value:.1f}" if isinstance(value, float) else f"  {key:16} {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Command server throughput, measured from local clients.
+
+Starts a CommandServer on a temporary socket, then opens ``clients``
+concurrent connections that each pipeline ``per_client`` requests drawn from
+a mix of read-only commands, and reports commands per second and latency
+percentiles as seen by the clients.
+
+    python benchmarks/bench_server.py [clients] [per_client]
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('VPM_TTS_BACKEND', 'print')
+
+from command_server import CommandServer  # noqa: E402
+from process_manager import ProcessManager  # noqa: E402
+
+MIX = ['help', 'find python', 'system stats', 'kill 999999', 'info 1', 'not a command']
+
+
+def start_server(path):
+    server = CommandServer(ProcessManager(), path=path)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    def serve():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, name='bench-server', daemon=True).start()
+    ready.wait()
+    return server, loop
+
+
+def stop_server(server, loop):
+    async def shutdown():
+        for _ in range(100):  # let handlers see their clients hang up
+            if not server.clients:
+                break
+            await asyncio.sleep(0.01)
+        server.server.close()
+        await server.server.wait_closed()
+        server.server = None
+
+    asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    server.close()
+
+
+async def client(path, count, latencies):
+    reader, writer = await asyncio.open_unix_connection(path, limit=1 << 20)
+    sent = {}
+    for i in range(count):
+        sent[i] = time.perf_counter()
+        writer.write((json.dumps({'id': i, 'command': MIX[i % len(MIX)]}) + '\n').encode())
+    await writer.drain()
+    failures = 0
+    for _ in range(count):
+        reply = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - sent[reply['id']])
+        failures += reply['command'] is None and reply['error'] != 'unknown command'
+    writer.close()
+    return failures
+
+
+async def load(path, clients, per_client):
+    latencies = []
+    started = time.perf_counter()
+    failures = await asyncio.gather(*(client(path, per_client, latencies) for _ in range(clients)))
+    return time.perf_counter() - started, latencies, sum(failures)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run(clients=16, per_client=200):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sock')
+        server, loop = start_server(path)
+        try:
+            asyncio.run(load(path, 1, 20))  # warm up
+            elapsed, latencies, failures = asyncio.run(load(path, clients, per_client))
+        finally:
+            stop_server(server, loop)
+    total = clients * per_client
+    return {'clients': clients, 'commands': total, 'failures': failures,
+            'commands_per_s': total / elapsed, 'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000}
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    per_client = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    for key, value in run(clients, per_client).items():
+        print(f"{key:16} {value:.1f}" if isinstance(value, float) else f"{key:16} {value}")
+
+
+if __name__ == '__main__':
+    main()
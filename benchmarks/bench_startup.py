@@ -0,0 +1,107 @@
+"""Startup cost: import time, time to first command and time to first window.
+
+Every measurement runs in a fresh interpreter. The script exits non-zero if
+the entry point pulls in the speech stack, Qt or the command engine (and
+psutil) before it needs them, or if a timing goes over its budget, so it
+doubles as a regression check.
+
+    python benchmarks/bench_startup.py [--runs N] [--max-import-ms MS] [--max-first-command-ms MS]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ['PyQt5', 'speech_recognition', 'pyaudio', 'numpy']
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'ms': elapsed * 1000, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+FIRST_COMMAND_PROBE = """
+import json, time
+started = time.perf_counter()
+import voice_process_manager
+from commands import load_plugins
+load_plugins()
+voice_process_manager.run_headless(['help'])
+print(json.dumps({'ms': (time.perf_counter() - started) * 1000}))
+"""
+
+FIRST_WINDOW_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+from gui import MainWindow
+app = QApplication([])
+window = MainWindow()
+window.show()
+app.processEvents()
+elapsed = time.perf_counter() - started
+loaded = [m for m in {heavy!r} if m in sys.modules]
+window.close()
+print(json.dumps({{'ms': elapsed * 1000, 'loaded': loaded}}))
+"""
+
+
+def probe(code, runs):
+    env = dict(os.environ, VPM_TTS_BACKEND='print', QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    results = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    best = min(results, key=lambda r: r['ms'])
+    return best
+
+
+def run(runs=5):
+    results = {}
+    # The entry point itself imports nothing but argparse; psutil comes with the command engine
+    entry = probe(IMPORT_PROBE.format(module='voice_process_manager', heavy=HEAVY + ['psutil', 'commands']), runs)
+    results['import_ms'] = entry['ms']
+    results['import_loaded'] = entry['loaded']
+    results['first_command_ms'] = probe(FIRST_COMMAND_PROBE, runs)['ms']
+    try:
+        window = probe(FIRST_WINDOW_PROBE.format(heavy=HEAVY), runs)
+        results['first_window_ms'] = window['ms']
+        results['window_loaded'] = window['loaded']
+    except subprocess.CalledProcessError as e:
+        results['first_window_error'] = e.stderr.strip().splitlines()[-1] if e.stderr else str(e)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-import-ms', type=float, default=150.0)
+    parser.add_argument('--max-first-command-ms', type=float, default=1000.0)
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    for key, value in results.items():
+        print(f"{key:20} {value:.1f}" if isinstance(value, float) else f"{key:20} {value}")
+
+    failures = []
+    if results['import_loaded']:
+        failures.append(f"importing the entry point loaded {', '.join(results['import_loaded'])}")
+    speech = [m for m in results.get('window_loaded', []) if m != 'PyQt5']
+    if speech:
+        failures.append(f"showing the window loaded {', '.join(speech)}")
+    if results['import_ms'] > args.max_import_ms:
+        failures.append(f"import took {results['import_ms']:.0f} ms (budget {args.max_import_ms:.0f})")
+    if results['first_command_ms'] > args.max_first_command_ms:
+        failures.append(f"first command took {results['first_command_ms']:.0f} ms "
+                        f"(budget {args.max_first_command_ms:.0f})")
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
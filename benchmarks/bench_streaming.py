@@ -0,0 +1,103 @@
+"""Streaming recognition with early commit vs whole-utterance recognition.
+
+Replays recorded partial-result timelines (``fixtures/streaming_commands.json``)
+through the voice thread's StreamingCommand in 64 ms chunks, the size the
+capture loop hands out, and notes how much audio had been fed when the
+command was committed. Latency is measured from the moment the user stops
+talking:
+
+- whole utterance: the capture waits ``pause`` seconds of silence, then the
+  recognizer takes ``batch_delay`` for the round trip;
+- streaming: the commit point minus the spoken duration (negative means the
+  command ran before the user finished), or ``pause + final_delay`` when the
+  command could not be committed early.
+
+    python benchmarks/bench_streaming.py [--pause 0.5] [--batch-delay 0.8] [--final-delay 0.1]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from commands import EarlyCommit, registry  # noqa: E402
+from recognition import FakeStreamingBackend  # noqa: E402
+from voice_thread import StreamingCommand  # noqa: E402
+
+FIXTURES = os.path.join(BENCH_DIR, 'fixtures', 'streaming_commands.json')
+SAMPLE_RATE = 16000
+CHUNK_BYTES = 1024 * 2
+
+
+def replay(recording, pause):
+    """Seconds of audio fed when the command committed, or None, and the text that was queued"""
+    committed = []
+    stream = StreamingCommand(FakeStreamingBackend([recording]), committed.append, SAMPLE_RATE)
+    total = int((recording['duration'] + pause) * SAMPLE_RATE * 2)
+    chunk = bytes(CHUNK_BYTES)
+    fed = 0
+    commit_at = None
+    while fed < total:
+        stream.on_audio(chunk, 0)
+        fed += len(chunk)
+        if committed and commit_at is None:
+            commit_at = fed / (SAMPLE_RATE * 2)
+    return commit_at, stream.finish()
+
+
+def match_cost_us(recordings, repeat=2000):
+    partials = [(partial, at) for recording in recordings for at, partial in recording['partials']]
+    started = time.perf_counter()
+    for _ in range(repeat):
+        early = EarlyCommit(registry)
+        for partial, at in partials:
+            early.committed = None
+            early.feed(partial, at)
+    return (time.perf_counter() - started) / (repeat * len(partials)) * 1e6
+
+
+def run(pause=0.5, batch_delay=0.8, final_delay=0.1, path=FIXTURES):
+    with open(path) as f:
+        recordings = json.load(f)
+    rows = []
+    for recording in recordings:
+        commit_at, text = replay(recording, pause)
+        batch = pause + batch_delay
+        streaming = commit_at - recording['duration'] if commit_at is not None else pause + final_delay
+        rows.append({'text': recording['text'], 'queued': text, 'early': commit_at is not None,
+                     'batch_ms': batch * 1000, 'streaming_ms': streaming * 1000})
+    return {
+        'rows': rows,
+        'early_commits': sum(row['early'] for row in rows),
+        'wrong': sum(registry.match(row['queued'] or '') != registry.match(row['text']) for row in rows),
+        'batch_median_ms': statistics.median(row['batch_ms'] for row in rows),
+        'streaming_median_ms': statistics.median(row['streaming_ms'] for row in rows),
+        'match_us': match_cost_us(recordings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pause', type=float, default=0.5, help='silence that ends an utterance (s)')
+    parser.add_argument('--batch-delay', type=float, default=0.8, help='whole-utterance recognizer round trip (s)')
+    parser.add_argument('--final-delay', type=float, default=0.1, help='streaming final result after the pause (s)')
+    parser.add_argument('--fixtures', default=FIXTURES)
+    args = parser.parse_args()
+
+    results = run(args.pause, args.batch_delay, args.final_delay, args.fixtures)
+    print(f"{'command':22}{'queued':22}{'early':>6}{'whole ms':>10}{'stream ms':>11}")
+    for row in results['rows']:
+        print(f"{row['text']:22}{row['queued'] or '-':22}{'yes' if row['early'] else 'no':>6}"
+              f"{row['batch_ms']:>10.0f}{row['streaming_ms']:>11.0f}")
+    print(f"\nearly commits        {results['early_commits']} of {len(results['rows'])}")
+    print(f"wrong commands       {results['wrong']}")
+    print(f"median after speech  {results['batch_median_ms']:.0f} ms -> {results['streaming_median_ms']:.0f} ms")
+    print(f"grammar check        {results['match_us']:.1f} us per partial")
+
+
+if __name__ == '__main__':
+    main()
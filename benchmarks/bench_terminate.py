@@ -0,0 +1,45 @@
+"""Batched termination time versus process count.
+
+Spawns ``count`` sleeping children plus a few that ignore SIGTERM, then
+terminates them all through ProcessManager.terminate. The elapsed time
+should stay close to the grace period whatever the count.
+
+    python benchmarks/bench_terminate.py [count ...]
+"""
+import collections
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('VPM_TTS_BACKEND', 'print')
+
+from process_manager import ProcessManager  # noqa: E402
+
+STUBBORN = [sys.executable, '-c', 'import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); time.sleep(60)']
+
+
+def run(count=200, stubborn=5, grace=1.0):
+    manager = ProcessManager()
+    children = [subprocess.Popen(['sleep', '60']) for _ in range(count)]
+    children += [subprocess.Popen(STUBBORN) for _ in range(stubborn)]
+    time.sleep(0.5)  # let the stubborn ones install their handler
+    started = time.perf_counter()
+    outcomes = manager.terminate(pids=[child.pid for child in children], grace=grace)
+    elapsed = time.perf_counter() - started
+    for child in children:
+        child.wait()
+    counts = collections.Counter(result['outcome'] for result in outcomes.values())
+    return {'processes': count + stubborn, 'grace_s': grace, 'elapsed_s': elapsed, **counts}
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10, 50, 200]
+    for count in counts:
+        print(' '.join(f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+                       for key, value in run(count).items()))
+
+
+if __name__ == '__main__':
+    main()
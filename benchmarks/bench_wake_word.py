@@ -0,0 +1,46 @@
+"""Offline wake word engine: hit rate, latency and false accepts on fixtures.
+
+Replays the clips in fixtures/wake_word (made by wake_word_fixtures.py)
+through TemplateWakeWordEngine in 1024-sample chunks, as the microphone
+callback delivers them, once with the calibrated threshold and once with the
+old rule (the largest distance between two templates times 1.5). Latency is
+measured from the end of speech in each clip, so a negative value means the
+engine fired during the last syllable.
+
+    python benchmarks/bench_wake_word.py [fixture directory]
+"""
+import json
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from wake_word import TemplateWakeWordEngine, _wav_files, evaluate, subsequence_dtw  # noqa: E402
+from wake_word_fixtures import FIXTURE_DIR  # noqa: E402
+
+
+def spread_threshold(engine):
+    """The old threshold: how far apart the enrolled templates are, times 1.5"""
+    return max(subsequence_dtw(template, other) for i, template in enumerate(engine.templates)
+               for j, other in enumerate(engine.templates) if i != j) * 1.5
+
+
+def run(directory=FIXTURE_DIR):
+    templates = os.path.join(directory, 'templates')
+    positive = _wav_files(os.path.join(directory, 'positive'))
+    negative = _wav_files(os.path.join(directory, 'negative'))
+    engine = TemplateWakeWordEngine.from_directory(templates)
+    results = {'calibrated': dict(threshold=engine.threshold, **evaluate(engine, positive, negative))}
+    old = TemplateWakeWordEngine.from_directory(templates, threshold=spread_threshold(engine))
+    results['template_spread'] = dict(threshold=old.threshold, **evaluate(old, positive, negative))
+    return results
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else FIXTURE_DIR
+    print(json.dumps(run(directory), indent=2))
+
+
+if __name__ == '__main__':
+    main()
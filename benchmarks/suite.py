@@ -0,0 +1,221 @@
+"""Offline benchmark suite for the command and process hot paths.
+
+Runs without a microphone, speaker or network: speech goes to FakeBackend,
+processes come from the synthetic provider in bench_process_table, and every
+command handler side effect (launching apps, killing, volume, screenshots,
+...) is replaced by a no-op. Covers normalization, grammar matching and
+end-to-end dispatch per command type, and process table refresh, search,
+listing and formatting at each size.
+
+Results are flattened to ``section.metric`` keys and can be saved as JSON;
+``--compare`` flags every timing that got worse than a previous run by more
+than ``--threshold`` and exits non-zero if there are any.
+
+    python benchmarks/suite.py --output before.json
+    python benchmarks/suite.py --compare before.json --sizes 1000 10000
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+import bench_dispatch  # noqa: E402
+import bench_normalizer  # noqa: E402
+import bench_process_search  # noqa: E402
+import bench_process_table  # noqa: E402
+from commands import CommandContext, registry  # noqa: E402
+from process_manager import ProcessManager  # noqa: E402
+from process_search import ProcessSearch  # noqa: E402
+from process_table import ProcessTable  # noqa: E402
+from process_tree import ProcessTree  # noqa: E402
+from speech_output import FakeBackend, SpeechQueue  # noqa: E402
+from system_stats import SystemStatsCollector  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10000, 50000]
+HIGHER_IS_BETTER = ('accuracy', '_per_s')
+LOWER_IS_BETTER = ('_ms', '_us')
+# Changes smaller than this are timer noise, whatever the percentage
+NOISE_FLOOR = {'_us': 5.0, '_ms': 0.1}
+
+
+class StubProcessManager(ProcessManager):
+    """ProcessManager over a given table, with every side effect replaced by a no-op"""
+
+    SIDE_EFFECTS = ['start_process', 'stop_process', 'set_volume', 'set_brightness', 'adjust_brightness',
+                    'play_notification', 'system_control', 'take_screenshot', 'open_website', 'switch_to_app',
+                    'focus_app', 'monitor_process']
+
+    def __init__(self, table):
+        self.mac_app_names = {}
+        self.common_websites = {}
+        self.system_info = {}
+        self.speech = SpeechQueue(FakeBackend())
+        self.process_table = table
+        self.process_search = ProcessSearch(table, bench_process_search.SyntheticDetails())
+        self.process_tree = ProcessTree(table)
+        self.stats_collector = SystemStatsCollector()
+        self.history = None
+        self.termination_grace = 0.0
+        self.kill_grace = 0.0
+        self.calls = []
+        self.update_system_info()
+
+    def terminate_processes(self, procs, grace=None, force=False):
+        self.calls.append(('terminate_processes', len(procs)))
+        return {}
+
+
+def _no_op(name):
+    def method(self, *args, **kwargs):
+        self.calls.append((name, args))
+    return method
+
+
+for _name in StubProcessManager.SIDE_EFFECTS:
+    setattr(StubProcessManager, _name, _no_op(_name))
+
+
+def synthetic_table(size):
+    table = ProcessTable(provider=bench_process_table.SyntheticProcesses(size), interval=3600)
+    table.refresh()
+    return table
+
+
+def timed(fn, repeat):
+    """Best of ``repeat`` runs, in seconds; the minimum is the least noisy estimate"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_normalization():
+    results = {}
+    for name, result in bench_normalizer.run().items():
+        results[f"{name}.accuracy"] = result['accuracy']
+        results[f"{name}.call_us"] = result['us_per_call']
+    return results
+
+
+def bench_match(count=5000):
+    result = bench_dispatch.run(count)
+    results = {'all.match_us': result['us_per_dispatch']}
+    for name, us in result['per_command_us'].items():
+        results[f"{name}.match_us"] = us
+    return results
+
+
+def bench_dispatch_end_to_end(count=5000, size=10000):
+    """Full registry.dispatch, handler included, per command type"""
+    manager = StubProcessManager(synthetic_table(size))
+    ctx = CommandContext(manager, show=lambda lines: None)
+    per_command = {}
+    for text in bench_dispatch.synthetic_transcripts(count, seed=1):
+        started = time.perf_counter()
+        result = registry.dispatch(text, ctx)
+        elapsed = time.perf_counter() - started
+        per_command.setdefault(result['command'] or '(no match)', []).append(elapsed)
+    manager.speech.close()
+    return {f"{name}.dispatch_us": statistics.median(times) * 1e6 for name, times in sorted(per_command.items())}
+
+
+def bench_processes(size, repeat=5):
+    results = {f"{key}": value for key, value in bench_process_table.run(size, repeat=repeat).items()
+               if isinstance(value, float)}
+    manager = StubProcessManager(synthetic_table(size))
+    results['list_format_ms'] = timed(manager.list_processes, repeat) * 1000
+    results['apps_format_ms'] = timed(manager.list_applications, repeat) * 1000
+    ctx = CommandContext(manager, show=lambda lines: None)
+    find = registry.match('find chrome')[0].handler
+    results['find_format_ms'] = timed(lambda: find(ctx, 'chrome'), repeat) * 1000
+    results['stats_format_ms'] = timed(manager.get_system_stats, repeat) * 1000
+    manager.speech.close()
+    return results
+
+
+def flatten(prefix, values):
+    return {f"{prefix}.{key}": value for key, value in values.items()}
+
+
+def run(sizes=DEFAULT_SIZES):
+    results = {}
+    results.update(flatten('normalizer', bench_normalization()))
+    results.update(flatten('match', bench_match()))
+    results.update(flatten('dispatch', bench_dispatch_end_to_end()))
+    for size in sizes:
+        results.update(flatten(f"processes_{size}", bench_processes(size)))
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit,
+            'python': platform.python_version(), 'platform': platform.platform()}
+
+
+def compare(results, baseline, threshold):
+    """Metrics that moved the wrong way by more than ``threshold`` (a fraction)"""
+    regressions = []
+    for key, value in results.items():
+        before = baseline.get(key)
+        if not isinstance(value, (int, float)) or not isinstance(before, (int, float)) or before <= 0:
+            continue
+        if key.endswith(HIGHER_IS_BETTER):
+            change = (before - value) / before
+        elif key.endswith(LOWER_IS_BETTER):
+            change = (value - before) / before
+            if value - before < NOISE_FLOOR[key[-3:]]:
+                continue
+        else:
+            continue
+        if change > threshold:
+            regressions.append((key, before, value, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark suite')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='synthetic process counts')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='JSON file from an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='flag metrics more than this fraction worse than the baseline (default 0.25)')
+    args = parser.parse_args()
+
+    results = run(args.sizes)
+    for key, value in results.items():
+        print(f"{key:48} {value:12.3f}" if isinstance(value, float) else f"{key:48} {value:>12}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'meta': metadata(), 'results': results}, f, indent=2, sort_keys=True)
+        print(f"\nSaved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline.get('results', baseline), args.threshold)
+        print(f"\nCompared with {args.compare} ({baseline.get('meta', {}).get('commit') or 'unknown commit'}): "
+              f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+        for key, before, after, change in regressions:
+            print(f"  {key:46} {before:10.3f} -> {after:10.3f}  ({change:+.0%})")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
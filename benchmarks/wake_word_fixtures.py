@@ -0,0 +1,156 @@
+"""Synthetic wake word fixtures for bench_wake_word.
+
+There are no microphone recordings in the repository, so the clips are made
+with a small source-filter synthesizer: a glottal pulse train with jitter and
+vibrato through formant resonances for vowels and nasals, shaped noise for
+fricatives and bursts. Every clip comes from a fixed seed, so running this
+script again rewrites identical files.
+
+``templates/`` holds three enrollment clips of "hey chanti" from one speaker.
+``positive/`` has the same speaker saying it faster and slower, at a
+slightly different pitch, in room noise and over microphone hiss. ``negative/`` has other phrases
+from that speaker and another one (including the near misses "hey",
+"chanel", "anti" and "hey charlie"), fan noise and music.
+
+    python benchmarks/wake_word_fixtures.py [directory]
+"""
+import os
+import sys
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'wake_word')
+
+# name -> (kind, seconds, formant tracks) for voiced sounds, (kind, seconds, centre Hz) for noise
+PHONES = {
+    'h': ('noise', 0.07, 1500), 'ch': ('noise', 0.10, 3500), 't': ('noise', 0.03, 4000),
+    'k': ('noise', 0.04, 2000), 'p': ('noise', 0.03, 1000), 's': ('noise', 0.10, 5500), 'f': ('noise', 0.08, 6000),
+    'ey': ('voiced', 0.20, (600, 420), (1900, 2300), (2600, 2900)),
+    'a': ('voiced', 0.15, (750, 750), (1250, 1200), (2500, 2500)),
+    'i': ('voiced', 0.18, (320, 300), (2200, 2400), (3000, 3100)),
+    'o': ('voiced', 0.16, (500, 450), (900, 800), (2500, 2500)),
+    'u': ('voiced', 0.14, (320, 320), (800, 800), (2300, 2300)),
+    'e': ('voiced', 0.14, (550, 550), (1800, 1800), (2500, 2500)),
+    'n': ('voiced', 0.06, (280, 280), (1500, 1500), (2500, 2500)),
+    'm': ('voiced', 0.07, (250, 250), (1200, 1200), (2300, 2300)),
+    'l': ('voiced', 0.06, (350, 350), (1100, 1100), (2700, 2700)),
+    'r': ('voiced', 0.07, (450, 450), (1200, 1200), (1700, 1700)),
+}
+WAKE = 'h ey ch a n t i'
+
+USER = {'pitch': 130, 'formants': 1.0}
+OTHER = {'pitch': 210, 'formants': 1.15}
+
+
+def _envelope(n, ramp=80):
+    ramp = min(n // 4, ramp)
+    envelope = np.ones(n)
+    envelope[:ramp] = np.linspace(0, 1, ramp)
+    envelope[n - ramp:] = np.linspace(1, 0, ramp)
+    return envelope
+
+
+def phrase(phones, rng, pitch=130, formants=1.0, tempo=1.0):
+    """Synthesize a space-separated phone string, peaking at 0.5"""
+    pieces = []
+    for phone in phones.split():
+        kind, seconds, *shape = PHONES[phone]
+        n = int(seconds / tempo * SAMPLE_RATE * rng.uniform(0.9, 1.1))
+        t = np.arange(n) / SAMPLE_RATE
+        if kind == 'noise':
+            spectrum = np.fft.rfft(rng.normal(0, 1, n))
+            freqs = np.fft.rfftfreq(n, 1 / SAMPLE_RATE)
+            centre = shape[0] * formants
+            spectrum *= np.exp(-((freqs - centre) / (centre * 0.35)) ** 2)
+            piece = np.fft.irfft(spectrum, n) * 0.25
+        else:
+            f0 = pitch * (1 + 0.04 * np.sin(2 * np.pi * 4 * t)) * rng.uniform(0.97, 1.03)
+            phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+            progress = t / max(t[-1], 1e-9)
+            tracks = [(start + (end - start) * progress) * formants for start, end in shape]
+            piece = np.zeros(n)
+            for k in range(1, int(7000 / pitch)):
+                harmonic = f0 * k
+                gain = sum(1 / (1 + ((harmonic - f) / (50 + 0.05 * f)) ** 2) / (i + 1) for i, f in enumerate(tracks))
+                piece += gain * np.sin(k * phase) / k
+        pieces.append(piece / (np.abs(piece).max() + 1e-9) * (0.25 if kind == 'noise' else 1.0) * _envelope(n))
+    return np.concatenate(pieces) * 0.5
+
+
+def room(rng, n, level):
+    """Low-pass fan/room noise at ``level`` RMS"""
+    spectrum = np.fft.rfft(rng.normal(0, 1, n))
+    spectrum /= np.sqrt(1 + np.fft.rfftfreq(n, 1 / SAMPLE_RATE) / 300)
+    noise = np.fft.irfft(spectrum, n)
+    return noise / (noise.std() + 1e-12) * level
+
+
+def music(rng, seconds):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    out = np.zeros(len(t))
+    for start in np.arange(0, seconds, 0.5):
+        mask = (t >= start) & (t < start + 0.5)
+        root = 220 * 2 ** (rng.integers(0, 12) / 12)
+        for ratio in (1, 1.26, 1.5):
+            out[mask] += np.sin(2 * np.pi * root * ratio * t[mask]) * np.exp(-3 * (t[mask] - start))
+    return out / np.abs(out).max() * 0.3
+
+
+def clip(rng, speech, seconds, noise_level, lead=0.3, hiss=0.0):
+    """``speech`` placed ``lead`` seconds into ``seconds`` of room noise and white ``hiss``"""
+    out = room(rng, int(seconds * SAMPLE_RATE), noise_level) + rng.normal(0, hiss, int(seconds * SAMPLE_RATE))
+    start = int(lead * SAMPLE_RATE)
+    speech = speech[:len(out) - start]
+    out[start:start + len(speech)] += speech
+    return out
+
+
+def write(path, samples):
+    pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(pcm.tobytes())
+
+
+def fixtures(seed=7):
+    """``{'templates': [(name, samples)], 'positive': [...], 'negative': [...]}``"""
+    rng = np.random.default_rng(seed)
+    quiet = 0.002  # about 40 dB below the speech
+    templates = [(f"template_{i}", clip(rng, phrase(WAKE, rng, **USER), 1.0, quiet, lead=0.05))
+                 for i in range(3)]
+
+    positive = []
+    for tempo, pitch, noise in ((1.0, 1.0, 0.005), (0.8, 1.0, 0.005), (1.25, 1.0, 0.005), (1.0, 1.08, 0.005),
+                                (0.85, 0.94, 0.01), (1.15, 1.05, 0.01), (1.0, 1.0, 0.02), (0.9, 1.0, 0.02)):
+        speech = phrase(WAKE, rng, pitch=USER['pitch'] * pitch, formants=USER['formants'], tempo=tempo)
+        positive.append((f"tempo{tempo:.2f}_pitch{pitch:.2f}_noise{noise}", clip(rng, speech, 1.5, noise)))
+    for tempo in (0.8, 1.2):  # a laptop microphone's hiss, about 25 dB below the speech
+        speech = phrase(WAKE, rng, tempo=tempo, **USER)
+        positive.append((f"tempo{tempo:.2f}_hiss", clip(rng, speech, 1.5, 0.002, hiss=0.01)))
+
+    negative = []
+    for name, phones, speaker in (('hey', 'h ey', USER), ('chanel', 'ch a n e l', USER), ('anti', 'a n t i', USER),
+                                  ('okay_computer', 'o k ey k o m p u t e r', USER),
+                                  ('stop_chrome', 's t o p k r o m', USER), ('hello', 'h e l o', OTHER),
+                                  ('hey_charlie', 'h ey ch a r l i', USER)):
+        negative.append((name, clip(rng, phrase(phones, rng, **speaker), 2.0, 0.005)))
+    negative.append(('fan_noise', room(rng, 2 * SAMPLE_RATE, 0.03)))
+    negative.append(('music', music(rng, 2.0) + room(rng, 2 * SAMPLE_RATE, 0.005)))
+    return {'templates': templates, 'positive': positive, 'negative': negative}
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else FIXTURE_DIR
+    for kind, clips in fixtures().items():
+        os.makedirs(os.path.join(directory, kind), exist_ok=True)
+        for name, samples in clips:
+            write(os.path.join(directory, kind, f"{name}.wav"), samples)
+        print(f"{kind}: {len(clips)} clips")
+
+
+if __name__ == '__main__':
+    main()
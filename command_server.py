@@ -0,0 +1,203 @@
+"""Local command server: newline-delimited JSON over a Unix domain socket.
+
+Each request line is an object such as ``{"id": 1, "command": "find chrome"}``
+and each reply line carries the same ``id`` with the dispatcher's structured
+result, plus whatever the command showed or would have said. ``ok`` is false
+when the action itself failed, e.g. no such process or no volume control. Commands run on
+a CommandRunner pool with the same registry and timeouts as voice commands.
+Requests on one connection are handled concurrently, so replies may come
+back out of order; match them up by ``id``.
+
+    python command_server.py "find chrome" "system stats"
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+
+from commands import CommandContext, CommandRunner, registry
+from tracing import get_tracer
+
+
+def default_socket_path():
+    """``$VPM_SOCKET``, else a per-user socket in the runtime directory"""
+    path = os.environ.get('VPM_SOCKET')
+    if path:
+        return path
+    runtime = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(runtime, f"voice-process-manager-{os.getuid()}.sock")
+
+
+def json_default(value):
+    if hasattr(value, 'as_dict'):
+        return value.as_dict()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+class CapturingContext(CommandContext):
+    """Collects what a command shows and says so it can be sent back to the client"""
+
+    def __init__(self, process_manager, job=None, speak_aloud=False):
+        super().__init__(process_manager, job=job)
+        self.output = []
+        self.spoken = []
+        self.speak_aloud = speak_aloud
+
+    def speak(self, text):
+        self.spoken.append(text)
+        if self.speak_aloud:
+            super().speak(text)
+
+    def show(self, lines):
+        self.output.extend(lines)
+
+
+class CommandServer:
+    def __init__(self, process_manager, path=None, max_workers=8, speak=False):
+        self.process_manager = process_manager
+        self.path = path or default_socket_path()
+        self.speak = speak
+        self.runner = CommandRunner(registry, self.make_context, max_workers=max_workers)
+        self.tracer = get_tracer()
+        self.server = None
+        self.clients = 0
+        self.requests = 0
+
+    def make_context(self, job):
+        ctx = CapturingContext(self.process_manager, job=job, speak_aloud=self.speak)
+        job.context = ctx
+        return ctx
+
+    async def execute(self, request):
+        text = request.get('command')
+        if not isinstance(text, str) or not text.strip():
+            return {'command': None, 'ok': False, 'error': 'missing "command"'}
+        job = self.runner.submit(text, self.tracer.begin('ipc'))
+        result = await asyncio.wrap_future(job.future)
+        if job.error or result is None:
+            response = {'command': job.name, 'ok': False, 'error': job.error or 'failed'}
+        else:
+            response = dict(result)
+        ctx = getattr(job, 'context', None)
+        if ctx is not None:
+            response['output'] = ctx.output
+            response['spoken'] = ctx.spoken
+            # A failed action says why; that is a better error than 'failed'
+            if not response['ok'] and response.get('error') == 'failed' and ctx.spoken:
+                response['error'] = ctx.spoken[-1]
+        return response
+
+    async def handle_client(self, reader, writer):
+        self.clients += 1
+        write_lock = asyncio.Lock()
+        pending = set()
+
+        async def answer(line):
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError('expected a JSON object')
+            except ValueError as e:
+                request = {}
+                response = {'command': None, 'ok': False, 'error': f"invalid request: {e}"}
+            else:
+                response = await self.execute(request)
+            if 'id' in request:
+                response['id'] = request['id']
+            data = (json.dumps(response, default=json_default) + '\n').encode()
+            async with write_lock:
+                writer.write(data)
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                self.requests += 1
+                task = asyncio.ensure_future(answer(line))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.path):
+            return
+        with socket.socket(socket.AF_UNIX) as probe:
+            try:
+                probe.connect(self.path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.path)  # left behind by a server that did not shut down cleanly
+                return
+        raise RuntimeError(f"A command server is already listening on {self.path}")
+
+    async def start(self):
+        self._remove_stale_socket()
+        self.server = await asyncio.start_unix_server(self.handle_client, path=self.path)
+        os.chmod(self.path, 0o600)  # other users must not drive our process manager
+        return self.server
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        self.runner.shutdown()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def send_commands(commands, path=None, timeout=60.0):
+    """Send ``commands`` over one connection and return the replies in the same order"""
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path or default_socket_path())
+        stream = sock.makefile('rwb')
+        for i, text in enumerate(commands):
+            stream.write((json.dumps({'id': i, 'command': text}) + '\n').encode())
+        stream.flush()
+        replies = {}
+        while len(replies) < len(commands):
+            line = stream.readline()
+            if not line:
+                break
+            reply = json.loads(line)
+            replies[reply.get('id')] = reply
+    return [replies.get(i) for i in range(len(commands))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Send commands to a running command server')
+    parser.add_argument('commands', nargs='+')
+    parser.add_argument('--socket', default=None, help='socket path (default: $VPM_SOCKET or the runtime dir)')
+    args = parser.parse_args(argv)
+    try:
+        replies = send_commands(args.commands, args.socket)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print("No command server running; start one with: python voice_process_manager.py --serve")
+        return 1
+    for reply in replies:
+        print(json.dumps(reply, indent=2, default=json_default))
+    return 0 if all(reply and reply.get('ok') for reply in replies) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,996 @@
+"""Declarative voice command grammar and dispatcher.
+
+Every command is registered with one or more patterns such as
+``'kill {pid:pid}'`` or ``'switch to {app:app}'``. Patterns are compiled into
+a token trie, so a transcript is dispatched in a single left-to-right walk
+with typed slot extraction instead of a chain of substring checks, and the
+``help`` text is generated from the same table.
+
+Plugins add commands with the ``command`` decorator:
+
+    from commands import command
+
+    @command('weather {city:text}', section='Plugins', description='Read the forecast')
+    def weather(ctx, city):
+        ctx.speak(f"No forecast for {city} yet")
+"""
+import concurrent.futures
+import importlib
+import itertools
+import math
+import os
+import re
+import subprocess
+import threading
+import time
+
+import psutil
+
+from tracing import NULL_TRACE, activate, current_trace, get_tracer
+
+
+class CommandCancelled(BaseException):
+    """Raised inside a handler when its command was cancelled or timed out.
+
+    Derives from BaseException, like asyncio.CancelledError, so the broad
+    ``except Exception`` blocks in the process manager do not swallow it.
+    """
+
+
+_job_state = threading.local()
+
+
+def current_job():
+    """The CommandJob running on this worker thread, if any"""
+    return getattr(_job_state, 'job', None)
+
+
+def check_cancelled():
+    job = current_job()
+    if job is not None and job.cancelled.is_set():
+        raise CommandCancelled(job.cancel_reason)
+
+
+def cancellable_sleep(seconds):
+    """time.sleep that wakes up early if the current command is cancelled"""
+    job = current_job()
+    if job is None:
+        time.sleep(seconds)
+    elif job.cancelled.wait(seconds):
+        raise CommandCancelled(job.cancel_reason)
+
+
+def run_subprocess(args, check=False, **kwargs):
+    """subprocess.run that kills the child when the current command is cancelled"""
+    job = current_job()
+    with current_trace().stage('subprocess'), subprocess.Popen(args, **kwargs) as proc:
+        while True:
+            try:
+                stdout, stderr = proc.communicate(timeout=0.1 if job is not None else None)
+                break
+            except subprocess.TimeoutExpired:
+                if job.cancelled.is_set():
+                    proc.kill()
+                    proc.communicate()
+                    raise CommandCancelled(job.cancel_reason)
+    if check and proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, args, stdout, stderr)
+    return subprocess.CompletedProcess(args, proc.returncode, stdout, stderr)
+
+
+class SlotType:
+    """Parses a slot value starting at ``tokens[i]``.
+
+    ``parse`` returns ``(value, next_index)`` or None if the tokens do not
+    fit. Types with ``greedy`` set consume the rest of the transcript and may
+    only end a pattern.
+    """
+    greedy = False
+
+    def __init__(self, name, parse, greedy=False, placeholder=None):
+        self.name = name
+        self.parse = parse
+        self.greedy = greedy
+        self.placeholder = placeholder or name
+
+
+def _parse_int(token):
+    try:
+        return int(token)
+    except ValueError:
+        return None
+
+
+def _parse_pid(tokens, i):
+    pid = _parse_int(tokens[i])
+    return (pid, i + 1) if pid is not None and pid >= 0 else None
+
+
+def _parse_pids(tokens, i):
+    pids = [_parse_int(token) for token in tokens[i:]]
+    if not pids or any(pid is None or pid < 0 for pid in pids):
+        return None
+    return pids, len(tokens)
+
+
+def _parse_number(tokens, i):
+    try:
+        number = float(tokens[i])
+    except ValueError:
+        return None
+    # float() also reads 'nan', 'inf' and 'infinity', which are not numbers anyone says
+    return (number, i + 1) if math.isfinite(number) else None
+
+
+def _parse_percent(tokens, i):
+    # Accepts '50', '50%' and '50 percent'
+    level = _parse_int(tokens[i].rstrip('%'))
+    if level is None:
+        return None
+    if i + 1 < len(tokens) and tokens[i + 1] == 'percent':
+        return level, i + 2
+    return level, i + 1
+
+
+def _parse_text(tokens, i):
+    return ' '.join(tokens[i:]), len(tokens)
+
+
+SLOT_TYPES = {
+    'pid': SlotType('pid', _parse_pid, placeholder='PID'),
+    'pids': SlotType('pids', _parse_pids, greedy=True, placeholder='PID ...'),
+    'number': SlotType('number', _parse_number),
+    'percent': SlotType('percent', _parse_percent, placeholder='0-100'),
+    'text': SlotType('text', _parse_text, greedy=True),
+    'app': SlotType('app', _parse_text, greedy=True, placeholder='app name'),
+}
+
+_SLOT_PATTERN = re.compile(r'^\{(\w+)(?::(\w+))?\}$')
+
+
+class Command:
+    def __init__(self, name, patterns, handler, section, syntax, description, usage, timeout=None):
+        self.name = name
+        self.timeout = timeout
+        self.patterns = patterns
+        self.handler = handler
+        self.section = section
+        self.syntax = syntax
+        self.description = description
+        self.usage = usage
+
+
+class _Node:
+    __slots__ = ('children', 'slots', 'command', 'below')
+
+    def __init__(self):
+        self.children = {}
+        self.slots = []  # (slot name, SlotType, child node)
+        self.command = None
+        self.below = []  # commands reachable through this node, in registration order
+
+
+class CommandRegistry:
+    """Token trie of command patterns with typed slots"""
+
+    def __init__(self):
+        self.root = _Node()
+        self.commands = []
+        self.sections = []
+
+    def register(self, name, patterns, handler, section='Other', syntax=None, description='', usage=None,
+                 timeout=None):
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        cmd = Command(name, patterns, handler, section, syntax or self._display(patterns[0]), description, usage,
+                      timeout)
+        for pattern in patterns:
+            self._insert(pattern, cmd)
+        self.commands.append(cmd)
+        if section not in self.sections:
+            self.sections.append(section)
+        return cmd
+
+    def command(self, *patterns, name=None, **options):
+        """Decorator form of ``register`` for handlers taking ``(ctx, **slots)``"""
+        def decorator(handler):
+            self.register(name or handler.__name__, list(patterns), handler, **options)
+            return handler
+        return decorator
+
+    def _insert(self, pattern, cmd):
+        node = self.root
+        parts = pattern.split()
+        for index, part in enumerate(parts):
+            if cmd not in node.below:
+                node.below.append(cmd)
+            slot = _SLOT_PATTERN.match(part)
+            if slot is None:
+                node = node.children.setdefault(part, _Node())
+                continue
+            slot_name, type_name = slot.group(1), slot.group(2) or 'text'
+            slot_type = SLOT_TYPES[type_name]
+            if slot_type.greedy and index != len(parts) - 1:
+                raise ValueError(f"Slot {part} consumes the rest of the command and must come last: {pattern}")
+            for existing_name, existing_type, child in node.slots:
+                if existing_name == slot_name and existing_type is slot_type:
+                    node = child
+                    break
+            else:
+                child = _Node()
+                node.slots.append((slot_name, slot_type, child))
+                node = child
+        if node.command is not None and node.command is not cmd:
+            raise ValueError(f"Pattern '{pattern}' is already registered for '{node.command.name}'")
+        node.command = cmd
+        if cmd not in node.below:
+            node.below.append(cmd)
+
+    @staticmethod
+    def _display(pattern):
+        def placeholder(part):
+            slot = _SLOT_PATTERN.match(part)
+            if slot is None:
+                return part
+            return f"[{SLOT_TYPES[slot.group(2) or 'text'].placeholder}]"
+        return ' '.join(placeholder(part) for part in pattern.split())
+
+    @staticmethod
+    def tokenize(text):
+        return text.lower().split()
+
+    def match(self, text):
+        """Return ``(command, slots)`` for a transcript, or None"""
+        tokens = self.tokenize(text) if isinstance(text, str) else text
+        return self._walk(self.root, tokens, 0, {})
+
+    def _walk(self, node, tokens, i, slots, track=False, by_slot=False):
+        # With ``track`` the result also says whether the last word went into a slot
+        if i == len(tokens):
+            if node.command is None:
+                return None
+            return (node.command, slots, by_slot) if track else (node.command, slots)
+        # Literal words take priority over slots
+        child = node.children.get(tokens[i])
+        if child is not None:
+            found = self._walk(child, tokens, i + 1, slots, track)
+            if found is not None:
+                return found
+        for slot_name, slot_type, child in node.slots:
+            parsed = slot_type.parse(tokens, i)
+            if parsed is None:
+                continue
+            value, next_index = parsed
+            found = self._walk(child, tokens, next_index, dict(slots, **{slot_name: value}), track,
+                               next_index == len(tokens))
+            if found is not None:
+                return found
+        return None
+
+    def match_prefix(self, text):
+        """Match a partial transcript that may still grow.
+
+        Returns ``(command, slots, can_grow, ends_in_slot)`` or None.
+        ``can_grow`` is True if some longer transcript would match a
+        different pattern or put more words into a slot, so acting now could
+        be premature. ``ends_in_slot`` means the last word is a slot value,
+        which a streaming recognizer may still revise ("4" -> "40").
+        """
+        tokens = self.tokenize(text) if isinstance(text, str) else text
+        found = self._walk(self.root, tokens, 0, {}, track=True)
+        if found is None:
+            return None
+        cmd, slots, ends_in_slot = found
+        return cmd, slots, self._can_grow(self.root, tokens, 0), ends_in_slot
+
+    def _can_grow(self, node, tokens, i):
+        if i == len(tokens):
+            return bool(node.children or node.slots)
+        child = node.children.get(tokens[i])
+        if child is not None and self._can_grow(child, tokens, i + 1):
+            return True
+        for slot_name, slot_type, child in node.slots:
+            parsed = slot_type.parse(tokens, i)
+            if parsed is None:
+                continue
+            if slot_type.greedy or self._can_grow(child, tokens, parsed[1]):
+                return True
+        return False
+
+    def closest(self, text):
+        """Commands sharing the longest literal prefix with an unmatched transcript"""
+        node = self.root
+        for token in self.tokenize(text):
+            child = node.children.get(token)
+            if child is None:
+                break
+            node = child
+        return node.below if node is not self.root else []
+
+    def dispatch(self, text, ctx):
+        """Run the command for a transcript and return a structured result"""
+        found = self.match(text)
+        if found is None:
+            for cmd in self.closest(text):
+                if cmd.usage:
+                    ctx.speak(cmd.usage)
+                    return {'command': cmd.name, 'ok': False, 'error': cmd.usage}
+            ctx.speak("I didn't understand that command. Say 'help' for available commands")
+            return {'command': None, 'ok': False, 'error': 'unknown command'}
+        cmd, slots = found
+        result = cmd.handler(ctx, **slots)
+        # Handlers return False when the action failed (after saying why)
+        if result is False:
+            return {'command': cmd.name, 'ok': False, 'slots': slots, 'result': result, 'error': 'failed'}
+        return {'command': cmd.name, 'ok': True, 'slots': slots, 'result': result}
+
+    def help_lines(self):
+        lines = ["Available commands:"]
+        for number, section in enumerate(self.sections, 1):
+            lines.append(f"\n{number}. {section}:")
+            for cmd in self.commands:
+                if cmd.section == section and cmd.description:
+                    syntax = "' or '".join(cmd.syntax) if isinstance(cmd.syntax, list) else cmd.syntax
+                    lines.append(f"   - '{syntax}' - {cmd.description}")
+        return lines
+
+
+class EarlyCommit:
+    """Watches the partial transcripts of one utterance for a command that is safe to run early.
+
+    A partial commits once it matches a command that no longer transcript
+    could change. If it ends in a slot value, the recognizer may still be
+    revising that word ("kill 4" -> "kill 4312"), so the same match must
+    also hold for ``settle`` seconds of audio. Commands ending in a free-text
+    slot (app names, search terms) never commit early.
+    """
+
+    def __init__(self, registry, settle=0.4):
+        self.registry = registry
+        self.settle = settle
+        self.committed = None
+        self._last = None
+        self._since = 0.0
+
+    def feed(self, partial, at):
+        """``partial`` is the transcript after ``at`` seconds of audio.
+
+        Returns ``(command, slots)`` the first time it is safe to act on, else None.
+        """
+        if self.committed is not None:
+            return None
+        found = self.registry.match_prefix(partial) if partial else None
+        if found is None or found[2]:
+            self._last = None
+            return None
+        cmd, slots, can_grow, ends_in_slot = found
+        if ends_in_slot:
+            key = (cmd.name, repr(slots))
+            if key != self._last:
+                self._last = key
+                self._since = at
+            if at - self._since < self.settle:
+                return None
+        self.committed = (cmd, slots)
+        return self.committed
+
+
+class CommandContext:
+    """What command handlers may touch: the process manager and the output view"""
+
+    def __init__(self, process_manager, show=None, refresh=None, job=None):
+        self.process_manager = process_manager
+        self._show = show
+        self._refresh = refresh
+        self.job = job
+
+    def sleep(self, seconds):
+        cancellable_sleep(seconds)
+
+    def speak(self, text):
+        self.process_manager.speak(text)
+
+    def show(self, lines):
+        if self._show:
+            self._show(lines)
+        else:
+            print('\n'.join(lines))
+
+    def refresh(self):
+        if self._refresh:
+            self._refresh()
+
+
+class CommandJob:
+    """One submitted transcript, cancellable from any thread"""
+
+    def __init__(self, job_id, text, name, timeout, trace=NULL_TRACE):
+        self.id = job_id
+        self.text = text
+        self.name = name
+        self.timeout = timeout
+        self.trace = trace
+        self.submitted = time.monotonic()
+        self.cancelled = threading.Event()
+        self.cancel_reason = None
+        self.reported = False
+        self.error = None
+        self.started = None
+        self.future = None
+
+    def cancel(self, reason='cancelled'):
+        if not self.cancelled.is_set():
+            self.cancel_reason = reason
+            self.cancelled.set()
+
+
+class CommandRunner:
+    """Runs commands on a bounded thread pool with per-command timeouts.
+
+    Handlers cooperate with cancellation through ``ctx.sleep``,
+    ``run_subprocess`` and ``check_cancelled``; a timed out command is
+    reported as failed right away even if its handler is still unwinding.
+    Callbacks are invoked from worker threads.
+    """
+
+    def __init__(self, registry, make_context, max_workers=4, default_timeout=30.0,
+                 on_start=None, on_finish=None, on_error=None):
+        self.registry = registry
+        self.make_context = make_context
+        self.default_timeout = default_timeout
+        self.on_start = on_start
+        self.on_finish = on_finish
+        self.on_error = on_error
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='command')
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def submit(self, text, trace=None):
+        """Queue a transcript; the runner takes over (and finally releases) ``trace``"""
+        found = self.registry.match(text)
+        name = found[0].name if found else None
+        timeout = (found[0].timeout if found and found[0].timeout else None) or self.default_timeout
+        job = CommandJob(next(self._ids), text, name, timeout, trace or NULL_TRACE)
+        job.trace.set(command=name)
+        with self.lock:
+            self.jobs[job.id] = job
+        job.future = self.pool.submit(self._run, job)
+        return job
+
+    def _report_error(self, job, message):
+        with self.lock:
+            if job.reported:
+                return
+            job.reported = True
+            job.error = message
+            self.jobs.pop(job.id, None)
+        if self.on_error:
+            self.on_error(job, message)
+
+    def _timeout(self, job):
+        job.cancel('timed out')
+        self._report_error(job, f"timed out after {job.timeout:g} seconds")
+
+    def _run(self, job):
+        try:
+            return self._execute(job)
+        finally:
+            job.trace.release()
+
+    def _execute(self, job):
+        if job.cancelled.is_set():
+            self._report_error(job, job.cancel_reason)
+            return None
+        job.started = time.monotonic()
+        job.trace.add('queue', job.started - job.submitted)
+        timer = threading.Timer(job.timeout, self._timeout, (job,))
+        timer.daemon = True
+        timer.start()
+        _job_state.job = job
+        previous_trace = activate(job.trace)
+        if self.on_start:
+            self.on_start(job)
+        try:
+            with job.trace.stage('dispatch'):
+                result = self.registry.dispatch(job.text, self.make_context(job))
+        except CommandCancelled as e:
+            self._report_error(job, str(e) or 'cancelled')
+            return None
+        except Exception as e:
+            print(f"Error running command '{job.text}': {e}")
+            self._report_error(job, str(e))
+            return None
+        finally:
+            timer.cancel()
+            _job_state.job = None
+            activate(previous_trace)
+        with self.lock:
+            if job.reported:
+                return result
+            job.reported = True
+            self.jobs.pop(job.id, None)
+        if self.on_finish:
+            self.on_finish(job, result)
+        return result
+
+    def running(self):
+        with self.lock:
+            return list(self.jobs.values())
+
+    def cancel(self, job_id, reason='cancelled'):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is not None:
+            job.cancel(reason)
+            if job.future.cancel():
+                self._report_error(job, reason)
+
+    def cancel_all(self, reason='cancelled'):
+        for job in self.running():
+            self.cancel(job.id, reason)
+
+    def shutdown(self, cancel=True):
+        if cancel:
+            self.cancel_all('shutting down')
+        self.pool.shutdown(wait=False)
+
+
+registry = CommandRegistry()
+command = registry.command
+
+
+def load_plugins(names=None):
+    """Import plugin modules so their ``@command`` handlers register.
+
+    Module names come from ``names`` or the comma-separated ``VPM_PLUGINS``
+    environment variable.
+    """
+    if names is None:
+        names = [n.strip() for n in os.environ.get('VPM_PLUGINS', '').split(',') if n.strip()]
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"Could not load command plugin {name}: {e}")
+
+
+# Application Control
+
+@command('start {app:app}', 'open app {app:app}', section='Application Control',
+         description='Launch an application', usage="Please say which application to start")
+def start(ctx, app):
+    return ctx.process_manager.start_process(app, speak=ctx.speak)
+
+
+@command('stop {app:app}', 'close {app:app}', 'quit {app:app}', section='Application Control',
+         description='Close an application with all its helper processes',
+         usage="Please say which application to stop")
+def stop(ctx, app):
+    return ctx.process_manager.stop_process(app, speak=ctx.speak)
+
+
+@command('focus {app:app}', section='Application Control',
+         description='Bring application to front', usage="Please say which application to focus")
+def focus(ctx, app):
+    return ctx.process_manager.focus_app(app, speak=ctx.speak)
+
+
+@command('switch to {app:app}', section='Application Control',
+         description='Switch to running application', usage="Please say which application to switch to")
+def switch(ctx, app):
+    return ctx.process_manager.switch_to_app(app, speak=ctx.speak)
+
+
+@command('stop what i started', 'stop everything i started', 'close what i started', section='Application Control',
+         description='Close every application started by voice')
+def stop_launched(ctx):
+    outcomes = ctx.process_manager.stop_launched(speak=ctx.speak)
+    ctx.refresh()
+    return {'outcomes': outcomes}
+
+
+@command('what did i start', 'show launches', 'launches', section='Application Control',
+         description='List applications started by voice and their startup time')
+def show_launches(ctx):
+    launches = ctx.process_manager.launches
+    recent = launches.recent()
+    lines = [f"{'pid':>8}  {'name':<24}{'spawn ms':>10}  status"]
+    for launch in recent:
+        status = 'running' if launch.running else f"exited {launch.returncode}"
+        lines.append(f"{launch.pid:>8}  {launch.name[:23]:<24}{launch.spawn_s * 1000:>10.1f}  "
+                     f"{status} after {launch.runtime:.0f}s")
+    ctx.show(lines if recent else ["Nothing has been started yet"])
+    running = len(launches.running())
+    ctx.speak(f"{running} of the applications I started {'is' if running == 1 else 'are'} still running")
+    return {'launches': [launch.as_dict() for launch in recent], 'stats': launches.stats()}
+
+
+# Process Management
+
+@command('kill {pid:pid}', section='Process Management',
+         description='Terminate a process', usage="Please provide a valid PID number")
+def kill(ctx, pid):
+    outcomes = ctx.process_manager.terminate(pids=[pid])
+    ctx.speak(ctx.process_manager.describe_termination(outcomes))
+    ctx.refresh()
+    return {'outcomes': outcomes}
+
+
+@command('force kill {pid:pid}', section='Process Management',
+         description='Kill a process immediately', usage="Please provide a valid PID number to force kill")
+def force_kill(ctx, pid):
+    outcomes = ctx.process_manager.terminate(pids=[pid], force=True)
+    ctx.speak(ctx.process_manager.describe_termination(outcomes))
+    ctx.refresh()
+    return {'outcomes': outcomes}
+
+
+@command('kill pids {pids:pids}', section='Process Management',
+         description='Terminate several processes', usage="Please provide valid PID numbers")
+def kill_pids(ctx, pids):
+    outcomes = ctx.process_manager.terminate(pids=pids)
+    ctx.speak(ctx.process_manager.describe_termination(outcomes))
+    ctx.refresh()
+    return {'outcomes': outcomes}
+
+
+@command('kill tree {pid:pid}', section='Process Management',
+         description='Terminate a process and all of its children', usage="Please provide a valid PID number")
+def kill_tree(ctx, pid):
+    outcomes = ctx.process_manager.terminate(pids=[pid], tree=True)
+    ctx.speak(ctx.process_manager.describe_termination(outcomes))
+    ctx.refresh()
+    return {'outcomes': outcomes}
+
+
+@command('kill all {app:app}', section='Process Management',
+         description='Terminate every process with a name, or matching a pattern such as chrom*',
+         usage="Please say which processes to kill, for example kill all chrome")
+def kill_all(ctx, app):
+    outcomes = ctx.process_manager.terminate(names=[app])
+    if not outcomes:
+        # Only an exact name or a pattern kills anything; a misheard or partial one lists the matches
+        candidates = ctx.process_manager.find_candidates(app)
+        if candidates:
+            ctx.speak(ctx.process_manager.describe_candidates(app, candidates))
+        else:
+            ctx.speak(f"Could not find process {app}")
+        return False
+    ctx.speak(ctx.process_manager.describe_termination(outcomes, app))
+    ctx.refresh()
+    return {'outcomes': outcomes}
+
+
+# Members listed under "info <app>"; the totals still count every process
+APP_INFO_LIMIT = 10
+
+
+def _app_info(ctx, app):
+    groups = ctx.process_manager.find_applications(app)
+    if not groups:
+        ctx.speak(f"Could not find application {app}")
+        return False
+    details = []
+    for group in groups:
+        details.append(f"Application: {group.name} (PID: {group.root.pid}, {len(group.members)} processes, "
+                       f"CPU: {group.cpu_percent:.1f}%, Memory: {group.memory_percent:.2f}%)")
+        members = sorted(group.members, key=lambda record: -(record.memory_percent or 0))
+        for record in members[:APP_INFO_LIMIT]:
+            details.append(f"   {record.name} (PID: {record.pid}, CPU: {record.cpu_percent or 0:.1f}%, "
+                           f"Memory: {record.memory_percent or 0:.2f}%)")
+        if len(members) > APP_INFO_LIMIT:
+            details.append(f"   ... and {len(members) - APP_INFO_LIMIT} more")
+    ctx.show(details)
+    group = groups[0]
+    ctx.speak(f"{group.name} is running {len(group.members)} processes using {group.cpu_percent:.0f} percent CPU "
+              f"and {group.memory_percent:.1f} percent memory")
+    return {'applications': [group.as_dict() for group in groups]}
+
+
+@command('info {pid:pid}', 'info {app:app}', section='Process Management', syntax='info [PID or app name]',
+         description='Show details of a process, or of an application and all its processes',
+         usage="Please provide a valid PID number or an application name")
+def info(ctx, pid=None, app=None):
+    if app is not None:
+        return _app_info(ctx, app)
+    try:
+        process = psutil.Process(pid)
+        details = [
+            f"Process: {process.name()}",
+            f"PID: {pid}",
+            f"Status: {process.status()}",
+            f"CPU: {process.cpu_percent()}%",
+            f"Memory: {process.memory_percent():.2f}%",
+            f"Created: {time.ctime(process.create_time())}",
+            f"User: {process.username()}"
+        ]
+        usage = ctx.process_manager.subtree_usage(pid)
+        if usage is not None and usage[0] > 1:
+            details.append(f"With {usage[0] - 1} descendants: CPU: {usage[1]:.1f}%, Memory: {usage[2]:.2f}%")
+        ctx.show(details)
+        ctx.speak(f"Showing information for process {process.name()}")
+        return {'info': details}
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        ctx.speak(f"Could not get information for PID {pid}")
+        return False
+
+
+# "find manage dot py": recognizers spell out the punctuation in script and jar names
+_SPOKEN_SYMBOLS = [(' dot ', '.'), (' slash ', '/'), (' dash ', '-'), (' underscore ', '_')]
+
+
+# More lines than this is not a useful answer; the total is still reported
+FIND_LIMIT = 50
+
+
+def _describe_hits(hits):
+    lines = []
+    for hit in hits:
+        record = hit.record
+        memory = f"{record.memory_percent:.2f}%" if record.memory_percent is not None else "N/A"
+        line = f"{record.name} (PID: {record.pid}, User: {record.username}, Memory: {memory})"
+        if hit.field != 'name':
+            text = hit.text if len(hit.text) <= 80 else hit.text[:77] + '...'
+            line += f" - {hit.field}: {text}"
+        lines.append(line)
+    if hits.total > len(hits):
+        lines.append(f"... and {hits.total - len(hits)} more")
+    return lines
+
+
+@command('find {term:text}', section='Process Management', syntax='find [process name]',
+         description='Search processes by name, command line, executable, directory or user',
+         usage="Please say what to search for")
+def find(ctx, term):
+    hits = ctx.process_manager.find_processes(term, limit=FIND_LIMIT)
+    if not hits:
+        spelled = f" {term} "
+        for spoken, symbol in _SPOKEN_SYMBOLS:
+            spelled = spelled.replace(spoken, symbol)
+        if spelled.strip() != term:
+            term = spelled.strip()
+            hits = ctx.process_manager.find_processes(term, limit=FIND_LIMIT)
+    if hits:
+        ctx.show(_describe_hits(hits))
+        ctx.speak(f"Found {hits.total} matching processes")
+    else:
+        ctx.speak(f"No processes found matching '{term}'")
+    return {'matches': [hit.as_dict() for hit in hits], 'total': hits.total}
+
+
+@command('find matching {pattern:text}', section='Process Management', syntax='find matching [regex]',
+         description='Search processes with a regular expression', usage="Please give a pattern to search for")
+def find_matching(ctx, pattern):
+    try:
+        hits = ctx.process_manager.find_processes(pattern, regex=True, limit=FIND_LIMIT)
+    except re.error as e:
+        ctx.speak(f"That is not a valid pattern: {e}")
+        return {'error': str(e)}
+    if hits:
+        ctx.show(_describe_hits(hits))
+        ctx.speak(f"Found {hits.total} matching processes")
+    else:
+        ctx.speak(f"No processes found matching '{pattern}'")
+    return {'matches': [hit.as_dict() for hit in hits], 'total': hits.total}
+
+
+@command('monitor {pid:pid}', 'monitor {pid:pid} {threshold:number}', section='Process Management',
+         syntax='monitor [PID] [threshold]', description='Warn if a process uses too much CPU or memory',
+         usage="Please provide a valid PID number to monitor")
+def monitor(ctx, pid, threshold=80.0):
+    return ctx.process_manager.monitor_process(pid, threshold, speak=ctx.speak)
+
+
+# System Control
+
+@command('sleep', 'go to sleep', section='System Control', syntax=['sleep', 'go to sleep'],
+         description='Put computer to sleep')
+def sleep(ctx):
+    return ctx.process_manager.system_control("sleep", speak=ctx.speak)
+
+
+@command('restart', section='System Control', description='Restart computer')
+def restart(ctx):
+    return ctx.process_manager.system_control("restart", speak=ctx.speak)
+
+
+@command('shutdown', 'shut down', section='System Control', description='Shutdown computer')
+def shutdown(ctx):
+    return ctx.process_manager.system_control("shutdown", speak=ctx.speak)
+
+
+@command('lock', 'lock screen', section='System Control', syntax=['lock', 'lock screen'],
+         description='Lock the screen')
+def lock(ctx):
+    return ctx.process_manager.system_control("lock", speak=ctx.speak)
+
+
+@command('night mode', 'dark mode', 'toggle night mode', 'toggle dark mode', section='System Control',
+         syntax=['night mode', 'dark mode'], description='Toggle dark mode')
+def night_mode(ctx):
+    return ctx.process_manager.system_control("night mode", speak=ctx.speak)
+
+
+# Screenshots
+
+@command('screenshot', 'take screenshot', 'take a screenshot', section='Screenshots',
+         description='Take full screenshot')
+def screenshot(ctx):
+    return ctx.process_manager.take_screenshot("full", speak=ctx.speak)
+
+
+@command('screenshot window', 'take screenshot window', 'take a screenshot of the window', section='Screenshots',
+         description='Screenshot active window')
+def screenshot_window(ctx):
+    return ctx.process_manager.take_screenshot("window", speak=ctx.speak)
+
+
+@command('screenshot selection', 'screenshot area', 'take screenshot selection', section='Screenshots',
+         description='Screenshot selected area', timeout=120)
+def screenshot_selection(ctx):
+    return ctx.process_manager.take_screenshot("selection", speak=ctx.speak)
+
+
+# Websites
+
+@command('open {site:text}', 'open website {site:text}', section='Websites',
+         syntax='open [website]', description="Open website (e.g., 'open gmail')",
+         usage="Please say which website to open")
+def open_website(ctx, site):
+    return ctx.process_manager.open_website(site, speak=ctx.speak)
+
+
+# Display Control
+
+_BRIGHTNESS_USAGE = ("Please specify brightness level. You can say: brightness up, down, maximum, minimum, "
+                     "or a number between 0 and 100 percent")
+
+
+@command('brightness up', 'increase brightness', 'brightness increase', section='Display Control',
+         syntax='brightness up/down', description='Adjust brightness', usage=_BRIGHTNESS_USAGE)
+def brightness_up(ctx):
+    return ctx.process_manager.adjust_brightness("up", speak=ctx.speak)
+
+
+@command('brightness down', 'decrease brightness', 'brightness decrease', section='Display Control',
+         usage=_BRIGHTNESS_USAGE)
+def brightness_down(ctx):
+    return ctx.process_manager.adjust_brightness("down", speak=ctx.speak)
+
+
+@command('brightness {level:percent}', 'brightness to {level:percent}', 'set brightness to {level:percent}',
+         section='Display Control', syntax='brightness [0-100]', description='Set specific brightness',
+         usage=_BRIGHTNESS_USAGE)
+def brightness_level(ctx, level):
+    if 0 <= level <= 100:
+        return ctx.process_manager.set_brightness(level, speak=ctx.speak)
+    ctx.speak("Brightness level should be between 0 and 100 percent")
+    return False
+
+
+@command('brightness maximum', 'brightness max', 'brightness full', 'full brightness', section='Display Control',
+         syntax='brightness maximum/minimum', description='Set max/min brightness', usage=_BRIGHTNESS_USAGE)
+def brightness_max(ctx):
+    return ctx.process_manager.set_brightness(100, speak=ctx.speak)
+
+
+@command('brightness minimum', 'brightness min', section='Display Control', usage=_BRIGHTNESS_USAGE)
+def brightness_min(ctx):
+    return ctx.process_manager.set_brightness(0, speak=ctx.speak)
+
+
+# System Information
+
+@command('system stats', 'system statistics', section='System Information', description='Show system statistics')
+def system_stats(ctx):
+    stats = ctx.process_manager.get_system_stats()
+    ctx.show(stats)
+    ctx.speak("Here are the current system statistics")
+    return {'stats': stats, 'values': dict(ctx.process_manager.system_info)}
+
+
+@command('list processes', 'list process', 'list all processes', 'show processes', section='System Information',
+         description='Show running processes')
+def list_processes(ctx):
+    ctx.refresh()
+    ctx.speak("Here are the running processes")
+    return {'processes': [record.as_dict() for record in ctx.process_manager.process_table.snapshot()]}
+
+
+_HISTORY_OFF = "Resource history is not being recorded. Start the app with VPM_HISTORY=1 to record it"
+_HISTORY_LABELS = {'cpu': 'CPU', 'memory': 'memory', 'io': 'disk'}
+_AGO_USAGE = "Please say how many minutes ago, for example memory 10 minutes ago"
+
+
+def _show_history(ctx, metric, minutes=60, ago=0):
+    # An empty or future window would only ever come back with nothing
+    if minutes <= 0:
+        ctx.speak(f"Please say how many minutes to look back, for example top "
+                  f"{_HISTORY_LABELS[metric].lower()} last 10 minutes")
+        return False
+    if ago < 0:
+        ctx.speak(_AGO_USAGE)
+        return False
+    results = ctx.process_manager.resource_history(metric, minutes, ago)
+    if results is None:
+        ctx.speak(_HISTORY_OFF)
+        return {'error': 'history disabled'}
+    when = f"{ago:g} minutes ago" if ago else f"over the last {minutes:g} minutes"
+    if not results:
+        ctx.speak(f"No history recorded {when}")
+        return {'rows': []}
+    lines = [f"Top {_HISTORY_LABELS[metric]} {when} ({results.rounds} samples):"]
+    for row in results:
+        lines.append(f"{row.name} (PID: {row.pid}) CPU: {row.cpu_avg:.1f}% avg, {row.cpu_max:.1f}% max, "
+                     f"Memory: {row.rss_max / 2 ** 20:.0f} MB peak, "
+                     f"Disk: {row.read_bytes / 2 ** 20:.1f} MB read, {row.write_bytes / 2 ** 20:.1f} MB written")
+    ctx.show(lines)
+    ctx.speak(f"{results[0].name} used the most {_HISTORY_LABELS[metric]} {when}")
+    return {'rows': [row.as_dict() for row in results], 'rounds': results.rounds}
+
+
+@command('top cpu', 'top cpu last hour', 'top cpu last {minutes:number} minutes', 'what used the most cpu',
+         section='System Information', syntax='top cpu/memory/disk [last N minutes]',
+         description='Processes with the highest average CPU, peak memory or disk I/O (needs VPM_HISTORY=1)',
+         usage="Please say how many minutes to look back, for example top cpu last 10 minutes")
+def top_cpu(ctx, minutes=60):
+    return _show_history(ctx, 'cpu', minutes)
+
+
+@command('top memory', 'top memory last hour', 'top memory last {minutes:number} minutes',
+         section='System Information', usage="Please say how many minutes to look back")
+def top_memory(ctx, minutes=60):
+    return _show_history(ctx, 'memory', minutes)
+
+
+@command('top disk', 'top disk last hour', 'top disk last {minutes:number} minutes',
+         section='System Information', usage="Please say how many minutes to look back")
+def top_disk(ctx, minutes=60):
+    return _show_history(ctx, 'io', minutes)
+
+
+@command('what was using memory {ago:number} minutes ago', 'memory {ago:number} minutes ago',
+         section='System Information', syntax='memory [N] minutes ago',
+         description='Processes using the most memory at an earlier time (needs VPM_HISTORY=1)',
+         usage=_AGO_USAGE)
+def memory_ago(ctx, ago):
+    # The minute leading up to that moment
+    return _show_history(ctx, 'memory', 1, ago)
+
+
+@command('list applications', 'list apps', 'show applications', 'show apps', section='System Information',
+         description='Show running applications with their helper processes added up')
+def list_applications(ctx):
+    lines = ctx.process_manager.list_applications()
+    ctx.show(lines)
+    ctx.speak("Here are the running applications")
+    return {'applications': lines}
+
+
+@command('latency stats', 'latency', 'show latency', section='System Information',
+         description='Show per-stage command latency')
+def latency_stats(ctx):
+    tracer = get_tracer()
+    ctx.show(tracer.summary_lines())
+    return {'traces': tracer.traces, 'stages_ms': tracer.percentiles_ms()}
+
+
+# Volume Control
+
+@command('volume {level:percent}', 'set volume to {level:percent}', section='Volume Control',
+         syntax='volume [0-100]', description='Set system volume',
+         usage="Please specify a volume level between 0 and 100")
+def volume(ctx, level):
+    if 0 <= level <= 100:
+        return ctx.process_manager.set_volume(level, speak=ctx.speak)
+    ctx.speak("Volume level should be between 0 and 100")
+    return False
+
+
+# Help
+
+@command('help', section='Help', description='Show this help message')
+def show_help(ctx):
+    ctx.show(registry.help_lines())
+    ctx.speak("Showing available commands")
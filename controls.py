@@ -0,0 +1,360 @@
+"""Display brightness and output volume, one backend per platform.
+
+Every change is a single absolute step instead of a series of simulated key
+presses:
+
+- Linux writes ``/sys/class/backlight/<device>/brightness`` directly (with
+  ``brightnessctl`` as a fallback when the file is not writable) and sets the
+  volume through pyalsaaudio if it is installed, otherwise with one ``pactl``
+  or ``amixer`` call.
+- macOS keeps a single ``osascript`` helper running for the whole session and
+  sends it one line per request, instead of starting an ``osascript`` per key
+  press.
+
+``VPM_CONTROLS`` picks a backend by name and ``VPM_SYSFS_ROOT`` points the
+Linux backend at a fake sysfs tree.
+"""
+import os
+import platform
+import selectors
+import shutil
+import subprocess
+import threading
+
+from commands import run_subprocess
+
+
+class ControlError(Exception):
+    """The platform refused or does not support the change"""
+
+
+class ControlBackend:
+    """Brightness and volume as percentages, 0-100"""
+    name = 'base'
+
+    def brightness(self):
+        raise ControlError("brightness control is not supported here")
+
+    def set_brightness(self, level):
+        raise ControlError("brightness control is not supported here")
+
+    def volume(self):
+        raise ControlError("volume control is not supported here")
+
+    def set_volume(self, level):
+        raise ControlError("volume control is not supported here")
+
+    def close(self):
+        pass
+
+
+class Backlight:
+    """One ``/sys/class/backlight`` device"""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(os.path.join(path, 'max_brightness')) as f:
+            self.max = int(f.read())
+        try:
+            with open(os.path.join(path, 'type')) as f:
+                self.type = f.read().strip()
+        except OSError:
+            self.type = 'raw'
+
+    def read(self):
+        with open(os.path.join(self.path, 'brightness')) as f:
+            return int(f.read())
+
+    def write(self, value):
+        with open(os.path.join(self.path, 'brightness'), 'w') as f:
+            f.write(str(value))
+
+
+# The kernel's advice: prefer firmware interfaces, then platform drivers, then raw GPU registers
+_BACKLIGHT_PREFERENCE = {'firmware': 0, 'platform': 1, 'raw': 2}
+
+
+def find_backlight(root='/'):
+    """The preferred backlight device under ``root``, or None"""
+    base = os.path.join(root, 'sys', 'class', 'backlight')
+    try:
+        names = sorted(os.listdir(base))
+    except OSError:
+        return None
+    devices = []
+    for name in names:
+        try:
+            devices.append(Backlight(os.path.join(base, name)))
+        except (OSError, ValueError):
+            continue
+    if not devices:
+        return None
+    return min(devices, key=lambda device: (_BACKLIGHT_PREFERENCE.get(device.type, 3), device.name))
+
+
+class LinuxBackend(ControlBackend):
+    name = 'linux'
+
+    def __init__(self, root=None):
+        self.root = root or os.environ.get('VPM_SYSFS_ROOT', '/')
+        self.backlight = find_backlight(self.root)
+        self._mixer = None
+
+    # Brightness
+
+    def brightness(self):
+        if self.backlight is None:
+            raise ControlError("no backlight device found")
+        return round(self.backlight.read() * 100 / self.backlight.max)
+
+    def set_brightness(self, level):
+        if self.backlight is None:
+            raise ControlError("no backlight device found")
+        level = max(0, min(100, level))
+        # 0 switches some panels off entirely, which is not what "minimum" means
+        value = max(1, round(level * self.backlight.max / 100))
+        try:
+            self.backlight.write(value)
+        except PermissionError:
+            # Without a udev rule only root may write the file; brightnessctl goes through logind
+            if not shutil.which('brightnessctl'):
+                raise ControlError(f"no permission to write {self.backlight.path}/brightness; "
+                                   "add yourself to the video group or install brightnessctl")
+            run_subprocess(['brightnessctl', '--quiet', '--device', self.backlight.name, 'set', str(value)],
+                           check=True)
+
+    # Volume
+
+    def _alsa_mixer(self):
+        """A pyalsaaudio mixer kept open for the session, or None to use the command-line tools"""
+        if self._mixer is None:
+            self._mixer = False
+            try:
+                import alsaaudio
+                self._mixer = alsaaudio.Mixer(os.environ.get('VPM_ALSA_CONTROL', 'Master'))
+            except ImportError:
+                pass
+            except Exception as e:  # alsaaudio.ALSAAudioError: no such card or control
+                print(f"ALSA mixer unavailable ({e}), using pactl/amixer")
+        return self._mixer or None
+
+    def volume(self):
+        mixer = self._alsa_mixer()
+        if mixer is not None:
+            return mixer.getvolume()[0]
+        if shutil.which('pactl'):
+            output = run_subprocess(['pactl', 'get-sink-volume', '@DEFAULT_SINK@'],
+                                    capture_output=True, text=True, check=True).stdout
+        elif shutil.which('amixer'):
+            output = run_subprocess(['amixer', '-M', 'sget', 'Master'], capture_output=True, text=True,
+                                    check=True).stdout
+        else:
+            raise ControlError("no mixer found; install pyalsaaudio, pactl or amixer")
+        for word in output.replace('[', ' ').replace(']', ' ').split():
+            if word.endswith('%') and word[:-1].isdigit():
+                return int(word[:-1])
+        raise ControlError("could not read the volume")
+
+    def set_volume(self, level):
+        level = max(0, min(100, level))
+        mixer = self._alsa_mixer()
+        if mixer is not None:
+            mixer.setvolume(level)
+        elif shutil.which('pactl'):
+            run_subprocess(['pactl', 'set-sink-volume', '@DEFAULT_SINK@', f'{level}%'], check=True)
+        elif shutil.which('amixer'):
+            run_subprocess(['amixer', '-q', '-M', 'sset', 'Master', f'{level}%'], check=True)
+        else:
+            raise ControlError("no mixer found; install pyalsaaudio, pactl or amixer")
+
+
+# Reads one request per line from stdin and answers "ok <value>" or "error <message>".
+# Brightness goes through the DisplayServices framework the brightness keys use.
+_JXA_HELPER = r'''
+ObjC.import('Foundation');
+ObjC.import('CoreGraphics');
+const app = Application.currentApplication();
+app.includeStandardAdditions = true;
+$.NSBundle.bundleWithPath('/System/Library/PrivateFrameworks/DisplayServices.framework').load;
+ObjC.bindFunction('DisplayServicesGetBrightness', ['int', ['unsigned int', 'float *']]);
+ObjC.bindFunction('DisplayServicesSetBrightness', ['int', ['unsigned int', 'float']]);
+
+function handle(request) {
+    const [what, action, value] = request.split(' ');
+    if (what === 'volume') {
+        if (action === 'set') app.setVolume(null, {outputVolume: Number(value)});
+        return app.getVolumeSettings().outputVolume;
+    }
+    if (what === 'brightness') {
+        const display = $.CGMainDisplayID();
+        if (action === 'set' && $.DisplayServicesSetBrightness(display, Number(value) / 100) !== 0)
+            throw new Error('the display does not support brightness control');
+        const level = Ref();
+        if ($.DisplayServicesGetBrightness(display, level) !== 0)
+            throw new Error('the display does not report its brightness');
+        return Math.round(level[0] * 100);
+    }
+    throw new Error('unknown request ' + request);
+}
+
+const input = $.NSFileHandle.fileHandleWithStandardInput;
+const output = $.NSFileHandle.fileHandleWithStandardOutput;
+let buffered = '';
+for (;;) {
+    const data = input.availableData;
+    if (data.length === 0) break;
+    buffered += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+    let newline;
+    while ((newline = buffered.indexOf('\n')) >= 0) {
+        const request = buffered.slice(0, newline);
+        buffered = buffered.slice(newline + 1);
+        let reply;
+        try {
+            reply = 'ok ' + handle(request);
+        } catch (e) {
+            reply = 'error ' + String(e.message || e).replace(/\n/g, ' ');
+        }
+        output.writeData($(reply + '\n').dataUsingEncoding($.NSUTF8StringEncoding));
+    }
+}
+'''
+
+
+class HelperBackend(ControlBackend):
+    """Talks to one long-running helper process, one request line and one reply line at a time.
+
+    The helper is started on first use and restarted on the next request if
+    it dies or stops answering.
+    """
+    name = 'macos'
+
+    def __init__(self, command=None, timeout=2.0):
+        self.command = command or ['osascript', '-l', 'JavaScript', '-e', _JXA_HELPER]
+        self.timeout = timeout
+        self.started = 0
+        self._proc = None
+        self._buffer = b''
+        self._lock = threading.Lock()
+
+    def _start(self):
+        self._proc = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+        self._buffer = b''
+        self.started += 1
+
+    def _stop(self):
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc.stdin.close()
+            self._proc.stdout.close()
+            self._proc = None
+
+    def _read_line(self):
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._proc.stdout, selectors.EVENT_READ)
+            while b'\n' not in self._buffer:
+                if not selector.select(self.timeout):
+                    raise ControlError("the control helper did not answer")
+                chunk = os.read(self._proc.stdout.fileno(), 4096)
+                if not chunk:
+                    raise ControlError("the control helper exited")
+                self._buffer += chunk
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return line.decode()
+
+    def request(self, line):
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None:
+                self._stop()
+                self._start()
+            try:
+                self._proc.stdin.write(line.encode() + b'\n')
+                reply = self._read_line()
+            except (OSError, ControlError):
+                self._stop()  # the next request starts a fresh helper
+                raise
+        status, _, value = reply.partition(' ')
+        if status != 'ok':
+            raise ControlError(value or reply)
+        return value
+
+    def brightness(self):
+        return int(self.request('brightness get'))
+
+    def set_brightness(self, level):
+        self.request(f'brightness set {max(0, min(100, level))}')
+
+    def volume(self):
+        return int(self.request('volume get'))
+
+    def set_volume(self, level):
+        self.request(f'volume set {max(0, min(100, level))}')
+
+    def close(self):
+        with self._lock:
+            if self._proc is not None:
+                self._proc.stdin.close()  # end of input lets the helper exit on its own
+                try:
+                    self._proc.wait(timeout=1)
+                except subprocess.TimeoutExpired:
+                    self._proc.kill()
+                    self._proc.wait()
+                self._proc.stdout.close()
+                self._proc = None
+
+
+class FakeBackend(ControlBackend):
+    """Remembers levels in memory and counts the calls"""
+    name = 'fake'
+
+    def __init__(self, brightness=50, volume=50):
+        self.levels = {'brightness': brightness, 'volume': volume}
+        self.calls = 0
+
+    def brightness(self):
+        return self.levels['brightness']
+
+    def set_brightness(self, level):
+        self.calls += 1
+        self.levels['brightness'] = max(0, min(100, level))
+
+    def volume(self):
+        return self.levels['volume']
+
+    def set_volume(self, level):
+        self.calls += 1
+        self.levels['volume'] = max(0, min(100, level))
+
+
+CONTROL_BACKENDS = {
+    LinuxBackend.name: LinuxBackend,
+    HelperBackend.name: HelperBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+
+def default_backend(name=None):
+    """Pick a backend from ``name``, ``$VPM_CONTROLS`` or the platform"""
+    name = name or os.environ.get('VPM_CONTROLS')
+    if name is None:
+        name = {'Darwin': HelperBackend.name, 'Linux': LinuxBackend.name}.get(platform.system())
+    factory = CONTROL_BACKENDS.get(name)
+    if factory is None:
+        if name is not None:
+            print(f"Unknown control backend '{name}'")
+        return ControlBackend()
+    return factory()
+
+
+_control_backend = None
+_control_backend_lock = threading.Lock()
+
+
+def get_control_backend():
+    """The process-wide backend, so the macOS helper is started only once"""
+    global _control_backend
+    with _control_backend_lock:
+        if _control_backend is None:
+            _control_backend = default_backend()
+        return _control_backend
@@ -0,0 +1,212 @@
+from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QPushButton, QLabel,
+                             QTextEdit, QComboBox, QTableView, QLineEdit, QCheckBox,
+                             QHBoxLayout, QAbstractItemView, QHeaderView)
+from PyQt5.QtCore import Qt, QObject, QTimer, pyqtSignal
+
+from process_manager import ProcessManager
+from process_model import ProcessTableModel, ProcessFilterProxy
+from commands import CommandContext, CommandRunner, registry
+from tracing import get_tracer
+
+REFRESH_POLL_MS = 250
+
+class CommandExecutor(QObject):
+    """Runs voice commands on a worker pool and reports back over Qt signals"""
+    command_started = pyqtSignal(int, str)
+    command_finished = pyqtSignal(int, str, object)
+    command_failed = pyqtSignal(int, str, str)
+    output_ready = pyqtSignal(object)
+    refresh_requested = pyqtSignal()
+
+    def __init__(self, process_manager, max_workers=4, parent=None):
+        super().__init__(parent)
+        self.process_manager = process_manager
+        self.runner = CommandRunner(
+            registry, self.make_context, max_workers=max_workers,
+            on_start=lambda job: self.command_started.emit(job.id, job.text),
+            on_finish=lambda job, result: self.command_finished.emit(job.id, job.text, result),
+            on_error=lambda job, message: self.command_failed.emit(job.id, job.text, message)
+        )
+
+    def make_context(self, job):
+        # Handlers run on worker threads, so widget updates go through signals
+        return CommandContext(self.process_manager, show=self.output_ready.emit,
+                              refresh=self.refresh_requested.emit, job=job)
+
+    def submit(self, command, trace=None):
+        return self.runner.submit(command, trace)
+
+    def running_count(self):
+        return len(self.runner.running())
+
+    def cancel_all(self):
+        self.runner.cancel_all()
+
+    def shutdown(self):
+        self.runner.shutdown()
+
+class MainWindow(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.process_manager = ProcessManager()
+        self.voice_thread = None  # Initialize to None
+        self.executor = CommandExecutor(self.process_manager, parent=self)
+        self.executor.output_ready.connect(self.show_output)
+        self.executor.refresh_requested.connect(self.refresh_process_list)
+        self.executor.command_started.connect(self.on_command_started)
+        self.executor.command_finished.connect(self.on_command_finished)
+        self.executor.command_failed.connect(self.on_command_failed)
+        self.shown_generation = 0
+        self.refresh_after = None
+        self.init_ui()
+        
+    def init_ui(self):
+        self.setWindowTitle('Voice Process Manager')
+        self.setGeometry(100, 100, 700, 600)
+        
+        # Create central widget and layout
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        layout = QVBoxLayout(central_widget)
+        
+        # Status label
+        self.status_label = QLabel('Status: Ready')
+        layout.addWidget(self.status_label)
+        
+        # Process filter and auto-refresh toggle
+        filter_row = QHBoxLayout()
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText('Filter by name, PID or user')
+        filter_row.addWidget(self.filter_input)
+        self.auto_refresh = QCheckBox('Auto-refresh')
+        self.auto_refresh.setChecked(True)
+        filter_row.addWidget(self.auto_refresh)
+        layout.addLayout(filter_row)
+        
+        # Process list: only the visible rows are painted, whatever the process count
+        self.process_model = ProcessTableModel(self)
+        self.process_proxy = ProcessFilterProxy(self)
+        self.process_proxy.setSourceModel(self.process_model)
+        self.filter_input.textChanged.connect(self.process_proxy.set_filter_text)
+        self.process_list = QTableView()
+        self.process_list.setModel(self.process_proxy)
+        self.process_list.setSortingEnabled(True)
+        self.process_list.sortByColumn(3, Qt.DescendingOrder)
+        self.process_list.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.process_list.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.process_list.verticalHeader().setVisible(False)
+        self.process_list.verticalHeader().setDefaultSectionSize(20)
+        self.process_list.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.process_list, 3)
+        
+        # Command output (help, info, search results, stats)
+        self.output_view = QTextEdit()
+        self.output_view.setReadOnly(True)
+        layout.addWidget(self.output_view, 1)
+        
+        # Command input
+        self.command_input = QComboBox()
+        self.command_input.setEditable(True)
+        self.command_input.addItems(['start chrome', 'stop notepad', 'list processes'])
+        layout.addWidget(self.command_input)
+        
+        # Buttons
+        self.start_button = QPushButton('Start Voice Recognition')
+        self.start_button.clicked.connect(self.toggle_voice_recognition)
+        layout.addWidget(self.start_button)
+        
+        self.refresh_button = QPushButton('Refresh Process List')
+        self.refresh_button.clicked.connect(self.refresh_process_list)
+        layout.addWidget(self.refresh_button)
+        
+        self.cancel_button = QPushButton('Cancel Running Commands')
+        self.cancel_button.clicked.connect(self.executor.cancel_all)
+        self.cancel_button.setEnabled(False)
+        layout.addWidget(self.cancel_button)
+        
+        self.latency_button = QPushButton('Show Latency')
+        self.latency_button.clicked.connect(self.show_latency)
+        layout.addWidget(self.latency_button)
+        
+        # Follow the background table; checking its generation is cheap, so poll often
+        self.refresh_process_list()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.auto_refresh_process_list)
+        self.refresh_timer.start(REFRESH_POLL_MS)
+        
+    def toggle_voice_recognition(self):
+        if not self.voice_thread or not self.voice_thread.is_running:
+            # The speech stack is only loaded the first time voice recognition starts
+            from voice_thread import VoiceThread
+            self.voice_thread = VoiceThread(self.process_manager)
+            self.voice_thread.command_received.connect(self.handle_voice_command)
+            self.voice_thread.start()
+            self.start_button.setText('Stop Voice Recognition')
+            self.status_label.setText('Status: Listening for "Hey Chanti"')
+        else:
+            if self.voice_thread:
+                self.voice_thread.stop()
+                self.voice_thread = None
+            self.start_button.setText('Start Voice Recognition')
+            self.status_label.setText('Status: Ready')
+            
+    def refresh_process_list(self):
+        # The table's thread walks /proc and runs its listeners; the timer shows the result
+        table = self.process_manager.process_table
+        self.refresh_after = table.generation
+        table.request_refresh()
+        
+    def auto_refresh_process_list(self):
+        table = self.process_manager.process_table
+        generation = table.generation
+        if generation == self.shown_generation:
+            return
+        requested = self.refresh_after is not None and generation > self.refresh_after
+        if not (requested or self.auto_refresh.isChecked()):
+            return
+        # Never walk /proc on the GUI thread: show whatever the table last read
+        self.process_model.apply_snapshot(table.snapshot(max_age=float('inf')))
+        self.shown_generation = generation
+        if requested:
+            self.refresh_after = None
+        
+    def show_output(self, lines):
+        self.output_view.setText('\n'.join(lines))
+
+    def show_latency(self):
+        self.show_output(get_tracer().summary_lines())
+
+    def handle_voice_command(self, command, trace=None):
+        if not command.split():
+            if trace is not None:
+                trace.release()
+            self.process_manager.speak("No command received")
+            return
+        self.executor.submit(command, trace)
+        
+    def update_command_status(self, message=None):
+        running = self.executor.running_count()
+        self.cancel_button.setEnabled(running > 0)
+        if message:
+            self.status_label.setText(f'Status: {message}')
+        elif running:
+            self.status_label.setText(f'Status: Running {running} command(s)')
+        else:
+            self.status_label.setText('Status: Ready')
+        
+    def on_command_started(self, job_id, command):
+        self.update_command_status(f'Processing command: {command}')
+        
+    def on_command_finished(self, job_id, command, result):
+        self.update_command_status()
+        
+    def on_command_failed(self, job_id, command, message):
+        print(f"Command '{command}' failed: {message}")
+        self.update_command_status(f"'{command}' {message}")
+        
+    def closeEvent(self, event):
+        self.refresh_timer.stop()
+        self.executor.shutdown()
+        if self.voice_thread:
+            self.voice_thread.stop()
+        event.accept()
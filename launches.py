@@ -0,0 +1,219 @@
+"""Registry of the applications the assistant launched, and the waiter that reaps them.
+
+Every ``start`` goes through ``LaunchRegistry.launch``, which keeps the Popen
+handle until the child exits. Exits are noticed without polling: on Linux a
+single thread waits on a pidfd per child (``os.pidfd_open``, Linux 5.3 and
+Python 3.9), elsewhere each child gets a small thread blocked in ``wait``.
+Either way the child is reaped as soon as it exits, so finished launches
+leave no zombies or open handles behind, and only the last ``history``
+exits are remembered.
+
+A SIGCHLD handler is deliberately not used: Python only runs signal handlers
+on the main thread, which is the Qt event loop here, and a ``waitpid(-1)``
+in the handler would also reap the short-lived helpers that
+``run_subprocess`` waits for itself.
+"""
+import collections
+import os
+import selectors
+import subprocess
+import threading
+import time
+
+from tracing import current_trace
+
+
+class Launch:
+    __slots__ = ('pid', 'argv', 'name', 'started', 'spawn_s', 'returncode', 'ended', 'popen')
+
+    def __init__(self, popen, argv, name, started, spawn_s):
+        self.pid = popen.pid
+        self.argv = list(argv)
+        self.name = name
+        self.started = started  # wall clock, for display
+        self.spawn_s = spawn_s  # fork + exec until Popen returned
+        self.returncode = None
+        self.ended = None
+        self.popen = popen
+
+    @property
+    def running(self):
+        return self.ended is None
+
+    @property
+    def runtime(self):
+        return (self.ended or time.time()) - self.started
+
+    def as_dict(self):
+        return {'pid': self.pid, 'argv': self.argv, 'name': self.name, 'started': self.started,
+                'spawn_ms': self.spawn_s * 1000, 'returncode': self.returncode, 'ended': self.ended}
+
+
+class PidfdWaiter:
+    """One thread waiting on a pidfd per child; a pipe wakes it when a child is added"""
+    name = 'pidfd'
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._wake_read, self._wake_write = os.pipe()
+        self._selector.register(self._wake_read, selectors.EVENT_READ)
+        self._lock = threading.Lock()
+        self._added = []
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='launch-waiter', daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def available():
+        if not hasattr(os, 'pidfd_open'):
+            return False
+        try:
+            os.close(os.pidfd_open(os.getpid()))
+            return True
+        except OSError:
+            return False  # kernel older than 5.3
+
+    def watch(self, popen, callback):
+        pidfd = os.pidfd_open(popen.pid)  # works on a child that already exited, as long as it is unreaped
+        with self._lock:
+            self._added.append((pidfd, callback))
+        os.write(self._wake_write, b'\0')
+
+    def _run(self):
+        while self._running:
+            for key, _ in self._selector.select():
+                if key.fd == self._wake_read:
+                    os.read(self._wake_read, 4096)
+                    with self._lock:
+                        added, self._added = self._added, []
+                    for pidfd, callback in added:
+                        self._selector.register(pidfd, selectors.EVENT_READ, callback)
+                    continue
+                # Readable means the process exited
+                self._selector.unregister(key.fd)
+                os.close(key.fd)
+                try:
+                    key.data()
+                except Exception as e:
+                    print(f"❌ Error handling application exit: {e}")
+
+    def watched(self):
+        return len(self._selector.get_map()) - 1
+
+    def close(self):
+        self._running = False
+        os.write(self._wake_write, b'\0')
+
+
+class ThreadWaiter:
+    """A thread per child blocked in ``Popen.wait``, for platforms without pidfds"""
+    name = 'thread'
+
+    def __init__(self):
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def watch(self, popen, callback):
+        def wait():
+            popen.wait()
+            with self._lock:
+                self._count -= 1
+            callback()
+
+        with self._lock:
+            self._count += 1
+        threading.Thread(target=wait, name=f'launch-wait-{popen.pid}', daemon=True).start()
+
+    def watched(self):
+        with self._lock:
+            return self._count
+
+    def close(self):
+        pass
+
+
+class LaunchRegistry:
+    """Tracks launched children from spawn to exit.
+
+    ``on_exit(launch)`` is called on the waiter's thread after a child has
+    been reaped.
+    """
+
+    def __init__(self, history=100, on_exit=None, waiter=None):
+        if waiter is None:
+            waiter = PidfdWaiter() if PidfdWaiter.available() else ThreadWaiter()
+        self.waiter = waiter
+        self.on_exit = on_exit
+        self.launched = 0
+        self.exited = collections.deque(maxlen=history)
+        self._running = {}  # pid -> Launch
+        self._lock = threading.Lock()
+
+    def launch(self, argv, name=None, **popen_args):
+        """Start ``argv`` and track it; raises what Popen raises"""
+        started = time.time()
+        spawn_started = time.perf_counter()
+        popen = subprocess.Popen(argv, **popen_args)
+        spawn_s = time.perf_counter() - spawn_started
+        current_trace().add('launch', spawn_s)
+        launch = Launch(popen, [argv] if isinstance(argv, str) else argv, name or _display_name(argv),
+                        started, spawn_s)
+        with self._lock:
+            self._running[launch.pid] = launch
+            self.launched += 1
+        try:
+            self.waiter.watch(popen, lambda: self._reap(launch))
+        except OSError:
+            self._reap(launch)  # something else already reaped it
+        return launch
+
+    def _reap(self, launch):
+        # The child has exited, so this wait returns at once and frees the zombie
+        launch.returncode = launch.popen.wait()
+        launch.ended = time.time()
+        launch.popen = None
+        with self._lock:
+            self._running.pop(launch.pid, None)
+            self.exited.append(launch)
+        if self.on_exit is not None:
+            self.on_exit(launch)
+
+    def running(self):
+        with self._lock:
+            return list(self._running.values())
+
+    def recent(self, limit=10):
+        """Running launches, then the latest exits, newest first"""
+        with self._lock:
+            launches = sorted(self._running.values(), key=lambda l: l.started, reverse=True)
+            launches += list(reversed(self.exited))
+        return launches[:limit]
+
+    def stats(self):
+        with self._lock:
+            running = len(self._running)
+        spawns = sorted(launch.spawn_s for launch in list(self.exited) + self.running())
+        return {'launched': self.launched, 'running': running, 'watched': self.waiter.watched(),
+                'waiter': self.waiter.name,
+                'spawn_p50_ms': spawns[len(spawns) // 2] * 1000 if spawns else None}
+
+    def close(self):
+        self.waiter.close()
+
+
+def _display_name(argv):
+    command = argv if isinstance(argv, str) else argv[0]
+    return os.path.basename(command)
+
+
+_launch_registry = None
+_launch_registry_lock = threading.Lock()
+
+
+def get_launch_registry():
+    """The registry shared by every ProcessManager"""
+    global _launch_registry
+    with _launch_registry_lock:
+        if _launch_registry is None:
+            _launch_registry = LaunchRegistry()
+        return _launch_registry
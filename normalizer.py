@@ -0,0 +1,195 @@
+"""Wake word normalization for recognizer transcripts.
+
+The correction table is compiled once into a single word-bounded regex, so a
+short mishearing like 'hand' no longer rewrites 'handle'. Mishearings of the
+assistant's name that are not in the table are still caught by a phonetic key
+and a bounded edit distance, so the table does not have to grow with every
+new way the recognizer spells "chanti".
+"""
+import json
+import os
+import re
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'normalizer.json')
+
+# Common misrecognitions and their corrections
+DEFAULT_CORRECTIONS = {
+    'hmt': 'hey',
+    'hint': 'hey',
+    'hand': 'hey',
+    'hnd': 'hey',
+    'mt': 'hey',
+    'a': 'hey',
+    'chandi': 'chanti',
+    'shanty': 'chanti',
+    'shanti': 'chanti',
+    'chunti': 'chanti',
+    'chante': 'chanti',
+    'chantee': 'chanti',
+    'chanthi': 'chanti',
+    'chanty': 'chanti',
+    'shunty': 'chanti',
+    'chunty': 'chanti',
+    'chuntu': 'chanti',
+}
+
+_DIGRAPHS = re.compile(r'sch|tch|ch|sh|th|ph|ck|gh')
+_DIGRAPH_KEYS = {'sch': 'X', 'tch': 'X', 'ch': 'X', 'sh': 'X', 'th': 'T', 'ph': 'F', 'ck': 'K', 'gh': 'K'}
+_LETTER_KEYS = str.maketrans({
+    'b': 'P', 'd': 'T', 'g': 'K', 'j': 'X', 'q': 'K', 'v': 'F', 'z': 'S',
+    'c': 'K', 'f': 'F', 'k': 'K', 'l': 'L', 'm': 'M', 'n': 'N', 'p': 'P',
+    'r': 'R', 's': 'S', 't': 'T', 'x': 'KS',
+})
+
+
+def phonetic_key(word):
+    """Coarse metaphone-style key: voicing and vowels are ignored.
+
+    'chanti', 'shanty', 'chandi' and 'chuntu' all map to 'XNT'.
+    """
+    word = ''.join(ch for ch in word.lower() if ch.isalpha())
+    if not word:
+        return ''
+    word = re.sub(r'c(?=[eiy])', 's', word)
+    word = _DIGRAPHS.sub(lambda m: _DIGRAPH_KEYS[m.group()], word)
+    key = []
+    for i, ch in enumerate(word):
+        if ch in 'aeiouyhw':
+            if i == 0 and ch in 'aeiou':
+                key.append('A')
+            continue
+        code = ch if ch.isupper() else ch.translate(_LETTER_KEYS)
+        if not key or key[-1] != code:
+            key.append(code)
+    return ''.join(key)
+
+
+def bounded_levenshtein(a, b, limit):
+    """Edit distance between a and b, or limit + 1 as soon as it must exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            row_min = min(row_min, current[j])
+        if row_min > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+class WakeWordNormalizer:
+    """Compiled transcript normalizer for the wake word.
+
+    Table entries that map to the first word of the wake word ('hmt' -> 'hey')
+    are only applied directly in front of the name, entries that map to the
+    name are matched as whole words, and anything else is a whole-phrase
+    replacement. All phrase rules run as one regex pass.
+    """
+
+    def __init__(self, corrections=None, wake_word='hey chanti', max_distance=2):
+        self.wake_word = wake_word
+        self.greeting, self.name = wake_word.split()[0], wake_word.split()[-1]
+        self.max_distance = max_distance
+        self.name_key = phonetic_key(self.name)
+        self.greeting_variants = set()
+        self.name_variants = {self.name}
+        self.phrases = {}
+        for wrong, right in (DEFAULT_CORRECTIONS if corrections is None else corrections).items():
+            wrong, right = wrong.lower().strip(), right.lower().strip()
+            if ' ' not in wrong and right == self.greeting:
+                self.greeting_variants.add(wrong)
+            elif ' ' not in wrong and right == self.name:
+                self.name_variants.add(wrong)
+            elif wrong != right:
+                self.phrases[wrong] = right
+        self.phrase_pattern = None
+        if self.phrases:
+            # Longest first so 'hey chandi' wins over any shorter overlapping key
+            alternation = '|'.join(re.escape(p) for p in sorted(self.phrases, key=len, reverse=True))
+            self.phrase_pattern = re.compile(r'\b(?:' + alternation + r')\b')
+        self._name_cache = {}
+        self._greeting_cache = {}
+
+    @classmethod
+    def from_config(cls, path=None):
+        """Build a normalizer from a JSON config, falling back to the built-in table.
+
+        The file may contain "corrections" (wrong -> right), "wake_word" and
+        "max_distance"; it is looked up at ``path``, ``$VPM_NORMALIZER_CONFIG``
+        or ``normalizer.json`` next to this module.
+        """
+        path = path or os.environ.get('VPM_NORMALIZER_CONFIG', DEFAULT_CONFIG_PATH)
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        corrections = dict(DEFAULT_CORRECTIONS)
+        corrections.update(config.get('corrections', {}))
+        return cls(corrections,
+                   wake_word=config.get('wake_word', 'hey chanti'),
+                   max_distance=config.get('max_distance', 2))
+
+    def is_name(self, word):
+        """True if a single transcript word is (a mishearing of) the assistant's name"""
+        cached = self._name_cache.get(word)
+        if cached is not None:
+            return cached
+        result = (
+            word in self.name_variants
+            or (len(word) > 2 and phonetic_key(word) == self.name_key)
+            or (word[:1] in 'cjs' and bounded_levenshtein(word, self.name, self.max_distance) <= self.max_distance)
+        )
+        if len(self._name_cache) < 4096:
+            self._name_cache[word] = result
+        return result
+
+    def is_greeting(self, word):
+        cached = self._greeting_cache.get(word)
+        if cached is not None:
+            return cached
+        result = (word == self.greeting or word in self.greeting_variants
+                  or bounded_levenshtein(word, self.greeting, 1) <= 1)
+        if len(self._greeting_cache) < 4096:
+            self._greeting_cache[word] = result
+        return result
+
+    def normalize(self, text):
+        """Normalize detected text for better matching"""
+        text = text.lower().strip()
+        if self.phrase_pattern is not None:
+            text = self.phrase_pattern.sub(lambda m: self.phrases[m.group()], text)
+
+        words = text.split()
+        for i in range(1, len(words)):
+            # The name is only rewritten right after a greeting, so 'stop shanty'
+            # or 'shanty town' in a command survives
+            if not self.is_greeting(words[i - 1]):
+                continue
+            if words[i] != self.name and self.is_name(words[i]):
+                words[i] = self.name
+            if words[i] == self.name:
+                words[i - 1] = self.greeting
+        return ' '.join(words)
+
+    def command_after_wake_word(self, normalized):
+        """What follows the wake word in a normalized transcript: '' if nothing, None if there is no wake word"""
+        words = normalized.split()
+        for i in range(len(words) - 1):
+            if words[i] == self.greeting and words[i + 1] == self.name:
+                return ' '.join(words[i + 2:])
+        return None
+
+
+_default_normalizer = None
+
+
+def get_normalizer():
+    """Shared normalizer compiled on first use"""
+    global _default_normalizer
+    if _default_normalizer is None:
+        _default_normalizer = WakeWordNormalizer.from_config()
+    return _default_normalizer
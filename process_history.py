@@ -0,0 +1,434 @@
+"""Per-process resource history in a fixed-size memory-mapped ring file.
+
+``HistoryRecorder`` samples every process's CPU percent, resident memory and
+storage I/O every ``interval`` seconds and appends one 40-byte record per
+process to a ``HistoryFile``. The file never grows: once the record ring is
+full the oldest round is overwritten. Process names are interned into a
+fixed table of name slots in the same file, so a record holds a name id
+instead of the string.
+
+The file layout is a 4 KiB header, the name table, then the record ring.
+Records are written in time order, so a query finds the start and end of
+its window by bisecting the ring and copies only that slice into a numpy
+array; grouping and ranking happen in numpy without building a Python
+object per record. numpy is only imported by queries.
+
+Recording is off unless ``VPM_HISTORY=1`` or ``VPM_HISTORY_FILE`` is set.
+``VPM_HISTORY_INTERVAL`` (seconds, default 10) and ``VPM_HISTORY_MB`` (file
+size, default 64) bound the rate and the disk use.
+"""
+import os
+import struct
+import threading
+import time
+
+import psutil
+
+MAGIC = b'VPMHIST1'
+VERSION = 1
+# magic, version, record size, name width, name slots, names used, capacity, records written, interval
+HEADER = struct.Struct('<8sIIIIIQQd')
+HEADER_SIZE = 4096
+_NAMES_USED_OFFSET = struct.calcsize('<8sIIII')
+_WRITTEN_OFFSET = struct.calcsize('<8sIIIIIQ')
+# time (epoch seconds), pid, name id, CPU percent, RSS, bytes read and written since the previous round
+RECORD = struct.Struct('<IIIfQQQ')
+_TIME = struct.Struct('<I')
+NAME_WIDTH = 48  # bytes of UTF-8; longer names are cut
+NAME_SLOTS = 8192
+OVERFLOW_NAME = '?'  # name id 0, used for every name once the table is full
+METRICS = ('cpu', 'memory', 'io')
+
+
+def record_dtype():
+    """The numpy view of one ``RECORD``"""
+    import numpy as np
+    return np.dtype([('t', '<u4'), ('pid', '<u4'), ('name', '<u4'), ('cpu', '<f4'),
+                     ('rss', '<u8'), ('read', '<u8'), ('write', '<u8')])
+
+
+def default_history_path():
+    """``$VPM_HISTORY_FILE``, else ``history.bin`` in the XDG state directory if ``$VPM_HISTORY`` is set, else None"""
+    path = os.environ.get('VPM_HISTORY_FILE')
+    if path:
+        return path
+    if os.environ.get('VPM_HISTORY', '').lower() not in ('1', 'true', 'yes', 'on'):
+        return None
+    state = os.environ.get('XDG_STATE_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'state')
+    return os.path.join(state, 'voice-process-manager', 'history.bin')
+
+
+class HistoryRow:
+    """One process (or, grouped by name, every process of one name) over a query window"""
+    __slots__ = ('name', 'pid', 'processes', 'samples', 'cpu_avg', 'cpu_max', 'rss_avg', 'rss_max',
+                 'read_bytes', 'write_bytes')
+
+    def __init__(self, **values):
+        for slot in self.__slots__:
+            setattr(self, slot, values.get(slot))
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class HistoryResults(list):
+    """Rows, heaviest first; ``rounds`` samples between ``since`` and ``until`` (epoch seconds) were read"""
+
+    def __init__(self, rows=(), rounds=0, since=None, until=None):
+        super().__init__(rows)
+        self.rounds = rounds
+        self.since = since
+        self.until = until
+
+
+class HistoryFile:
+    """The ring file. One writer per file; readers may open it ``readonly`` from other processes.
+
+    A file whose format or size does not match what was asked for is
+    recreated (and its history lost) unless it is opened read-only.
+    """
+
+    def __init__(self, path, size_mb=64, name_slots=NAME_SLOTS, interval=10.0, readonly=False):
+        import mmap
+
+        self.path = path
+        self.readonly = readonly
+        self.lock = threading.Lock()
+        self._names = []
+        self._ids = {}
+        capacity = (int(size_mb * 2 ** 20) - HEADER_SIZE - name_slots * NAME_WIDTH) // RECORD.size
+        if capacity < 1:
+            raise ValueError(f"{size_mb} MB is too small for a history file")
+        if readonly:
+            self._file = open(path, 'rb')
+        else:
+            self._file = open(path, 'r+b' if os.path.exists(path) else 'w+b')
+        problem = self._check(None if readonly else capacity, None if readonly else name_slots)
+        if problem and readonly:
+            self._file.close()
+            raise ValueError(f"{path} is not a usable history file: {problem}")
+        if problem:
+            if os.path.getsize(path):
+                print(f"Recreating process history {path}: {problem}")
+            self._create(capacity, name_slots, interval)
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ if readonly else mmap.ACCESS_WRITE)
+        (_, _, _, _, self.name_slots, _, self.capacity, _, self.interval) = HEADER.unpack_from(self._mm)
+        self.records_offset = HEADER_SIZE + self.name_slots * NAME_WIDTH
+        self._load_names()
+
+    def _check(self, capacity, name_slots):
+        """Why the file cannot be used as it is, or None"""
+        self._file.seek(0)
+        header = self._file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return "empty or truncated"
+        magic, version, record_size, name_width, slots, _, stored_capacity, _, _ = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size or name_width != NAME_WIDTH:
+            return "different format"
+        if (capacity is not None and stored_capacity != capacity) or (name_slots is not None and slots != name_slots):
+            return "different size"
+        if os.path.getsize(self.path) < HEADER_SIZE + slots * NAME_WIDTH + stored_capacity * RECORD.size:
+            return "truncated"
+        return None
+
+    def _create(self, capacity, name_slots, interval):
+        self._file.truncate(0)
+        # Sparse until written, and never larger than this
+        self._file.truncate(HEADER_SIZE + name_slots * NAME_WIDTH + capacity * RECORD.size)
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, NAME_WIDTH, name_slots, 1, capacity, 0, interval))
+        self._file.seek(HEADER_SIZE)
+        self._file.write(OVERFLOW_NAME.encode())
+        self._file.flush()
+
+    # Names
+
+    def _load_names(self):
+        """Pick up names interned since the last call (by this or another process)"""
+        used = struct.unpack_from('<I', self._mm, _NAMES_USED_OFFSET)[0]
+        for name_id in range(len(self._names), used):
+            start = HEADER_SIZE + name_id * NAME_WIDTH
+            name = self._mm[start:start + NAME_WIDTH].rstrip(b'\0').decode('utf-8', 'ignore')
+            self._names.append(name)
+            self._ids.setdefault(name, name_id)
+        return self._names
+
+    def intern(self, name):
+        """The id for ``name``, adding it to the name table if it is new"""
+        name_id = self._ids.get(name)
+        if name_id is not None:
+            return name_id
+        # Cut at the slot width without splitting a character
+        stored = name.encode('utf-8')[:NAME_WIDTH].decode('utf-8', 'ignore')
+        name_id = self._ids.get(stored)
+        if name_id is None:
+            with self.lock:
+                name_id = len(self._names)
+                if name_id >= self.name_slots:
+                    return 0
+                start = HEADER_SIZE + name_id * NAME_WIDTH
+                encoded = stored.encode('utf-8')
+                self._mm[start:start + len(encoded)] = encoded
+                self._names.append(stored)
+                self._ids[stored] = name_id
+                struct.pack_into('<I', self._mm, _NAMES_USED_OFFSET, len(self._names))
+        self._ids[name] = name_id
+        return name_id
+
+    def names(self):
+        with self.lock:
+            return list(self._load_names())
+
+    # Records
+
+    @property
+    def written(self):
+        """Records appended over the life of the file; the ring holds the last ``capacity`` of them"""
+        return struct.unpack_from('<Q', self._mm, _WRITTEN_OFFSET)[0]
+
+    def append(self, timestamp, rows):
+        """Write one round of ``(pid, name id, cpu percent, rss, read bytes, write bytes)`` rows"""
+        rows = rows[-self.capacity:]
+        size = RECORD.size
+        buffer = bytearray(size * len(rows))
+        t = int(timestamp)
+        for i, (pid, name_id, cpu, rss, read, write) in enumerate(rows):
+            RECORD.pack_into(buffer, i * size, t, pid, name_id, cpu, rss, read, write)
+        with self.lock:
+            written = self.written
+            start = written % self.capacity
+            first = min(len(rows), self.capacity - start)
+            offset = self.records_offset + start * size
+            self._mm[offset:offset + first * size] = buffer[:first * size]
+            if first < len(rows):  # wrap around to the start of the ring
+                rest = len(buffer) - first * size
+                self._mm[self.records_offset:self.records_offset + rest] = buffer[first * size:]
+            struct.pack_into('<Q', self._mm, _WRITTEN_OFFSET, written + len(rows))
+
+    def _segments(self, written):
+        """The stored records as ``(start, end)`` slot ranges, oldest first"""
+        if written <= self.capacity:
+            return [(0, written)] if written else []
+        cursor = written % self.capacity
+        return [(cursor, self.capacity)] + ([(0, cursor)] if cursor else [])
+
+    def _time(self, slot):
+        return _TIME.unpack_from(self._mm, self.records_offset + slot * RECORD.size)[0]
+
+    def _bisect(self, lo, hi, t):
+        """First slot in ``[lo, hi)`` recorded after ``t``"""
+        while lo < hi:
+            middle = (lo + hi) // 2
+            if self._time(middle) <= t:
+                lo = middle + 1
+            else:
+                hi = middle
+        return lo
+
+    def records(self, since=None, until=None):
+        """A numpy copy of the records with ``since < t <= until``, oldest first"""
+        import numpy as np
+
+        dtype = record_dtype()
+        parts = []
+        with self.lock:
+            for lo, hi in self._segments(self.written):
+                start = lo if since is None else self._bisect(lo, hi, int(since))
+                end = hi if until is None else self._bisect(start, hi, int(until))
+                if end > start:
+                    parts.append(np.frombuffer(self._mm, dtype, end - start,
+                                               self.records_offset + start * RECORD.size).copy())
+        return np.concatenate(parts) if parts else np.empty(0, dtype)
+
+    def span(self):
+        """``(oldest, newest)`` record times, or None while the file is empty"""
+        with self.lock:
+            segments = self._segments(self.written)
+            if not segments:
+                return None
+            return self._time(segments[0][0]), self._time(segments[-1][1] - 1)
+
+    def top(self, metric='cpu', since=None, until=None, limit=10, by='process'):
+        """The ``limit`` heaviest processes between ``since`` and ``until`` by ``metric``.
+
+        ``cpu`` ranks by average CPU over every round in the window (a process
+        that ran flat out for one minute of the hour averages 1/60 of that),
+        ``memory`` by peak RSS and ``io`` by bytes read and written. With
+        ``by='name'`` all processes of one name are added up round by round.
+        """
+        import numpy as np
+
+        if metric not in METRICS:
+            raise ValueError(f"unknown metric '{metric}'")
+        records = self.records(since, until)
+        if not len(records):
+            return HistoryResults(since=since, until=until)
+        times, round_index = np.unique(records['t'], return_inverse=True)
+        rounds = len(times)
+        name_ids = records['name'].astype(np.uint64)
+        pid_keys = (records['pid'].astype(np.uint64) << np.uint64(32)) | name_ids
+        groups, group_index = np.unique(name_ids if by == 'name' else pid_keys, return_inverse=True)
+        # One cell per group and round: a round's processes of one name add up
+        cells, cell_index = np.unique(group_index.astype(np.int64) * rounds + round_index, return_inverse=True)
+        cell_cpu = np.bincount(cell_index, weights=records['cpu'])
+        cell_rss = np.bincount(cell_index, weights=records['rss'])
+        cell_group = cells // rounds
+        starts = np.flatnonzero(np.diff(cell_group, prepend=-1))
+        samples = np.diff(np.append(starts, len(cells)))
+        cpu_total = np.add.reduceat(cell_cpu, starts)
+        rss_max = np.maximum.reduceat(cell_rss, starts)
+        read = np.bincount(group_index, weights=records['read'])
+        write = np.bincount(group_index, weights=records['write'])
+        score = {'cpu': cpu_total, 'memory': rss_max, 'io': read + write}[metric]
+        order = np.argsort(-score, kind='stable')[:limit]
+
+        if by == 'name':
+            pid_groups = np.searchsorted(groups, np.unique(pid_keys) & np.uint64(0xffffffff))
+            processes = np.bincount(pid_groups, minlength=len(groups))
+        rss_total = np.add.reduceat(cell_rss, starts)
+        cpu_max = np.maximum.reduceat(cell_cpu, starts)
+        names = self.names()
+        rows = []
+        for i in order.tolist():
+            key = int(groups[i])
+            rows.append(HistoryRow(
+                name=names[key & 0xffffffff] if (key & 0xffffffff) < len(names) else OVERFLOW_NAME,
+                pid=None if by == 'name' else key >> 32,
+                processes=int(processes[i]) if by == 'name' else 1,
+                samples=int(samples[i]),
+                cpu_avg=float(cpu_total[i]) / rounds, cpu_max=float(cpu_max[i]),
+                rss_avg=int(rss_total[i] / samples[i]), rss_max=int(rss_max[i]),
+                read_bytes=int(read[i]), write_bytes=int(write[i])))
+        return HistoryResults(rows, rounds, int(times[0]), int(times[-1]))
+
+    def stats(self):
+        written = self.written
+        span = self.span()
+        return {'path': self.path, 'capacity': self.capacity, 'written': written,
+                'stored': min(written, self.capacity), 'names': len(self.names()),
+                'file_bytes': self.records_offset + self.capacity * RECORD.size,
+                'oldest': span[0] if span else None, 'newest': span[1] if span else None}
+
+    def close(self):
+        with self.lock:
+            if self._mm is not None:
+                if not self.readonly:
+                    self._mm.flush()
+                self._mm.close()
+                self._mm = None
+                self._file.close()
+
+
+# Sample sources: each call returns (pid, create time, name, cpu percent, rss, read bytes, write bytes)
+# rows with cumulative I/O counters, -1 where they cannot be read
+
+class ProcfsSource:
+    def __init__(self, root='/proc'):
+        from procfs import ProcfsCollector
+        self.collector = ProcfsCollector(root, io=True)
+
+    def __call__(self):
+        snap = self.collector.snapshot()
+        return zip(snap.pid, snap.create_time, snap.name, snap.cpu_percent, snap.rss,
+                   snap.read_bytes, snap.write_bytes)
+
+
+def psutil_source():
+    rows = []
+    for proc in psutil.process_iter(['pid', 'create_time', 'name', 'cpu_percent', 'memory_info', 'io_counters']):
+        info = proc.info
+        memory = info['memory_info']
+        io = info['io_counters']  # not available on macOS
+        rows.append((info['pid'], info['create_time'] or 0.0, info['name'] or '', info['cpu_percent'] or 0.0,
+                     memory.rss if memory else 0, io.read_bytes if io else -1, io.write_bytes if io else -1))
+    return rows
+
+
+def default_source():
+    from procfs import procfs_available
+    if procfs_available():
+        try:
+            return ProcfsSource()
+        except (OSError, RuntimeError) as e:
+            print(f"Falling back to psutil for process history: {e}")
+    return psutil_source
+
+
+class HistoryRecorder:
+    """Appends one round of samples to ``history`` every ``interval`` seconds"""
+
+    def __init__(self, history, interval=10.0, source=None):
+        self.history = history
+        self.interval = interval
+        self.source = source or default_source()
+        self._io = {}  # (pid, create time) -> cumulative (read, write) at the previous round
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self, timestamp=None):
+        """Take one round now; returns the number of processes recorded"""
+        timestamp = time.time() if timestamp is None else timestamp
+        intern = self.history.intern
+        previous = self._io
+        current = {}
+        rows = []
+        for pid, created, name, cpu, rss, read, write in self.source():
+            read_delta = write_delta = 0
+            if read >= 0 and write >= 0:
+                key = (pid, created)
+                current[key] = (read, write)
+                last = previous.get(key)
+                if last is not None:
+                    read_delta = max(0, read - last[0])
+                    write_delta = max(0, write - last[1])
+            rows.append((pid, intern(name or OVERFLOW_NAME), cpu or 0.0, max(0, rss or 0), read_delta, write_delta))
+        self._io = current
+        self.history.append(timestamp, rows)
+        return len(rows)
+
+    def top(self, metric='cpu', window=3600.0, ago=0.0, limit=10, by='process'):
+        """``HistoryFile.top`` for the ``window`` seconds ending ``ago`` seconds before now"""
+        until = time.time() - ago
+        return self.history.top(metric, until - window, until, limit, by)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='process-history', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Error recording process history: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_history_recorder():
+    """The process-wide recorder, started on first use, or None when history is not enabled"""
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = False
+            path = default_history_path()
+            if path:
+                interval = float(os.environ.get('VPM_HISTORY_INTERVAL', 10))
+                try:
+                    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                    history = HistoryFile(path, float(os.environ.get('VPM_HISTORY_MB', 64)), interval=interval)
+                    _recorder = HistoryRecorder(history, interval).start()
+                except (OSError, ValueError) as e:
+                    print(f"Process history disabled: {e}")
+        return _recorder or None
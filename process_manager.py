@@ -0,0 +1,717 @@
+import os
+import platform
+import shutil
+import subprocess
+import time
+
+import psutil
+
+from controls import ControlError, get_control_backend
+from launches import get_launch_registry
+from speech_output import get_speech_queue
+from process_history import get_history_recorder
+from process_search import get_process_search
+from process_table import get_process_table
+from process_tree import get_process_tree
+from system_stats import get_stats_collector
+from commands import run_subprocess, cancellable_sleep, check_cancelled
+from tracing import current_trace
+
+class ProcessManager:
+    def __init__(self):
+        self.mac_app_names = {
+            'chrome': 'Google Chrome',
+            'safari': 'Safari',
+            'firefox': 'Firefox',
+            'terminal': 'Terminal',
+            'notes': 'Notes',
+            'calculator': 'Calculator',
+            'system preferences': 'System Preferences',
+            'settings': 'System Settings',
+            'mail': 'Mail',
+            'messages': 'Messages',
+            'calendar': 'Calendar',
+            'photos': 'Photos',
+            'music': 'Music',
+            'maps': 'Maps',
+            'finder': 'Finder',
+            'preview': 'Preview',
+            'textedit': 'TextEdit',
+            'activity monitor': 'Activity Monitor',
+            'app store': 'App Store',
+            'facetime': 'FaceTime',
+            'keynote': 'Keynote',
+            'pages': 'Pages',
+            'numbers': 'Numbers'
+        }
+        self.system_info = {}
+        self.speech = get_speech_queue()
+        # One background-refreshed table shared by every ProcessManager
+        self.process_table = get_process_table()
+        # Index over command lines, executables and cwds, built on the first search
+        self.process_search = None
+        # Parent/child index with per-application rollups, built on first use
+        self.process_tree = None
+        self.stats_collector = get_stats_collector()
+        # Per-process CPU, memory and I/O on disk, when enabled with VPM_HISTORY=1
+        self.history = get_history_recorder()
+        # Keeps every launched child until it exits and reaps it then
+        self.launches = get_launch_registry()
+        self.launches.on_exit = self.report_failed_launch
+        # A launch that exits with an error within this many seconds is reported as failed to start
+        self.failed_launch_window = 5.0
+        # Brightness and volume in one absolute step (sysfs on Linux, a persistent helper on macOS)
+        self.controls = get_control_backend()
+        # Seconds to wait after SIGTERM before escalating, and after SIGKILL before giving up
+        self.termination_grace = 3.0
+        self.kill_grace = 1.0
+        self.common_websites = {
+            'gmail': 'https://mail.google.com',
+            'youtube': 'https://www.youtube.com',
+            'google': 'https://www.google.com',
+            'maps': 'https://maps.google.com',
+            'drive': 'https://drive.google.com',
+            'calendar': 'https://calendar.google.com',
+            'github': 'https://github.com',
+            'linkedin': 'https://linkedin.com',
+            'amazon': 'https://amazon.com',
+            'netflix': 'https://netflix.com'
+        }
+        self.update_system_info()
+
+    def update_system_info(self):
+        # Read the latest background sample instead of blocking on cpu_percent(interval=1)
+        sample = self.stats_collector.latest()
+        self.system_info = {
+            'cpu_percent': sample.cpu_percent,
+            'per_cpu': sample.per_cpu,
+            'memory_percent': sample.memory_percent,
+            'battery': sample.battery_percent,
+            'disk_usage': sample.disk_percent,
+            'load': (sample.load_1m, sample.load_5m, sample.load_15m)
+        }
+
+    def speak(self, text):
+        # Queued and spoken by a background worker, so callers never wait for playback
+        self.speech.say(text)
+        
+    def start_process(self, process_name, speak=None):
+        speak = speak or self.speak
+        try:
+            process_name = process_name.lower()
+            if platform.system() == 'Darwin':  # macOS
+                # Try to find the proper app name
+                app_name = self.mac_app_names.get(process_name, process_name)
+                self.launches.launch(['open', '-a', app_name], app_name)
+                speak(f"Started {app_name} successfully")
+            elif platform.system() == 'Windows':
+                self.launches.launch(process_name)
+                speak(f"Started {process_name} successfully")
+            else:  # Linux
+                entry = self.find_app(process_name)
+                if entry is not None:
+                    # Detached so the application outlives a stop of the assistant
+                    self.launches.launch(entry.argv, entry.name, start_new_session=True)
+                    speak(f"Started {entry.name} successfully")
+                else:
+                    self.launches.launch(process_name)
+                    speak(f"Started {process_name} successfully")
+            return True
+        except Exception as e:
+            speak(f"Failed to start {process_name}. Please make sure the application name is correct.")
+            return False
+
+    def report_failed_launch(self, launch):
+        """Called when a launched application exits; speaks up if it died on startup"""
+        if launch.returncode and launch.returncode > 0 and launch.runtime < self.failed_launch_window:
+            self.speak(f"{launch.name} exited right after starting, with status {launch.returncode}")
+
+    def stop_launched(self, speak=None):
+        """Terminate every application started by the assistant that is still running, with its children"""
+        speak = speak or self.speak
+        launches = self.launches.running()
+        if not launches:
+            speak("Nothing I started is still running")
+            return {}
+        # Unreaped children keep their PIDs, so these cannot have been reused by another process
+        procs, _ = self.resolve_targets(pids=[launch.pid for launch in launches], tree=True)
+        outcomes = self.terminate_processes(procs)
+        speak(self.describe_termination(outcomes))
+        return outcomes
+
+    def stop_process(self, process_name, speak=None):
+        speak = speak or self.speak
+        process_name = process_name.lower()
+        if platform.system() == 'Darwin':
+            app_name = self.mac_app_names.get(process_name, process_name)
+        else:
+            app_name = process_name
+            
+        # The whole application: a browser's helpers go with it
+        procs, _ = self.resolve_targets(names=[app_name], apps=True)
+        if not procs:
+            # It may have been started since the last background refresh
+            self.process_table.refresh()
+            procs, _ = self.resolve_targets(names=[app_name], apps=True)
+        if not procs and platform.system() == 'Linux':
+            # "stop visual studio code" means the process the index would have started, if that
+            # is clearly an application; a loose match would stop some other command
+            entry = self.find_app(app_name, confident=True)
+            # Not by its Exec command, which may be a wrapper (sh -c, env, flatpak) shared with
+            # every other process of that name
+            for name in entry.process_names() if entry is not None else ():
+                procs, _ = self.resolve_targets(names=[name], apps=True)
+                if procs:
+                    break
+        if not procs:
+            # A partial name ("stop c") could be any number of applications; say which instead
+            candidates = self.find_candidates(app_name)
+            if candidates:
+                speak(self.describe_candidates(app_name, candidates))
+            else:
+                speak(f"Could not find process {app_name}")
+            return False
+        outcomes = self.terminate_processes(procs)
+        speak(self.describe_termination(outcomes, app_name))
+        return any(o['outcome'] in ('terminated', 'killed') for o in outcomes.values())
+        
+    def find_app(self, spoken_name, confident=False):
+        """The launch target for a spoken application name on Linux, or None.
+
+        With ``confident`` only a close match to a desktop entry counts.
+        """
+        from app_index import CONFIDENT_SCORE, get_app_index  # scanning is deferred until the first app command
+        try:
+            if confident:
+                return get_app_index().resolve(spoken_name, CONFIDENT_SCORE, sources=('desktop',))
+            return get_app_index().resolve(spoken_name)
+        except Exception as e:
+            print(f"Application index unavailable: {e}")
+            return None
+
+    def _raise_linux_window(self, app_name):
+        """Activate a window of ``app_name`` with wmctrl; returns the name spoken back, or None"""
+        if not shutil.which('wmctrl'):
+            return None
+        entry = self.find_app(app_name)
+        target = (entry.wm_class or entry.program or entry.executable) if entry is not None else app_name
+        # -x matches the WM_CLASS, which is what desktop entries and executables are named after
+        if run_subprocess(['wmctrl', '-x', '-a', target], capture_output=True).returncode:
+            return None
+        return entry.name if entry is not None else app_name
+
+    def _tree(self):
+        if self.process_tree is None:
+            self.process_tree = get_process_tree()
+        return self.process_tree
+
+    def resolve_targets(self, pids=(), names=(), tree=False, apps=False, exact=False):
+        """psutil.Process objects for PIDs and name patterns, plus all their descendants if ``tree``.
+
+        Returns ``(processes, missing_pids)``. Names containing ``*``, ``?`` or
+        ``[`` are shell-style patterns; others use the exact/prefix/substring lookup.
+        With ``exact`` a name that is not a pattern must match exactly. ``apps``
+        implies it and brings every process of the applications a name matches:
+        expanding a prefix or substring hit to whole applications would reach
+        far too wide.
+        """
+        procs = {}
+        missing = []
+        for pid in pids:
+            try:
+                procs[pid] = psutil.Process(pid)
+            except psutil.NoSuchProcess:
+                missing.append(pid)
+        for name in names:
+            if any(c in name for c in '*?['):
+                records = self.process_table.find_pattern(name)
+            elif apps or exact:
+                records = self.process_table.find_exact(name)
+            else:
+                records = self.process_table.find(name)
+            if apps:
+                records = [member for group in self._tree().groups_for(records) for member in group.members]
+            for record in records:
+                try:
+                    procs.setdefault(record.pid, record.process())
+                except psutil.NoSuchProcess:
+                    continue
+        if tree:
+            for proc in list(procs.values()):
+                try:
+                    for child in proc.children(recursive=True):
+                        procs.setdefault(child.pid, child)
+                except psutil.Error:
+                    continue
+        procs.pop(os.getpid(), None)  # never take ourselves down
+        return list(procs.values()), missing
+
+    def _wait_all(self, procs, timeout, outcome, outcomes):
+        """Wait for all of ``procs`` together until they exit or ``timeout`` passes; returns survivors"""
+        deadline = time.monotonic() + timeout
+        alive = procs
+        while alive:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            gone, alive = psutil.wait_procs(alive, timeout=min(remaining, 0.25))
+            for proc in gone:
+                outcomes[proc.pid]['outcome'] = outcome
+            check_cancelled()
+        return alive
+
+    def terminate_processes(self, procs, grace=None, force=False):
+        """Signal every process at once, wait for them together and escalate survivors.
+
+        SIGTERM goes to all of ``procs`` (SIGKILL straight away with ``force``),
+        then they are waited on as a group for ``grace`` seconds; whatever is
+        still running gets SIGKILL. The total time is bounded by the grace
+        period, not the number of processes. Returns ``{pid: {'name', 'outcome'}}``
+        with outcome one of terminated, killed, gone, denied or survived.
+        """
+        grace = self.termination_grace if grace is None else grace
+        outcomes = {}
+        signalled = []
+        for proc in procs:
+            outcomes[proc.pid] = {'name': None, 'outcome': 'gone'}
+            try:
+                outcomes[proc.pid]['name'] = proc.name()
+                proc.kill() if force else proc.terminate()
+                signalled.append(proc)
+            except psutil.NoSuchProcess:
+                continue
+            except psutil.AccessDenied:
+                outcomes[proc.pid]['outcome'] = 'denied'
+        alive = self._wait_all(signalled, grace, 'killed' if force else 'terminated', outcomes)
+        if alive and not force:
+            escalated = []
+            for proc in alive:
+                try:
+                    proc.kill()
+                    escalated.append(proc)
+                except psutil.NoSuchProcess:
+                    outcomes[proc.pid]['outcome'] = 'terminated'
+                except psutil.AccessDenied:
+                    outcomes[proc.pid]['outcome'] = 'denied'
+            alive = self._wait_all(escalated, self.kill_grace, 'killed', outcomes)
+        for proc in alive:
+            outcomes[proc.pid]['outcome'] = 'survived'
+        return outcomes
+
+    def terminate(self, pids=(), names=(), tree=False, grace=None, force=False):
+        """Resolve targets and terminate them as one batch; see ``terminate_processes``.
+
+        ``names`` must be exact process names or shell-style patterns; a
+        partial name matches nothing, see ``find_candidates``.
+        """
+        procs, missing = self.resolve_targets(pids, names, tree, exact=True)
+        outcomes = self.terminate_processes(procs, grace, force)
+        for pid in missing:
+            outcomes[pid] = {'name': None, 'outcome': 'gone'}
+        return outcomes
+
+    def describe_termination(self, outcomes, target=None):
+        """One short sentence per kind of outcome, for speaking"""
+        by_outcome = {}
+        for pid, result in sorted(outcomes.items()):
+            by_outcome.setdefault(result['outcome'], []).append((pid, result['name']))
+        stopped = by_outcome.get('terminated', []) + by_outcome.get('killed', [])
+        parts = []
+        if len(stopped) > 3:
+            parts.append(f"Stopped {len(stopped)} {target + ' ' if target else ''}processes")
+        elif stopped:
+            parts.append("Stopped " + ', '.join(f"{name or 'process'} ({pid})" for pid, name in stopped))
+        if by_outcome.get('gone'):
+            parts.append("No process found with PID " + ', '.join(str(pid) for pid, _ in by_outcome['gone']))
+        if by_outcome.get('denied'):
+            parts.append("Access denied for PID " + ', '.join(str(pid) for pid, _ in by_outcome['denied']))
+        if by_outcome.get('survived'):
+            parts.append("Still running: PID " + ', '.join(str(pid) for pid, _ in by_outcome['survived']))
+        return '. '.join(parts) or "Nothing to stop"
+        
+    def find_candidates(self, name):
+        """Distinct names of running processes a partial name could mean, by prefix or substring"""
+        return sorted({record.name for record in self.process_table.find(name)})
+
+    @staticmethod
+    def describe_candidates(target, names, limit=3):
+        """Which running processes a partial name could mean, for speaking"""
+        shown = names[:limit]
+        listed = shown[0] if len(shown) == 1 else f"{', '.join(shown[:-1])} or {shown[-1]}"
+        more = f" and {len(names) - limit} more" if len(names) > limit else ""
+        return f"No process is called {target}. Did you mean {listed}{more}? Say the full name to stop it"
+
+    def find_processes(self, term, regex=False, limit=None):
+        """Ranked SearchHits for processes whose name, command line, exe, cwd or user matches ``term``"""
+        if self.process_search is None:
+            self.process_search = get_process_search()
+        search = self.process_search
+        return search.search_regex(term, limit) if regex else search.search(term, limit)
+        
+    def list_processes(self):
+        processes = []
+        try:
+            for record in self.process_table.snapshot():
+                # Format memory and CPU usage to 2 decimal places
+                mem_usage = f"{record.memory_percent:.2f}%" if record.memory_percent else "N/A"
+                cpu_usage = f"{record.cpu_percent:.1f}%" if record.cpu_percent is not None else "N/A"
+                # Create a formatted string with process info
+                proc_info = f"{record.name} (PID: {record.pid}, User: {record.username}, CPU: {cpu_usage}, Memory: {mem_usage})\n{'─' * 80}"  # Add separator line
+                processes.append(proc_info)
+            
+            # Sort processes by name for better readability
+            processes.sort()
+            
+            # Add summary information with more visible separation
+            summary = [
+                "═" * 80,  # Top border
+                f"Total visible processes: {len(processes)}",
+                f"Access denied processes: {self.process_table.access_denied}",
+                f"Terminated since last refresh: {self.process_table.last_exited}",
+                "═" * 80,  # Bottom border
+                ""  # Empty line for spacing
+            ]
+            
+            return summary + processes
+        except Exception as e:
+            print(f"Error listing processes: {e}")
+            return ["Error: Could not retrieve process list"]
+
+    def find_applications(self, name):
+        """AppGroups for a spoken name: each matching application with all its helper processes"""
+        return self._tree().find(name)
+
+    def subtree_usage(self, pid):
+        """``(processes, cpu percent, memory percent)`` of a process and all its descendants, or None"""
+        return self._tree().subtree_usage(pid)
+
+    def list_applications(self):
+        """One line per application with its processes' CPU and memory added up, heaviest first"""
+        groups = self._tree().applications()
+        lines = [f"{'Application':<32}{'PID':>8}{'Procs':>7}{'CPU':>8}{'Memory':>9}", '─' * 64]
+        for group in groups:
+            lines.append(f"{group.name[:31]:<32}{group.root.pid:>8}{len(group.members):>7}"
+                         f"{group.cpu_percent:>7.1f}%{group.memory_percent:>8.2f}%")
+        lines.append(f"{len(groups)} applications, {sum(len(group.members) for group in groups)} processes")
+        return lines
+
+    def set_volume(self, level, speak=None):
+        """Set system volume (0-100)"""
+        speak = speak or self.speak
+        try:
+            with current_trace().stage('control'):
+                self.controls.set_volume(level)
+            speak(f"Volume set to {level} percent")
+            return True
+        except ControlError as e:
+            print(f"Volume control unavailable: {e}")
+            speak("Volume control is not available on this system")
+        except Exception as e:
+            print(f"Error setting volume: {e}")
+            speak("Failed to set volume")
+        return False
+
+    def get_system_stats(self, window=60):
+        """Get system statistics"""
+        self.update_system_info()
+        stats = []
+        stats.append(f"CPU usage: {self.system_info['cpu_percent']}%")
+        if self.system_info['per_cpu']:
+            stats.append("Per core: " + ', '.join(f"{p:.0f}%" for p in self.system_info['per_cpu']))
+        stats.append(f"Memory usage: {self.system_info['memory_percent']}%")
+        stats.append(f"Disk usage: {self.system_info['disk_usage']}%")
+        if self.system_info['battery'] is not None:
+            stats.append(f"Battery: {self.system_info['battery']}%")
+        if self.system_info['load'][0] is not None:
+            stats.append("Load average: " + ', '.join(f"{l:.2f}" for l in self.system_info['load']))
+        
+        # Recent history from the collector's ring buffer
+        summary = self.stats_collector.summary(window)
+        if summary['samples'] > 1:
+            stats.append(f"\nLast {window} seconds (min / avg / max):")
+            labels = [('cpu_percent', 'CPU', '%'), ('memory_percent', 'Memory', '%'), ('load_1m', 'Load', '')]
+            for field, label, unit in labels:
+                if field in summary:
+                    values = summary[field]
+                    stats.append(f"{label}: {values['min']:.1f}{unit} / {values['avg']:.1f}{unit} / {values['max']:.1f}{unit}")
+        return stats
+
+    def resource_history(self, metric, minutes=60, ago_minutes=0, limit=10):
+        """HistoryResults for the heaviest processes by ``metric`` ('cpu', 'memory' or 'io'), or None if not recorded"""
+        if self.history is None:
+            return None
+        return self.history.top(metric, window=minutes * 60, ago=ago_minutes * 60, limit=limit)
+
+    def focus_app(self, app_name, speak=None):
+        """Bring application to front"""
+        speak = speak or self.speak
+        try:
+            if platform.system() == 'Darwin':
+                app_name = self.mac_app_names.get(app_name.lower(), app_name)
+                run_subprocess(['osascript', '-e', f'tell application "{app_name}" to activate'])
+                speak(f"Focused {app_name}")
+                return True
+            if platform.system() == 'Linux':
+                focused = self._raise_linux_window(app_name)
+                if focused:
+                    speak(f"Focused {focused}")
+                    return True
+                speak(f"Could not focus {app_name}")
+                return False
+        except Exception as e:
+            speak(f"Could not focus {app_name}")
+            return False
+        speak("Focusing applications is not available on this system")
+        return False
+
+    def set_brightness(self, level, speak=None):
+        """Set screen brightness (0-100)"""
+        speak = speak or self.speak
+        try:
+            try:
+                with current_trace().stage('control'):
+                    self.controls.set_brightness(level)
+            except ControlError as e:
+                if platform.system() != 'Darwin':
+                    raise
+                # Displays the helper cannot drive, such as most external monitors, still follow the keys
+                print(f"Setting brightness directly failed ({e}), using the brightness keys")
+                self._set_brightness_with_keys(level, speak)
+                return True
+            speak(f"Brightness set to {level} percent")
+            return True
+        except ControlError as e:
+            print(f"Brightness control unavailable: {e}")
+            speak("Brightness control is not available on this system")
+        except Exception as e:
+            print(f"Error setting brightness: {e}")
+            speak("Failed to control brightness")
+        return False
+
+    def _set_brightness_with_keys(self, level, speak=None):
+        """macOS fallback: the menu bar slider, or brightness key presses from an estimate of the current level"""
+        speak = speak or self.speak
+        # Convert percentage to decimal (0-1)
+        brightness = max(0, min(100, level)) / 100.0
+        
+        # First try using brightness control script
+        script = '''
+        tell application "System Events"
+            tell process "SystemUIServer"
+                try
+                    set value of first slider of first menu bar item of menu bar 1 whose description contains "brightness" to %f
+                end try
+            end tell
+        end tell
+        ''' % brightness
+        
+        try:
+            run_subprocess(['osascript', '-e', script], check=True)
+            speak(f"Brightness set to {level} percent")
+            return
+        except subprocess.CalledProcessError:
+            # If the first method fails, try the alternative method
+            pass
+
+        # Alternative method: Use brightness keys
+        current_brightness = 0
+        try:
+            # Get current brightness using system_profiler
+            output = run_subprocess(['system_profiler', 'SPDisplaysDataType'],
+                                    stdout=subprocess.PIPE, check=True).stdout.decode()
+            for line in output.split('\n'):
+                if 'Brightness' in line:
+                    try:
+                        current_brightness = float(line.split(':')[1].strip().rstrip('%'))
+                    except (IndexError, ValueError):
+                        current_brightness = 50  # Default to middle if can't determine
+        except Exception:
+            current_brightness = 50  # Default to middle if can't determine
+
+        # Calculate how many steps to move
+        steps = abs(int((level - current_brightness) / 6.25))  # Each press changes ~6.25%
+        
+        if level > current_brightness:
+            # Increase brightness
+            for _ in range(steps):
+                run_subprocess(['osascript', '-e', 'tell application "System Events" to key code 144'])
+                cancellable_sleep(0.1)
+        else:
+            # Decrease brightness
+            for _ in range(steps):
+                run_subprocess(['osascript', '-e', 'tell application "System Events" to key code 145'])
+                cancellable_sleep(0.1)
+        
+        speak(f"Brightness adjusted to approximately {level} percent")
+
+    def adjust_brightness(self, direction, speak=None):
+        """Adjust brightness up or down"""
+        speak = speak or self.speak
+        try:
+            try:
+                with current_trace().stage('control'):
+                    # A quarter of the range, about as far as the four key presses this used to send
+                    step = 25 if direction == "up" else -25
+                    self.controls.set_brightness(max(0, min(100, self.controls.brightness() + step)))
+            except ControlError as e:
+                if platform.system() != 'Darwin':
+                    raise
+                print(f"Adjusting brightness directly failed ({e}), using the brightness keys")
+                key_code = 144 if direction == "up" else 145  # 144 for up, 145 for down
+                for _ in range(4):
+                    run_subprocess(['osascript', '-e', f'tell application "System Events" to key code {key_code}'])
+                    cancellable_sleep(0.1)  # Small delay between key presses
+            speak(f"Brightness {direction}")
+            return True
+        except ControlError as e:
+            print(f"Brightness control unavailable: {e}")
+            speak("Brightness control is not available on this system")
+        except Exception as e:
+            print(f"Error adjusting brightness: {e}")
+            speak(f"Failed to adjust brightness {direction}")
+        return False
+
+    def play_notification(self):
+        """Play a notification sound"""
+        try:
+            if platform.system() == 'Darwin':  # macOS
+                # Try different notification sounds in order of preference
+                sound_paths = [
+                    '/System/Library/Sounds/Tink.aiff',  # Short and crisp
+                    '/System/Library/Sounds/Pop.aiff',   # Alternative
+                    '/System/Library/Sounds/Glass.aiff'  # Fallback
+                ]
+                
+                for sound_path in sound_paths:
+                    if run_subprocess(['test', '-f', sound_path]).returncode == 0:
+                        run_subprocess(['afplay', sound_path])
+                        break
+                else:
+                    # If no sound files found, use system beep
+                    run_subprocess(['osascript', '-e', 'beep'])
+        except Exception as e:
+            print(f"Could not play notification sound: {e}")
+            # Fallback to system beep
+            run_subprocess(['tput', 'bel'])
+
+    def system_control(self, action, speak=None):
+        """Control system actions like sleep, shutdown, restart, etc."""
+        speak = speak or self.speak
+        try:
+            if platform.system() == 'Darwin':  # macOS
+                if action == "sleep":
+                    run_subprocess(['pmset', 'sleepnow'])
+                    speak("Putting computer to sleep")
+                elif action == "restart":
+                    speak("Restarting computer")
+                    run_subprocess(['osascript', '-e', 'tell app "System Events" to restart'])
+                elif action == "shutdown":
+                    speak("Shutting down computer")
+                    run_subprocess(['osascript', '-e', 'tell app "System Events" to shut down'])
+                elif action == "lock":
+                    run_subprocess(['pmset', 'displaysleepnow'])
+                    speak("Locking screen")
+                elif action == "night mode":
+                    script = '''
+                    tell application "System Events"
+                        tell appearance preferences
+                            set dark mode to not dark mode
+                        end tell
+                    end tell
+                    '''
+                    run_subprocess(['osascript', '-e', script])
+                    speak("Toggled night mode")
+                return True
+        except Exception as e:
+            print(f"Error in system control: {e}")
+            speak(f"Failed to {action} system")
+            return False
+        speak(f"{action.capitalize()} is not available on this system")
+        return False
+
+    def take_screenshot(self, type="full", speak=None):
+        """Take a screenshot"""
+        speak = speak or self.speak
+        try:
+            timestamp = time.strftime("%Y%m%d-%H%M%S")
+            desktop_path = os.path.expanduser("~/Desktop")
+            screenshot_path = os.path.join(desktop_path, f"screenshot_{timestamp}.png")
+            
+            if type == "full":
+                run_subprocess(['screencapture', screenshot_path])
+                speak("Took full screenshot")
+            elif type == "selection":
+                run_subprocess(['screencapture', '-i', screenshot_path])
+                speak("Took screenshot of selection")
+            elif type == "window":
+                run_subprocess(['screencapture', '-w', screenshot_path])
+                speak("Took screenshot of active window")
+            return True
+        except Exception as e:
+            print(f"Error taking screenshot: {e}")
+            speak("Failed to take screenshot")
+            return False
+
+    def open_website(self, site_name, speak=None):
+        """Open a website in the default browser"""
+        speak = speak or self.speak
+        try:
+            site_name = site_name.lower()
+            if site_name in self.common_websites:
+                url = self.common_websites[site_name]
+                run_subprocess(['open', url])
+                speak(f"Opening {site_name}")
+            else:
+                # Try to open as direct URL if it ends with .com, .org, etc.
+                if any(site_name.endswith(tld) for tld in ['.com', '.org', '.net', '.edu']):
+                    url = f"https://{site_name}"
+                    run_subprocess(['open', url])
+                    speak(f"Opening {site_name}")
+                else:
+                    speak(f"Website {site_name} not found in known websites")
+                    return False
+            return True
+        except Exception as e:
+            print(f"Error opening website: {e}")
+            speak(f"Failed to open {site_name}")
+            return False
+
+    def switch_to_app(self, app_name, speak=None):
+        """Switch to a running application"""
+        speak = speak or self.speak
+        try:
+            if platform.system() == 'Linux':
+                switched = self._raise_linux_window(app_name)
+                if not switched:
+                    raise RuntimeError(f"no window for {app_name}")
+                speak(f"Switched to {switched}")
+                return True
+            app_name = self.mac_app_names.get(app_name.lower(), app_name)
+            script = f'''
+            tell application "{app_name}"
+                activate
+            end tell
+            '''
+            run_subprocess(['osascript', '-e', script])
+            speak(f"Switched to {app_name}")
+            return True
+        except Exception as e:
+            print(f"Error switching app: {e}")
+            speak(f"Failed to switch to {app_name}")
+            return False
+
+    def monitor_process(self, pid, threshold, speak=None):
+        speak = speak or self.speak
+        try:
+            process = psutil.Process(pid)
+            cpu_percent = process.cpu_percent()
+            mem_percent = process.memory_percent()
+            if cpu_percent > threshold or mem_percent > threshold:
+                speak(
+                    f"Warning! Process {process.name()} is using "
+                    f"{cpu_percent:.1f}% CPU and {mem_percent:.1f}% memory"
+                )
+            return True
+        except Exception:
+            speak(f"Could not monitor PID {pid}")
+            return False
@@ -0,0 +1,171 @@
+"""Qt item model for the process list.
+
+``ProcessTableModel`` keeps one row per process record and applies the
+difference between snapshots as row removals, appends and a single
+``dataChanged`` range, so a ``QTableView`` only repaints what is visible
+instead of re-laying out one big text document on every refresh. Sorting
+happens in the model with one ``list.sort`` over raw values; the proxy only
+filters, and only re-evaluates rows that were added or when the filter text
+changes, so Qt never calls back into Python once per row per refresh.
+"""
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+
+SORT_ROLE = Qt.UserRole
+FILTER_ROLE = Qt.UserRole + 1
+
+COLUMNS = [
+    ('Name', lambda r: r.name, lambda r: r.name_lower),
+    ('PID', lambda r: str(r.pid), lambda r: r.pid),
+    ('User', lambda r: r.username or '', lambda r: r.username or ''),
+    ('CPU %', lambda r: f"{r.cpu_percent:.1f}" if r.cpu_percent is not None else "N/A",
+     lambda r: r.cpu_percent if r.cpu_percent is not None else -1.0),
+    ('Memory %', lambda r: f"{r.memory_percent:.2f}" if r.memory_percent is not None else "N/A",
+     lambda r: r.memory_percent if r.memory_percent is not None else -1.0),
+]
+
+
+def _row_values(record):
+    return (record.name, record.username, record.cpu_percent, record.memory_percent)
+
+
+class ProcessTableModel(QAbstractTableModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.records = []
+        self.values = []  # what each row showed at the last update, to detect changes
+        self.keys = []
+        self.rows = {}  # record key -> row
+        self.sort_column = None
+        self.sort_order = Qt.AscendingOrder
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.records)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.records[index.row()]
+        if role == Qt.DisplayRole:
+            return COLUMNS[index.column()][1](record)
+        if role == SORT_ROLE:
+            return COLUMNS[index.column()][2](record)
+        if role == FILTER_ROLE:
+            return f"{record.name}\t{record.pid}\t{record.username or ''}"
+        if role == Qt.TextAlignmentRole and index.column() > 0 and index.column() != 2:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def record_at(self, row):
+        return self.records[row]
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = column
+        self.sort_order = order
+        self._resort()
+
+    def _reorder(self, order):
+        """Permute rows to ``order`` as one layout change, carrying persistent indexes along"""
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        moved = [(self.keys[index.row()], index.column()) for index in persistent]
+        self.records = [self.records[row] for row in order]
+        self.values = [self.values[row] for row in order]
+        self.keys = [self.keys[row] for row in order]
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self.changePersistentIndexList(persistent, [self.index(self.rows[key], column) for key, column in moved])
+        self.layoutChanged.emit()
+
+    def _sorted_rows(self, rows):
+        if self.sort_column is None or self.sort_column < 0:
+            return rows
+        sort_key = COLUMNS[self.sort_column][2]
+        values = [sort_key(record) for record in self.records]
+        return sorted(rows, key=values.__getitem__, reverse=self.sort_order == Qt.DescendingOrder)
+
+    def _resort(self, gone=()):
+        """Sort the rows, moving ``gone`` rows to the bottom, in at most one layout change"""
+        if gone:
+            gone_rows = set(gone)
+            kept = [row for row in range(len(self.records)) if row not in gone_rows]
+        else:
+            kept = range(len(self.records))
+        order = self._sorted_rows(kept) + list(gone)
+        if order != list(range(len(order))):
+            self._reorder(order)
+
+    def apply_snapshot(self, records):
+        """Bring the model in line with a new list of process records.
+
+        Returns ``(added, removed, changed)`` row counts.
+        """
+        incoming = {record.key: record for record in records}
+        gone = sorted(self.rows[key] for key in self.rows.keys() - incoming.keys())
+
+        # In-place updates, reported as one changed range
+        first_changed = last_changed = None
+        for row, key in enumerate(self.keys):
+            current = incoming.get(key)
+            if current is None:
+                continue
+            values = (current.name, current.username, current.cpu_percent, current.memory_percent)
+            if values != self.values[row] or current is not self.records[row]:
+                self.records[row] = current
+                self.values[row] = values
+                if first_changed is None:
+                    first_changed = row
+                last_changed = row
+        if first_changed is not None:
+            self.dataChanged.emit(self.index(first_changed, 0), self.index(last_changed, len(COLUMNS) - 1))
+
+        # New processes are appended in one block
+        added = [record for key, record in incoming.items() if key not in self.rows]
+        if added:
+            start = len(self.records)
+            self.beginInsertRows(QModelIndex(), start, start + len(added) - 1)
+            for record in added:
+                self.rows[record.key] = len(self.records)
+                self.records.append(record)
+                self.values.append(_row_values(record))
+                self.keys.append(record.key)
+            self.endInsertRows()
+
+        # One re-sort that also sinks exited processes to the bottom, so they
+        # go in a single removal rather than one proxy remap per scattered row
+        self._resort(gone)
+        if gone:
+            kept_count = len(self.records) - len(gone)
+            self.beginRemoveRows(QModelIndex(), kept_count, len(self.records) - 1)
+            for key in self.keys[kept_count:]:
+                del self.rows[key]
+            del self.records[kept_count:]
+            del self.values[kept_count:]
+            del self.keys[kept_count:]
+            self.endRemoveRows()
+        return len(added), len(gone), 0 if first_changed is None else last_changed - first_changed + 1
+
+
+class ProcessFilterProxy(QSortFilterProxyModel):
+    """Filters on name, PID or user; sorting is passed through to the source model"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setDynamicSortFilter(False)
+        # Match one combined name/PID/user string per row; Qt skips the
+        # per-row callback entirely while the filter is empty
+        self.setFilterRole(FILTER_ROLE)
+        self.setFilterKeyColumn(0)
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+    def set_filter_text(self, text):
+        self.setFilterFixedString(text.strip())
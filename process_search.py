@@ -0,0 +1,337 @@
+"""Trigram-indexed process search over name, command line, executable, cwd and user.
+
+``ProcessSearch`` follows the shared ``ProcessTable``: it subscribes to the
+table's spawn/exit deltas, reads the command line, executable and working
+directory of each new process once, and keeps a trigram index over them, so
+a search never walks the process list. Identical documents (the hundred
+worker processes of one service) are stored once and point at all their
+processes.
+
+A substring query is answered by intersecting the posting sets of its
+trigrams and checking the few candidates that survive; a regular expression
+is pre-filtered the same way with the literal runs it cannot match without.
+Hits are ranked by the field they matched in and how well.
+"""
+import bisect
+import heapq
+import itertools
+import os
+import re
+import threading
+
+import psutil
+
+try:
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+FIELDS = ('name', 'exe', 'cmdline', 'cwd', 'user')
+# Where a match counts most; a hit in the process name beats one deep in a command line
+FIELD_WEIGHTS = {'name': 60, 'exe': 45, 'cmdline': 40, 'cwd': 20, 'user': 10}
+# Java classpaths run to tens of kilobytes; the script or jar is near the start
+MAX_CMDLINE = 4096
+_BOUNDARY = ' /=-_.:@'
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def procfs_details(pid, root='/proc'):
+    """``(cmdline, exe, cwd)`` straight from /proc; fields we may not read are empty"""
+    path = f"{root}/{pid}"
+    try:
+        with open(path + '/cmdline', 'rb') as f:
+            cmdline = f.read(MAX_CMDLINE).replace(b'\0', b' ').decode('utf-8', 'replace').strip()
+    except OSError:
+        cmdline = ''
+    details = [cmdline]
+    for link in ('exe', 'cwd'):
+        try:
+            details.append(os.readlink(f"{path}/{link}"))
+        except OSError:
+            details.append('')
+    return tuple(details)
+
+
+def psutil_details(pid):
+    try:
+        proc = psutil.Process(pid)
+    except psutil.Error:
+        return '', '', ''
+    details = []
+    for getter in (lambda: ' '.join(proc.cmdline())[:MAX_CMDLINE], proc.exe, proc.cwd):
+        try:
+            details.append(getter() or '')
+        except (psutil.Error, OSError):
+            details.append('')
+    return tuple(details)
+
+
+def default_details():
+    from procfs import procfs_available
+    return procfs_details if procfs_available() else psutil_details
+
+
+def required_literals(pattern):
+    """Literal runs every match of ``pattern`` must contain, lowercased.
+
+    Only concatenations are followed: alternatives, optional parts and
+    character classes end a run, so the result is always safe to pre-filter
+    with (possibly empty, meaning "check everything").
+    """
+    runs = []
+
+    def walk(items):
+        run = []
+        for op, arg in items:
+            if op is sre_parse.LITERAL:
+                run.append(chr(arg))
+                continue
+            if run:
+                runs.append(''.join(run))
+                run = []
+            if op is sre_parse.SUBPATTERN:
+                walk(arg[-1])
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and arg[0] >= 1:
+                walk(arg[2])
+        if run:
+            runs.append(''.join(run))
+
+    walk(sre_parse.parse(pattern))
+    return [run.lower() for run in runs]
+
+
+class SearchHit:
+    __slots__ = ('record', 'score', 'field', 'text')
+
+    def __init__(self, record, score, field, text):
+        self.record = record
+        self.score = score
+        self.field = field
+        self.text = text
+
+    def as_dict(self):
+        return dict(self.record.as_dict(), score=self.score, field=self.field, matched=self.text)
+
+
+class SearchResults(list):
+    """Hits, best first, possibly cut to a limit; ``total`` counts every matching process"""
+
+    def __init__(self, hits=(), total=0):
+        super().__init__(hits)
+        self.total = total
+
+
+class _Document:
+    """The searchable text shared by every process with the same name, command line, exe, cwd and user"""
+    __slots__ = ('id', 'fields', 'text', 'starts', 'keys')
+
+    def __init__(self, doc_id, fields):
+        self.id = doc_id
+        self.fields = fields
+        # One lowercase string, fields separated by newlines, which no query contains
+        self.text = '\n'.join(fields).lower()
+        self.starts = []
+        start = 0
+        for field in fields:
+            self.starts.append(start)
+            start += len(field) + 1
+        self.keys = set()
+
+    def field_text(self, i):
+        end = self.starts[i + 1] - 1 if i + 1 < len(self.starts) else len(self.text)
+        return self.text[self.starts[i]:end]
+
+
+class ProcessSearch:
+    """Search index kept in step with a ``ProcessTable``.
+
+    ``details(pid)`` returns ``(cmdline, exe, cwd)``; it is called once per
+    new process and can be replaced by a synthetic source for benchmarks.
+    """
+
+    def __init__(self, table, details=None):
+        self.table = table
+        self.details = details or default_details()
+        self.lock = threading.Lock()
+        self.documents = {}  # field tuple -> _Document
+        self.by_id = {}
+        self.postings = {}  # trigram -> set of document ids
+        self.doc_of = {}  # record key -> _Document
+        self._next_id = 0
+        table.subscribe(self.apply)
+        self.apply(table.snapshot(), [])
+
+    # Maintenance
+
+    def apply(self, spawned, exited):
+        """ProcessTable listener: index new (or exec'd) processes, drop exited ones"""
+        # Read /proc before taking the lock so searches are not held up by it
+        added = [(record, self._fields(record)) for record in spawned]
+        with self.lock:
+            for record in exited:
+                self._remove(record.key)
+            for record, fields in added:
+                self._remove(record.key)
+                if record.key in self.table.records:  # not gone again while we were reading it
+                    self._add(record.key, fields)
+
+    def _fields(self, record):
+        cmdline, exe, cwd = self.details(record.pid)
+        return record.name or '', exe, cmdline, cwd, record.username or ''
+
+    def _add(self, key, fields):
+        doc = self.documents.get(fields)
+        if doc is None:
+            doc = _Document(self._next_id, fields)
+            self._next_id += 1
+            self.documents[fields] = doc
+            self.by_id[doc.id] = doc
+            # Trigrams spanning two fields contain the newline and match no query
+            for trigram in trigrams(doc.text):
+                self.postings.setdefault(trigram, set()).add(doc.id)
+        doc.keys.add(key)
+        self.doc_of[key] = doc
+
+    def _remove(self, key):
+        doc = self.doc_of.pop(key, None)
+        if doc is None:
+            return
+        doc.keys.discard(key)
+        if doc.keys:
+            return
+        del self.documents[doc.fields]
+        del self.by_id[doc.id]
+        for trigram in trigrams(doc.text):
+            ids = self.postings.get(trigram)
+            if ids is not None:
+                ids.discard(doc.id)
+                if not ids:
+                    del self.postings[trigram]
+
+    # Queries
+
+    def _candidates(self, literals):
+        """Documents containing every trigram of every literal; all of them if there are none to go on"""
+        grams = set()
+        for literal in literals:
+            grams |= trigrams(literal)
+        if not grams:
+            return list(self.by_id.values())
+        sets = sorted((self.postings.get(gram, ()) for gram in grams), key=len)
+        if not sets[0]:
+            return []
+        ids = set(sets[0])
+        for other in sets[1:]:
+            ids &= other
+            if not ids:
+                return []
+        return [self.by_id[doc_id] for doc_id in ids]
+
+    @staticmethod
+    def _field_score(doc, i, start, length):
+        """Score for a match at ``start`` in ``doc.text`` that lies in field ``i``"""
+        field_start = doc.starts[i]
+        field_end = doc.starts[i + 1] - 1 if i + 1 < len(doc.starts) else len(doc.text)
+        score = FIELD_WEIGHTS[FIELDS[i]]
+        if start == field_start and start + length == field_end:
+            score += 40
+        elif start == field_start or doc.text[start - 1] in _BOUNDARY:
+            score += 15  # starts a word, path component or argument
+        return score
+
+    def _score_substring(self, doc, query):
+        """Best ``(score, field index)`` for a plain query, or None.
+
+        Fields are in descending weight order, so after the first
+        occurrence in each field only later fields that could still score
+        higher are looked at.
+        """
+        text = doc.text
+        position = text.find(query)
+        if position < 0:
+            return None
+        best = None
+        last = len(FIELDS) - 1
+        while position >= 0:
+            i = bisect.bisect_right(doc.starts, position) - 1
+            score = self._field_score(doc, i, position, len(query))
+            if best is None or score > best[0]:
+                best = (score, i)
+            if i == last or FIELD_WEIGHTS[FIELDS[i + 1]] + 40 <= best[0]:
+                break
+            position = text.find(query, doc.starts[i + 1])
+        return best
+
+    def _score_regex(self, doc, compiled):
+        # Field by field, so that a \s or [^x] in the pattern cannot match across two fields
+        best = None
+        for i in range(len(FIELDS)):
+            match = compiled.search(doc.field_text(i))
+            if match is None:
+                continue
+            score = self._field_score(doc, i, doc.starts[i] + match.start(), match.end() - match.start())
+            if best is None or score > best[0]:
+                best = (score, i)
+        return best
+
+    def _search(self, literals, score, limit):
+        records = self.table.records
+        hits = []
+        with self.lock:
+            scored = []
+            total = 0
+            for doc in self._candidates(literals):
+                best = score(doc)
+                if best is not None:
+                    scored.append((best[0], best[1], doc))
+                    total += len(doc.keys)
+            scored.sort(key=lambda item: -item[0])
+            # Expand one score level at a time and stop once the limit is reached
+            for score_value, group in itertools.groupby(scored, key=lambda item: item[0]):
+                level = [(record, i, doc) for _, i, doc in group
+                         for record in map(records.get, doc.keys) if record is not None]
+                wanted = limit - len(hits) if limit else len(level)
+                # Among equal matches the bigger process is more likely the service being looked for
+                level = heapq.nsmallest(wanted, level, key=lambda item: (-(item[0].memory_percent or 0),
+                                                                         item[0].pid))
+                hits.extend(SearchHit(record, score_value, FIELDS[i], doc.fields[i]) for record, i, doc in level)
+                if limit and len(hits) >= limit:
+                    break
+        return SearchResults(hits, total)
+
+    def search(self, query, limit=None):
+        """Processes whose name, command line, executable, cwd or user contains ``query``, best first"""
+        self.table.ensure_fresh()
+        query = query.lower().strip()
+        if not query:
+            return SearchResults()
+        return self._search([query], lambda doc: self._score_substring(doc, query), limit)
+
+    def search_regex(self, pattern, limit=None):
+        """Like ``search`` with a case-insensitive regular expression; raises re.error if it is invalid"""
+        self.table.ensure_fresh()
+        compiled = re.compile(pattern, re.IGNORECASE)
+        return self._search(required_literals(pattern), lambda doc: self._score_regex(doc, compiled), limit)
+
+    def stats(self):
+        with self.lock:
+            return {'processes': len(self.doc_of), 'documents': len(self.documents),
+                    'trigrams': len(self.postings),
+                    'postings': sum(len(ids) for ids in self.postings.values())}
+
+
+_process_search = None
+_process_search_lock = threading.Lock()
+
+
+def get_process_search():
+    """The index over the shared process table, built on first use"""
+    global _process_search
+    with _process_search_lock:
+        if _process_search is None:
+            from process_table import get_process_table
+            _process_search = ProcessSearch(get_process_table())
+        return _process_search
@@ -0,0 +1,254 @@
+"""Shared, incrementally refreshed process table.
+
+One ``ProcessTable`` walks the process list on an interval and applies the
+difference to a dict of compact records keyed by ``(pid, create_time)``, so
+a reused PID is never mistaken for the process that used to own it. A
+lowercase name index answers exact, prefix and substring lookups without
+another ``psutil.process_iter`` walk per voice command.
+"""
+import bisect
+import fnmatch
+import threading
+import time
+
+import psutil
+
+ATTRS = ['pid', 'ppid', 'name', 'username', 'create_time', 'cpu_percent', 'memory_percent']
+
+
+class ProcessRecord:
+    __slots__ = ('pid', 'create_time', 'ppid', 'name', 'name_lower', 'username', 'cpu_percent', 'memory_percent')
+
+    def __init__(self, info):
+        self.pid = info['pid']
+        self.create_time = info.get('create_time')
+        self.name = None
+        self.update(info)
+
+    @property
+    def key(self):
+        return (self.pid, self.create_time)
+
+    def update(self, info):
+        self.ppid = info.get('ppid')
+        self.name = info.get('name') or ''
+        self.name_lower = self.name.lower()
+        self.username = info.get('username')
+        self.cpu_percent = info.get('cpu_percent')
+        self.memory_percent = info.get('memory_percent')
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__ if slot != 'name_lower'}
+
+    def process(self):
+        """psutil.Process for this record, or NoSuchProcess if the PID now belongs to someone else"""
+        proc = psutil.Process(self.pid)
+        if self.create_time is not None and abs(proc.create_time() - self.create_time) > 0.01:
+            raise psutil.NoSuchProcess(self.pid, self.name)
+        return proc
+
+
+def psutil_provider():
+    """Default source of process info dicts"""
+    for proc in psutil.process_iter(ATTRS, ad_value=None):
+        yield proc.info
+
+
+class ProcessTable:
+    """Process snapshot cache with delta updates and a name index.
+
+    ``provider`` returns an iterable of info dicts with the keys in ATTRS; it
+    can be replaced by a synthetic source for benchmarks. Listeners registered
+    with ``subscribe`` are called with ``(spawned, exited)`` record lists after
+    every refresh; ``spawned`` includes processes that exec'd a new program.
+    """
+
+    def __init__(self, provider=psutil_provider, interval=2.0):
+        self.provider = provider
+        self.interval = interval
+        self.records = {}
+        self.by_pid = {}
+        self.names = {}  # lowercase name -> set of record keys
+        self._sorted_names = None
+        self.refreshed_at = None
+        self.generation = 0
+        self.access_denied = 0
+        self.last_exited = 0
+        self.lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._listeners = []
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def _index(self, record):
+        if record.name_lower not in self.names:
+            self._sorted_names = None
+        self.names.setdefault(record.name_lower, set()).add(record.key)
+
+    def _unindex(self, record):
+        keys = self.names.get(record.name_lower)
+        if keys is not None:
+            keys.discard(record.key)
+            if not keys:
+                del self.names[record.name_lower]
+                self._sorted_names = None
+
+    def refresh(self):
+        """Walk the process list once and apply the delta to the table"""
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self):
+        infos = list(self.provider())
+        spawned = []
+        with self.lock:
+            seen = set()
+            access_denied = 0
+            for info in infos:
+                key = (info['pid'], info.get('create_time'))
+                seen.add(key)
+                if info.get('username') is None:
+                    access_denied += 1
+                record = self.records.get(key)
+                if record is None:
+                    record = ProcessRecord(info)
+                    self.records[key] = record
+                    self._index(record)
+                    spawned.append(record)
+                elif (info.get('name') or '').lower() != record.name_lower:
+                    # The process exec'd into something else; listeners see it as a new program
+                    self._unindex(record)
+                    record.update(info)
+                    self._index(record)
+                    spawned.append(record)
+                else:
+                    record.update(info)
+                self.by_pid[record.pid] = record
+            exited = [record for key, record in self.records.items() if key not in seen]
+            for record in exited:
+                del self.records[record.key]
+                self._unindex(record)
+                if self.by_pid.get(record.pid) is record:
+                    del self.by_pid[record.pid]
+            self.access_denied = access_denied
+            self.last_exited = len(exited)
+            self.refreshed_at = time.monotonic()
+            self.generation += 1
+        for callback in self._listeners:
+            try:
+                callback(spawned, exited)
+            except Exception as e:
+                print(f"Process table listener failed: {e}")
+        return spawned, exited
+
+    def ensure_fresh(self, max_age=None):
+        max_age = self.interval if max_age is None else max_age
+        if self.refreshed_at is None or time.monotonic() - self.refreshed_at > max_age:
+            with self._refresh_lock:
+                # Another thread may have refreshed while we waited for the lock
+                if self.refreshed_at is None or time.monotonic() - self.refreshed_at > max_age:
+                    self._refresh()
+
+    def snapshot(self, max_age=None):
+        """All records, refreshing first if the table is older than ``max_age`` seconds"""
+        self.ensure_fresh(max_age)
+        with self.lock:
+            return list(self.records.values())
+
+    def get(self, pid):
+        self.ensure_fresh()
+        with self.lock:
+            return self.by_pid.get(pid)
+
+    def _records_for(self, names):
+        records = []
+        for name in names:
+            records.extend(self.records[key] for key in self.names.get(name, ()))
+        return records
+
+    def find_exact(self, name):
+        self.ensure_fresh()
+        with self.lock:
+            return self._records_for([name.lower()])
+
+    def find_prefix(self, prefix):
+        self.ensure_fresh()
+        prefix = prefix.lower()
+        with self.lock:
+            if self._sorted_names is None:
+                self._sorted_names = sorted(self.names)
+            start = bisect.bisect_left(self._sorted_names, prefix)
+            end = bisect.bisect_left(self._sorted_names, prefix + '\uffff')
+            return self._records_for(self._sorted_names[start:end])
+
+    def search(self, term):
+        """Substring match over distinct names, which are far fewer than processes"""
+        self.ensure_fresh()
+        term = term.lower()
+        with self.lock:
+            return self._records_for([name for name in self.names if term in name])
+
+    def find_pattern(self, pattern):
+        """Shell-style wildcard match (``chrom*``, ``*helper*``) over distinct names"""
+        self.ensure_fresh()
+        pattern = pattern.lower()
+        with self.lock:
+            return self._records_for(fnmatch.filter(self.names, pattern))
+
+    def find(self, name):
+        """Best matches for a spoken name: exact, then prefix, then substring"""
+        return self.find_exact(name) or self.find_prefix(name) or self.search(name)
+
+    def start(self):
+        """Refresh in a background thread every ``interval`` seconds"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='process-table', daemon=True)
+            self._thread.start()
+        return self
+
+    def request_refresh(self):
+        """Refresh soon without blocking: on the background thread, or a one-off worker if there is none.
+
+        Callers that must not stall (the GUI thread) use this and watch
+        ``generation`` instead of calling ``refresh`` themselves.
+        """
+        if self._thread is not None:
+            self._wake.set()
+        else:
+            threading.Thread(target=self.refresh, name='process-table-refresh', daemon=True).start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Cleared first, so a request made during this refresh brings on another one
+            self._wake.clear()
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing process table: {e}")
+            self._wake.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_process_table = None
+_process_table_lock = threading.Lock()
+
+
+def get_process_table():
+    """The table shared by every ProcessManager, refreshed in the background"""
+    global _process_table
+    with _process_table_lock:
+        if _process_table is None:
+            from procfs import default_provider
+            _process_table = ProcessTable(provider=default_provider()).start()
+        return _process_table
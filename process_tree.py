@@ -0,0 +1,343 @@
+"""Process tree with per-application and per-subtree CPU and memory rollups.
+
+``ProcessTree`` follows the shared ``ProcessTable``: a parent map and a
+children index keyed by PID are built in one pass over the table and then
+kept up to date from its spawn/exit deltas, so no process is ever asked for
+its parents or children. When a process exits, its children are moved to
+whatever parent the table now reports for them (init or a subreaper).
+
+An application is a process started by a launcher (init, a service manager,
+a shell, the desktop session or this assistant) together with every
+descendant that was not itself started by a launcher: a browser and all its
+helpers, an editor and its language servers. Applications are worked out
+in one pass over the tree on first use after each refresh; an application's
+totals when it is asked for, and subtree totals in one more pass.
+"""
+import itertools
+import os
+import threading
+
+# Processes whose children are applications in their own right, not helpers of the launcher
+LAUNCHERS = frozenset({
+    # init and service managers
+    'systemd', 'init', 'launchd', 'kthreadd', 'runit', 'runsv', 's6-svscan', 'supervisord', 'containerd-shim',
+    'containerd-shim-runc-v2', 'smss.exe', 'wininit.exe', 'services.exe', 'svchost.exe',
+    # sessions and desktops
+    'login', 'sshd', 'gdm-session-worker', 'gnome-session-binary', 'gnome-shell', 'plasmashell', 'kwin_x11',
+    'kwin_wayland', 'startplasma-x11', 'startplasma-wayland', 'xfce4-session', 'lxsession', 'loginwindow',
+    'explorer.exe', 'dbus-daemon', 'dbus-broker',
+    # shells and multiplexers
+    'sh', 'bash', 'zsh', 'fish', 'dash', 'ksh', 'tcsh', 'nu', 'pwsh', 'powershell.exe', 'cmd.exe', 'tmux',
+    'tmux: server', 'screen', 'sudo', 'su', 'doas', 'nohup',
+})
+
+
+class AppGroup:
+    """An application (or part of one) and its processes, with their CPU and memory added up"""
+    __slots__ = ('root', 'members', 'cpu_percent', 'memory_percent')
+
+    def __init__(self, root, members):
+        self.root = root
+        self.members = members
+        self.cpu_percent = sum(record.cpu_percent or 0.0 for record in members)
+        self.memory_percent = sum(record.memory_percent or 0.0 for record in members)
+
+    @property
+    def name(self):
+        return self.root.name
+
+    def as_dict(self):
+        return {'name': self.root.name, 'pid': self.root.pid, 'processes': len(self.members),
+                'cpu_percent': self.cpu_percent, 'memory_percent': self.memory_percent,
+                'pids': [record.pid for record in self.members]}
+
+
+class _TreeView:
+    """One consistent pass over the tree: the application of every process.
+
+    Processes are numbered breadth first, so a parent always comes before its
+    children; subtree totals are added up in reverse order the first time
+    one is asked for.
+    """
+    __slots__ = ('nodes', 'order', 'position', 'via', 'app', 'children', 'groups', '_members', '_totals')
+
+    def __init__(self, nodes, parent_of, children, is_launcher):
+        order = [pid for pid, ppid in parent_of.items() if ppid == pid or ppid not in nodes]
+        position = dict(zip(order, range(len(order))))
+        via = [-1] * len(order)
+        reached = {}  # pid -> children in the tree, which leaves out PID cycles
+        i = 0
+        while True:
+            while i < len(order):
+                kids = children.get(order[i])
+                if kids:
+                    kids = [child for child in kids if child not in position]
+                    if kids:
+                        reached[order[i]] = kids
+                        position.update(zip(kids, range(len(order), len(order) + len(kids))))
+                        order.extend(kids)
+                        via.extend([i] * len(kids))
+                i += 1
+            if len(order) >= len(nodes):
+                break
+            # What is left sits on a PID cycle (a parent PID reused by a descendant); start it as a root
+            pid = next(pid for pid in nodes if pid not in position)
+            position[pid] = len(order)
+            order.append(pid)
+            via.append(-1)
+
+        # Only processes with children can be launchers that matter
+        launcher = dict.fromkeys(range(len(order)), False)
+        launcher.update((position[pid], is_launcher(nodes[pid])) for pid in reached)
+        app = list(range(len(order)))
+        for i, parent in enumerate(via):
+            if parent >= 0 and not launcher[parent]:
+                app[i] = app[parent]
+        self.nodes = nodes
+        self.order = order
+        self.position = position
+        self.via = via
+        self.app = app
+        self.children = reached
+        self.groups = {}  # built per application on request
+        self._members = None
+        self._totals = None
+
+    def app_of(self, pid):
+        i = self.position.get(pid)
+        return None if i is None else self.order[self.app[i]]
+
+    def parent(self, pid):
+        i = self.via[self.position[pid]]
+        return None if i < 0 else self.order[i]
+
+    def all_groups(self):
+        """Every application, sorting all processes into them in one pass"""
+        if self._members is None:
+            members = {}
+            nodes = self.nodes
+            for pid, app in zip(self.order, self.app):
+                members.setdefault(app, []).append(nodes[pid])
+            self._members = members
+        for app, members in self._members.items():
+            root = self.order[app]
+            if root not in self.groups:
+                self.groups[root] = AppGroup(self.nodes[root], members)
+        return list(self.groups.values())
+
+    def subtree(self, pid):
+        """PIDs of ``pid`` and all its descendants, breadth first"""
+        found = [pid]
+        for parent in found:
+            found.extend(self.children.get(parent, ()))
+        return found
+
+    def group(self, root):
+        group = self.groups.get(root)
+        if group is None:
+            index = self.position[root]
+            members = [self.nodes[pid] for pid in self.subtree(root) if self.app[self.position[pid]] == index]
+            group = self.groups[root] = AppGroup(self.nodes[root], members)
+        return group
+
+    def totals(self, pid):
+        """``(processes, cpu percent, memory percent)`` of ``pid`` and its descendants"""
+        if self._totals is None:
+            records = [self.nodes[pid] for pid in self.order]
+            count = [1] * len(records)
+            cpu = [record.cpu_percent or 0.0 for record in records]
+            memory = [record.memory_percent or 0.0 for record in records]
+            via = self.via
+            for i in range(len(records) - 1, -1, -1):  # children before their parents
+                parent = via[i]
+                if parent >= 0:
+                    count[parent] += count[i]
+                    cpu[parent] += cpu[i]
+                    memory[parent] += memory[i]
+            self._totals = count, cpu, memory
+        i = self.position[pid]
+        count, cpu, memory = self._totals
+        return count[i], cpu[i], memory[i]
+
+
+class ProcessTree:
+    """Parent/child index kept in step with a ``ProcessTable``.
+
+    ``launchers`` names the processes whose children count as separate
+    applications; this assistant's own process is always one of them.
+    """
+
+    def __init__(self, table, launchers=LAUNCHERS):
+        self.table = table
+        self.launchers = launchers
+        self.lock = threading.Lock()
+        self.nodes = {}  # pid -> ProcessRecord
+        self.parent_of = {}  # pid -> ppid as indexed
+        self.children = {}  # ppid -> set of child pids, whether or not the parent is known
+        self._orphans = set()  # children of exited processes, until the table shows their new parent
+        self.version = 0
+        self._view = None
+        self._view_version = None
+        table.subscribe(self.apply)
+        self.rebuild(table.snapshot())
+
+    # Maintenance
+
+    def rebuild(self, records):
+        """Index a full snapshot in one pass"""
+        with self.lock:
+            self.nodes = {record.pid: record for record in records}
+            self.parent_of = {}
+            self.children = {}
+            self._orphans = set()
+            for record in records:
+                self._link(record)
+            self.version += 1
+
+    def _link(self, record):
+        ppid = record.ppid if record.ppid is not None else record.pid
+        self.parent_of[record.pid] = ppid
+        self.children.setdefault(ppid, set()).add(record.pid)
+
+    def _unlink(self, pid):
+        ppid = self.parent_of.pop(pid, None)
+        siblings = self.children.get(ppid)
+        if siblings is not None:
+            siblings.discard(pid)
+            if not siblings:
+                del self.children[ppid]
+
+    def apply(self, spawned, exited):
+        """ProcessTable listener: add new processes, drop exited ones and re-parent their orphans"""
+        with self.lock:
+            orphans = self._orphans
+            for record in exited:
+                if self.nodes.get(record.pid) is record:
+                    del self.nodes[record.pid]
+                    self._unlink(record.pid)
+                    orphans.update(self.children.get(record.pid, ()))
+            for record in spawned:
+                self._unlink(record.pid)  # an exec'd process keeps its place; a reused PID gets a new one
+                self.nodes[record.pid] = record
+                self._link(record)
+            for pid in list(orphans):
+                record = self.nodes.get(pid)
+                if record is None:
+                    orphans.discard(pid)
+                    continue
+                # The table has already updated the record with its new parent, unless the
+                # walk read the child before the kernel re-parented it; then try again next time
+                if self.parent_of.get(pid) != record.ppid:
+                    self._unlink(pid)
+                    self._link(record)
+                if record.ppid in self.nodes:
+                    orphans.discard(pid)
+            self.version += 1
+
+    def is_launcher(self, record):
+        return record.pid in (0, 1) or record.pid == os.getpid() or record.name_lower in self.launchers
+
+    def _current_view(self):
+        """The ``_TreeView`` for the current version; called with the lock held"""
+        if self._view_version != self.version:
+            self._view = _TreeView(self.nodes, self.parent_of, self.children, self.is_launcher)
+            self._view_version = self.version
+        return self._view
+
+    def view(self):
+        """The current ``_TreeView``, recomputed once per table refresh"""
+        self.table.ensure_fresh()
+        with self.lock:
+            return self._current_view()
+
+    # Queries
+
+    def applications(self):
+        """Every application, heaviest memory user first"""
+        self.table.ensure_fresh()
+        with self.lock:
+            view = self._current_view()
+            groups = view.all_groups()
+        groups.sort(key=lambda group: (-group.memory_percent, group.root.pid))
+        return groups
+
+    def app_of(self, pid):
+        """The AppGroup ``pid`` belongs to, or None if it is not in the table"""
+        self.table.ensure_fresh()
+        with self.lock:
+            view = self._current_view()
+            root = view.app_of(pid)
+            return None if root is None else view.group(root)
+
+    def subtree(self, pid):
+        """Records of ``pid`` and every descendant, whatever application they belong to"""
+        self.table.ensure_fresh()
+        with self.lock:
+            view = self._current_view()
+            if pid not in view.position:
+                return []
+            return [self.nodes[child] for child in view.subtree(pid)]
+
+    def subtree_usage(self, pid):
+        """``(processes, cpu percent, memory percent)`` of ``pid`` and its descendants, or None"""
+        self.table.ensure_fresh()
+        with self.lock:
+            view = self._current_view()
+            return view.totals(pid) if pid in view.position else None
+
+    def groups_for(self, records):
+        """The applications behind ``records``, e.g. every process that matched a spoken name.
+
+        A matched application root brings its whole application. A helper
+        that matched on its own brings its own descendants in the same
+        application, but not its parent or the rest of the application.
+        """
+        self.table.ensure_fresh()
+        with self.lock:
+            view = self._current_view()
+            matched = {record.pid for record in records if self.nodes.get(record.pid) is record}
+            tops = set()
+            for pid in matched:
+                top = pid
+                root = view.app_of(pid)
+                ancestor = pid
+                while ancestor != root:
+                    ancestor = view.parent(ancestor)
+                    if ancestor in matched:
+                        top = ancestor
+                tops.add(top)
+            groups = []
+            helpers = {}  # (application, name) -> [first matched helper, members]
+            for top in sorted(tops):
+                root = view.app_of(top)
+                if top == root:
+                    groups.append(view.group(root))
+                    continue
+                # Sibling helpers of one name (a browser's renderers) are reported as one group
+                entry = helpers.setdefault((root, self.nodes[top].name_lower), [self.nodes[top], []])
+                entry[1].extend(self.nodes[pid] for pid in view.subtree(top) if view.app_of(pid) == root)
+            groups.extend(AppGroup(first, members) for first, members in helpers.values())
+        groups.sort(key=lambda group: (-group.memory_percent, group.root.pid))
+        return groups
+
+    def find(self, name):
+        """Applications for a spoken name or shell-style pattern: exact, then prefix, then substring"""
+        if any(c in name for c in '*?['):
+            records = self.table.find_pattern(name)
+        else:
+            records = self.table.find(name)
+        return self.groups_for(records)
+
+
+_process_tree = None
+_process_tree_lock = threading.Lock()
+
+
+def get_process_tree():
+    """The tree over the shared process table, built on first use"""
+    global _process_tree
+    with _process_tree_lock:
+        if _process_tree is None:
+            from process_table import get_process_table
+            _process_tree = ProcessTree(get_process_table())
+        return _process_tree
@@ -0,0 +1,208 @@
+"""Linux /proc fast path for process enumeration.
+
+``ProcfsCollector`` walks ``/proc`` once with ``os.scandir`` and reads each
+process's ``stat``, ``statm`` and ``status`` files directly into a columnar
+``ProcSnapshot``, instead of building a ``psutil.Process`` per PID and paying
+a passwd lookup for every one. Usernames are cached per uid and CPU percent is
+computed from the tick delta since the previous walk. The collector is a
+drop-in ``ProcessTable`` provider; ``default_provider`` falls back to psutil
+anywhere else.
+"""
+import os
+import sys
+import time
+from array import array
+
+try:
+    import pwd
+except ImportError:  # not on Windows
+    pwd = None
+
+
+class ProcSnapshot:
+    """One walk of /proc, stored column-wise"""
+
+    def __init__(self):
+        self.timestamp = time.monotonic()
+        self.pid = array('i')
+        self.ppid = array('i')
+        self.uid = array('i')
+        self.utime = array('d')  # seconds
+        self.stime = array('d')
+        self.create_time = array('d')  # epoch seconds, same value psutil reports
+        self.rss = array('q')  # bytes
+        self.vms = array('q')
+        self.cpu_percent = array('d')
+        self.memory_percent = array('d')
+        self.read_bytes = array('q')  # cumulative storage I/O; -1 when not collected or not readable
+        self.write_bytes = array('q')
+        self.name = []
+        self.username = []
+
+    def __len__(self):
+        return len(self.pid)
+
+    def infos(self):
+        """Row-wise dicts with the keys ProcessTable expects"""
+        for i in range(len(self.pid)):
+            yield {'pid': self.pid[i], 'ppid': self.ppid[i], 'name': self.name[i], 'username': self.username[i],
+                   'create_time': self.create_time[i], 'cpu_percent': self.cpu_percent[i],
+                   'memory_percent': self.memory_percent[i]}
+
+
+class ProcfsCollector:
+    """Reads process information straight from a procfs tree rooted at ``root``.
+
+    With ``io=True`` each walk also reads ``/proc/<pid>/io``; the shared
+    process table does not need it and leaves it off.
+    """
+
+    def __init__(self, root='/proc', io=False):
+        self.root = root
+        self.io = io
+        self.clock_ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+        self.page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+        self.boot_time = self._read_boot_time()
+        self.total_memory = self._read_total_memory()
+        self.usernames = {}  # uid -> name
+        self._previous = {}  # (pid, starttime ticks) -> utime + stime ticks
+        self._previous_at = None
+
+    def _read_boot_time(self):
+        with open(os.path.join(self.root, 'stat'), 'rb') as f:
+            for line in f:
+                if line.startswith(b'btime'):
+                    return float(line.split()[1])
+        raise RuntimeError(f"no btime in {self.root}/stat")
+
+    def _read_total_memory(self):
+        with open(os.path.join(self.root, 'meminfo'), 'rb') as f:
+            for line in f:
+                if line.startswith(b'MemTotal:'):
+                    return int(line.split()[1]) * 1024
+        raise RuntimeError(f"no MemTotal in {self.root}/meminfo")
+
+    def username(self, uid):
+        name = self.usernames.get(uid)
+        if name is None:
+            try:
+                name = pwd.getpwuid(uid).pw_name if pwd else str(uid)
+            except KeyError:
+                name = str(uid)
+            self.usernames[uid] = name
+        return name
+
+    def _full_name(self, path, name):
+        """The kernel truncates comm to 15 characters; recover the rest from cmdline like psutil does"""
+        try:
+            with open(path + '/cmdline', 'rb') as f:
+                argv0 = f.read().split(b'\0', 1)[0]
+        except OSError:
+            return name
+        full = os.path.basename(argv0.decode('utf-8', 'replace'))
+        return full if full.startswith(name) else name
+
+    @staticmethod
+    def _read_io(path):
+        """``(read_bytes, write_bytes)``; other users' processes need ptrace access, so often (-1, -1)"""
+        read_bytes = write_bytes = -1
+        try:
+            with open(path + '/io', 'rb') as f:
+                for line in f:
+                    if line.startswith(b'read_bytes:'):
+                        read_bytes = int(line.split()[1])
+                    elif line.startswith(b'write_bytes:'):
+                        write_bytes = int(line.split()[1])
+        except OSError:
+            pass
+        return read_bytes, write_bytes
+
+    def snapshot(self):
+        """Walk the tree once; processes that exit mid-walk are skipped"""
+        snap = ProcSnapshot()
+        now = snap.timestamp
+        elapsed = None if self._previous_at is None else now - self._previous_at
+        previous = self._previous
+        current = {}
+        ticks = float(self.clock_ticks)
+        page_size = self.page_size
+        total_memory = self.total_memory or 1
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                path = entry.path
+                try:
+                    with open(path + '/stat', 'rb') as f:
+                        stat = f.read()
+                    with open(path + '/statm', 'rb') as f:
+                        statm = f.read().split()
+                    uid = -1
+                    with open(path + '/status', 'rb') as f:
+                        for line in f:
+                            if line.startswith(b'Uid:'):
+                                uid = int(line.split()[1])
+                                break
+                except (FileNotFoundError, ProcessLookupError, PermissionError):
+                    continue  # exited (or hidden) while we were reading it
+
+                # The command name may itself contain spaces and parentheses
+                open_paren = stat.index(b'(')
+                close_paren = stat.rindex(b')')
+                fields = stat[close_paren + 2:].split()
+                cpu_ticks = int(fields[11]) + int(fields[12])
+                start_ticks = int(fields[19])
+                pid = int(stat[:open_paren])
+                rss = int(statm[1]) * page_size
+
+                key = (pid, start_ticks)
+                current[key] = cpu_ticks
+                last = previous.get(key)
+                if elapsed and last is not None:
+                    cpu_percent = (cpu_ticks - last) / ticks / elapsed * 100.0
+                else:
+                    cpu_percent = 0.0
+
+                snap.pid.append(pid)
+                snap.ppid.append(int(fields[1]))
+                snap.uid.append(uid)
+                snap.utime.append(int(fields[11]) / ticks)
+                snap.stime.append(int(fields[12]) / ticks)
+                snap.create_time.append(self.boot_time + start_ticks / ticks)
+                snap.rss.append(rss)
+                snap.vms.append(int(statm[0]) * page_size)
+                snap.cpu_percent.append(cpu_percent)
+                snap.memory_percent.append(rss / total_memory * 100.0)
+                read_bytes, write_bytes = self._read_io(path) if self.io else (-1, -1)
+                snap.read_bytes.append(read_bytes)
+                snap.write_bytes.append(write_bytes)
+                name = stat[open_paren + 1:close_paren].decode('utf-8', 'replace')
+                if len(name) >= 15:
+                    name = self._full_name(path, name)
+                snap.name.append(name)
+                snap.username.append(self.username(uid) if uid >= 0 else None)
+        self._previous = current
+        self._previous_at = now
+        return snap
+
+    def __call__(self):
+        """ProcessTable provider interface"""
+        return self.snapshot().infos()
+
+
+def procfs_available(root='/proc'):
+    return sys.platform.startswith('linux') and os.path.exists(os.path.join(root, 'self', 'stat'))
+
+
+def default_provider(name=None):
+    """The procfs collector on Linux, psutil elsewhere; ``$VPM_PROCESS_BACKEND`` can force either"""
+    from process_table import psutil_provider
+
+    name = name or os.environ.get('VPM_PROCESS_BACKEND')
+    if name == 'psutil' or (name is None and not procfs_available()):
+        return psutil_provider
+    try:
+        return ProcfsCollector()
+    except (OSError, RuntimeError) as e:
+        print(f"Falling back to psutil for process enumeration: {e}")
+        return psutil_provider
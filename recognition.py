@@ -0,0 +1,329 @@
+"""Speech-to-text backends and the pipelined recognizer.
+
+Transcription runs on a small worker pool so the voice thread can go straight
+back to the microphone after handing an utterance over. Results are delivered
+one at a time, in the order the utterances were captured, on a dedicated
+thread, so the wake word / command state machine sees them exactly as if
+recognition had been synchronous. The queue is bounded: if recognition falls
+that far behind, new utterances are dropped instead of stalling capture.
+
+Streaming backends are fed the audio while the user is still talking and
+return partial hypotheses, so the voice thread can act on a command before
+the utterance ends (see ``commands.EarlyCommit``).
+"""
+import collections
+import json
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+
+from tracing import NULL_TRACE
+
+
+class NoSpeech(Exception):
+    """The backend heard nothing it could transcribe"""
+
+
+class RecognitionError(Exception):
+    """The backend failed, e.g. the recognition service could not be reached"""
+
+
+class RecognitionBackend:
+    """Turns one ``sr.AudioData`` into lower-case text; must be thread-safe"""
+    name = 'base'
+
+    def recognize(self, audio):
+        raise NotImplementedError
+
+
+class GoogleBackend(RecognitionBackend):
+    """The free Google Web Speech API through ``speech_recognition``"""
+    name = 'google'
+
+    def __init__(self, recognizer, language='en-US'):
+        self.recognizer = recognizer
+        self.language = language
+
+    def recognize(self, audio):
+        import speech_recognition as sr
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language, show_all=False).lower().strip()
+        except sr.UnknownValueError as e:
+            raise NoSpeech() from e
+        except sr.RequestError as e:
+            raise RecognitionError(str(e)) from e
+
+
+class FakeBackend(RecognitionBackend):
+    """Looks transcripts up by the audio bytes; ``delay`` simulates service latency.
+
+    ``delay`` is a number of seconds or a function of the transcript, so tests
+    can make later utterances finish first.
+    """
+    name = 'fake'
+
+    def __init__(self, transcripts=None, delay=0.0):
+        self.transcripts = dict(transcripts or {})
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def recognize(self, audio):
+        with self._lock:
+            self.calls += 1
+        text = self.transcripts.get(bytes(audio.frame_data))
+        delay = self.delay(text) if callable(self.delay) else self.delay
+        if delay:
+            time.sleep(delay)
+        if not text:
+            raise NoSpeech()
+        return text
+
+
+def default_backend(recognizer=None, name=None):
+    """Pick a backend from ``name`` or ``$VPM_RECOGNIZER`` (google by default)"""
+    name = name or os.environ.get('VPM_RECOGNIZER', GoogleBackend.name)
+    if name == FakeBackend.name:
+        return FakeBackend()
+    if name != GoogleBackend.name:
+        print(f"Unknown recognizer '{name}', using {GoogleBackend.name}")
+    if recognizer is None:
+        import speech_recognition as sr
+        recognizer = sr.Recognizer()
+    return GoogleBackend(recognizer)
+
+
+class StreamingSession:
+    """Recognition of one utterance, fed as it is captured"""
+
+    def feed(self, data):
+        """Add raw 16-bit mono audio; returns the current partial transcript or None"""
+        raise NotImplementedError
+
+    def finish(self):
+        """The final transcript, or None if nothing was recognized"""
+        raise NotImplementedError
+
+
+class StreamingBackend:
+    name = 'base'
+
+    def start(self, sample_rate=16000):
+        raise NotImplementedError
+
+
+class ReplaySession(StreamingSession):
+    def __init__(self, recording, sample_rate):
+        self.recording = recording
+        self.bytes_per_second = sample_rate * 2
+        self.received = 0
+        self._next = 0
+        self._partial = None
+
+    def feed(self, data):
+        self.received += len(data)
+        heard = self.received / self.bytes_per_second
+        partials = self.recording['partials']
+        while self._next < len(partials) and partials[self._next][0] <= heard:
+            self._partial = partials[self._next][1]
+            self._next += 1
+        return self._partial
+
+    def finish(self):
+        return self.recording.get('text') or None
+
+
+class FakeStreamingBackend(StreamingBackend):
+    """Replays recorded partial-result timelines, one recording per utterance.
+
+    A recording is ``{"text": final, "partials": [[seconds, partial], ...]}``:
+    each partial is returned once that many seconds of audio have been fed.
+    Recordings are used in order and then from the start again.
+    """
+    name = 'fake'
+
+    def __init__(self, recordings=()):
+        self.recordings = list(recordings)
+        self.sessions = 0
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def start(self, sample_rate=16000):
+        recording = self.recordings[self.sessions % len(self.recordings)] if self.recordings else {'partials': []}
+        self.sessions += 1
+        return ReplaySession(recording, sample_rate)
+
+
+class VoskSession(StreamingSession):
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self.text = []
+
+    def feed(self, data):
+        if self.recognizer.AcceptWaveform(bytes(data)):
+            # Vosk closed a segment on its own; keep it and carry on
+            self.text.append(json.loads(self.recognizer.Result()).get('text', ''))
+            return ' '.join(self.text).strip() or None
+        partial = json.loads(self.recognizer.PartialResult()).get('partial', '')
+        return ' '.join(self.text + [partial]).strip() or None
+
+    def finish(self):
+        self.text.append(json.loads(self.recognizer.FinalResult()).get('text', ''))
+        return ' '.join(self.text).strip() or None
+
+
+class VoskStreamingBackend(StreamingBackend):
+    """Offline streaming recognition with Vosk (``pip install vosk`` and a model directory)"""
+    name = 'vosk'
+
+    def __init__(self, model_path=None):
+        import vosk
+        model_path = model_path or os.environ.get('VPM_VOSK_MODEL')
+        if not model_path:
+            raise ValueError("set VPM_VOSK_MODEL to a Vosk model directory")
+        vosk.SetLogLevel(-1)
+        self.vosk = vosk
+        self.model = vosk.Model(model_path)
+
+    def start(self, sample_rate=16000):
+        return VoskSession(self.vosk.KaldiRecognizer(self.model, sample_rate))
+
+
+STREAMING_BACKENDS = {
+    FakeStreamingBackend.name: FakeStreamingBackend,
+    VoskStreamingBackend.name: VoskStreamingBackend,
+}
+
+
+def register_streaming_backend(name, factory):
+    """Register a streaming recognizer factory, e.g. a wrapper around a cloud streaming API"""
+    STREAMING_BACKENDS[name] = factory
+
+
+def create_streaming_backend(name=None):
+    """The streaming backend named by ``name`` or ``$VPM_STREAMING``, or None to recognize whole utterances"""
+    name = name or os.environ.get('VPM_STREAMING')
+    if not name or name == 'off':
+        return None
+    factory = STREAMING_BACKENDS.get(name)
+    if factory is None:
+        print(f"Unknown streaming recognizer '{name}', recognizing whole utterances")
+        return None
+    try:
+        return factory()
+    except (ImportError, ValueError, OSError) as e:
+        print(f"Streaming recognizer '{name}' unavailable ({e}), recognizing whole utterances")
+        return None
+
+
+class RecognitionPipeline:
+    """Transcribes utterances concurrently and delivers the results in submission order.
+
+    ``deliver(context, text, error)`` is called on the pipeline's own thread
+    with the transcript, or with ``text=None`` and the NoSpeech or
+    RecognitionError that the backend raised.
+    """
+
+    def __init__(self, backend, deliver, workers=2, max_pending=4):
+        self.backend = backend
+        self.deliver = deliver
+        self.max_pending = max_pending
+        self.order = collections.deque()  # (future, context, trace) in capture order
+        self.submitted = 0
+        self.dropped = 0
+        self._cond = threading.Condition()
+        self._running = True
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='recognize')
+        self._thread = threading.Thread(target=self._deliver_results, name='recognition-results', daemon=True)
+        self._thread.start()
+
+    def submit(self, audio, context=None, trace=NULL_TRACE):
+        """Queue an utterance without blocking; returns False if it had to be dropped"""
+        with self._cond:
+            if not self._running or len(self.order) >= self.max_pending:
+                self.dropped += 1
+                return False
+            future = self._pool.submit(self._recognize, audio, trace, time.monotonic())
+            self.order.append((future, context, trace))
+            self.submitted += 1
+            self._cond.notify()
+        return True
+
+    def submit_text(self, text, context=None, trace=NULL_TRACE):
+        """Queue a transcript that is already known (e.g. from a streaming session), keeping capture order"""
+        with self._cond:
+            if not self._running:
+                return False
+            future = Future()
+            if text:
+                future.set_result(text)
+            else:
+                future.set_exception(NoSpeech())
+            self.order.append((future, context, trace))
+            self.submitted += 1
+            self._cond.notify()
+        return True
+
+    def pending(self):
+        """Utterances submitted but not yet delivered, including the one being delivered"""
+        with self._cond:
+            return len(self.order)
+
+    def _recognize(self, audio, trace, submitted):
+        started = time.monotonic()
+        trace.add('recognize_wait', started - submitted)
+        try:
+            return self.backend.recognize(audio)
+        finally:
+            trace.add('recognize', time.monotonic() - started)
+
+    def _deliver_results(self):
+        while True:
+            with self._cond:
+                while self._running and not self.order:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                future, context, trace = self.order[0]
+            text = error = None
+            try:
+                text = future.result()
+            except (NoSpeech, RecognitionError) as e:
+                error = e
+            except CancelledError:
+                return
+            except Exception as e:
+                error = RecognitionError(f"{type(e).__name__}: {e}")
+            try:
+                self.deliver(context, text, error)
+            except Exception as e:
+                print(f"❌ Error handling recognition result: {e}")
+            finally:
+                with self._cond:
+                    if self.order and self.order[0][0] is future:
+                        self.order.popleft()
+                    self._cond.notify_all()
+
+    def wait_until_idle(self, timeout=None):
+        """Block until everything submitted has been delivered; returns False on timeout"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self.order or not self._running, timeout)
+
+    def stats(self):
+        return {'submitted': self.submitted, 'dropped': self.dropped, 'pending': self.pending()}
+
+    def close(self):
+        """Stop delivering; utterances still queued are abandoned"""
+        with self._cond:
+            self._running = False
+            abandoned = list(self.order)
+            self.order.clear()
+            self._cond.notify_all()
+        for future, context, trace in abandoned:
+            future.cancel()
+            trace.discard()
+        self._pool.shutdown(wait=False)
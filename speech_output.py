@@ -0,0 +1,220 @@
+"""Asynchronous, interruptible text-to-speech output.
+
+``SpeechQueue.say`` returns immediately; a single worker thread speaks the
+queued messages through a pluggable backend. Messages that pile up while the
+assistant is talking are coalesced into one utterance, stale ones are dropped,
+and the current utterance can be cut off when the user barges in with the
+wake word.
+"""
+import collections
+import os
+import platform
+import shutil
+import subprocess
+import threading
+import time
+
+from tracing import current_trace
+
+
+class SpeechBackend:
+    """Speaks one message at a time; ``speak`` blocks until done or stopped"""
+    name = 'base'
+
+    def speak(self, text):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+
+class SubprocessBackend(SpeechBackend):
+    """Runs a command-line synthesizer such as ``say`` or ``espeak``"""
+
+    def __init__(self, name, command):
+        self.name = name
+        self.command = command
+        self._proc = None
+        self._lock = threading.Lock()
+
+    def speak(self, text):
+        with self._lock:
+            self._proc = subprocess.Popen(self.command + [text])
+        try:
+            self._proc.wait()
+        finally:
+            with self._lock:
+                self._proc = None
+
+    def stop(self):
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                self._proc.terminate()
+
+
+class PrintBackend(SpeechBackend):
+    name = 'print'
+
+    def speak(self, text):
+        print(text)
+
+
+class FakeBackend(SpeechBackend):
+    """Records what would have been spoken; ``delay`` simulates playback time"""
+    name = 'fake'
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.spoken = []
+        self.interrupted = []
+        self._stop = threading.Event()
+
+    def speak(self, text):
+        self._stop.clear()
+        if self._stop.wait(self.delay):
+            self.interrupted.append(text)
+        else:
+            self.spoken.append(text)
+
+    def stop(self):
+        self._stop.set()
+
+
+def default_backend(name=None):
+    """Pick a backend from ``name``, ``$VPM_TTS_BACKEND`` or the platform"""
+    name = name or os.environ.get('VPM_TTS_BACKEND')
+    if name is None:
+        if platform.system() == 'Darwin':
+            name = 'say'
+        elif shutil.which('espeak-ng') or shutil.which('espeak'):
+            name = 'espeak'
+        else:
+            name = 'print'
+    if name == 'say':
+        return SubprocessBackend('say', ['say'])
+    if name == 'espeak':
+        return SubprocessBackend('espeak', ['espeak-ng' if shutil.which('espeak-ng') else 'espeak'])
+    if name == 'fake':
+        return FakeBackend()
+    return PrintBackend()
+
+
+class SpeechQueue:
+    """Single-voice speech queue with coalescing and barge-in"""
+
+    def __init__(self, backend=None, max_pending=3, max_age=10.0):
+        self.backend = backend or default_backend()
+        self.max_pending = max_pending
+        self.max_age = max_age
+        self.pending = collections.deque()
+        self.dropped = 0
+        self.last_finished = 0.0
+        self.speaking = threading.Event()
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name='speech', daemon=True)
+        self._thread.start()
+
+    def say(self, text):
+        """Queue a message and return immediately"""
+        with self._cond:
+            if self.pending and self.pending[-1][1] == text:
+                return  # the same confirmation twice in a row
+            self.pending.append((time.monotonic(), text, current_trace().hold()))
+            while len(self.pending) > self.max_pending:
+                self.pending.popleft()[2].release()
+                self.dropped += 1
+            self._cond.notify()
+
+    def interrupt(self):
+        """Barge-in: stop the current utterance and forget everything queued"""
+        with self._cond:
+            self.dropped += len(self.pending)
+            self._release_pending()
+        self.backend.stop()
+
+    def _release_pending(self):
+        while self.pending:
+            self.pending.popleft()[2].release()
+
+    def is_speaking(self):
+        return self.speaking.is_set()
+
+    def busy_since(self, timestamp):
+        """True if we were talking at any point after ``timestamp`` (time.monotonic)"""
+        return self.speaking.is_set() or self.last_finished > timestamp
+
+    def wait_until_quiet(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self.pending or self.speaking.is_set():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 0.1)
+        return True
+
+    def _next_message(self):
+        with self._cond:
+            while self._running and not self.pending:
+                self._cond.wait()
+            if not self._running:
+                return None, []
+            now = time.monotonic()
+            texts = []
+            traces = []
+            while self.pending:
+                queued_at, text, trace = self.pending.popleft()
+                if now - queued_at > self.max_age:
+                    self.dropped += 1
+                    trace.release()
+                    continue
+                texts.append(text)
+                trace.add('speech_wait', now - queued_at)
+                traces.append(trace)
+            if texts:
+                self.speaking.set()
+            # Everything that queued up while we were busy becomes one utterance
+            return '. '.join(t.rstrip('.') for t in texts), traces
+
+    def _worker(self):
+        while True:
+            text, traces = self._next_message()
+            if text is None:
+                return
+            if not text:
+                continue
+            started = time.monotonic()
+            try:
+                self.backend.speak(text)
+            except Exception as e:
+                print(f"Speech output failed ({e}): {text}")
+            finally:
+                finished = time.monotonic()
+                for trace in traces:
+                    trace.add('speak', finished - started)
+                    trace.release()
+                with self._cond:
+                    self.last_finished = finished
+                    self.speaking.clear()
+                    self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._running = False
+            self._release_pending()
+            self._cond.notify_all()
+        self.backend.stop()
+
+
+_speech_queue = None
+_speech_queue_lock = threading.Lock()
+
+
+def get_speech_queue():
+    """The process-wide speech queue, so every ProcessManager shares one voice"""
+    global _speech_queue
+    with _speech_queue_lock:
+        if _speech_queue is None:
+            _speech_queue = SpeechQueue()
+        return _speech_queue
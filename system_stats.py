@@ -0,0 +1,116 @@
+"""Background system statistics sampling.
+
+A collector thread samples CPU (total and per core), memory, disk, battery
+and load average at a fixed rate into a fixed-length ring of samples, so
+reading the current stats never blocks on ``psutil.cpu_percent(interval=1)``
+and recent minimum/average/maximum values come for free.
+"""
+import collections
+import os
+import threading
+import time
+
+import psutil
+
+NUMERIC_FIELDS = ('cpu_percent', 'memory_percent', 'disk_percent', 'battery_percent', 'load_1m')
+
+
+class StatsSample:
+    __slots__ = ('timestamp', 'cpu_percent', 'per_cpu', 'memory_percent', 'disk_percent',
+                 'battery_percent', 'battery_plugged', 'load_1m', 'load_5m', 'load_15m')
+
+    def __init__(self, **values):
+        for slot in self.__slots__:
+            setattr(self, slot, values.get(slot))
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class SystemStatsCollector:
+    """Samples system stats every ``interval`` seconds, keeping the last ``history`` samples"""
+
+    def __init__(self, interval=1.0, history=900, disk_path='/'):
+        self.interval = interval
+        self.disk_path = disk_path
+        self.samples = collections.deque(maxlen=history)
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # The first cpu_percent(None) call only sets the baseline for the next one
+        psutil.cpu_percent(interval=None)
+        psutil.cpu_percent(interval=None, percpu=True)
+
+    def sample(self):
+        """Take one non-blocking sample and append it to the ring"""
+        battery = psutil.sensors_battery() if hasattr(psutil, 'sensors_battery') else None
+        try:
+            load = os.getloadavg()
+        except (AttributeError, OSError):
+            load = (None, None, None)
+        sample = StatsSample(
+            timestamp=time.time(),
+            cpu_percent=psutil.cpu_percent(interval=None),
+            per_cpu=psutil.cpu_percent(interval=None, percpu=True),
+            memory_percent=psutil.virtual_memory().percent,
+            disk_percent=psutil.disk_usage(self.disk_path).percent,
+            battery_percent=battery.percent if battery else None,
+            battery_plugged=battery.power_plugged if battery else None,
+            load_1m=load[0], load_5m=load[1], load_15m=load[2],
+        )
+        with self.lock:
+            self.samples.append(sample)
+        return sample
+
+    def latest(self):
+        """Most recent sample; takes one immediately if the collector has not run yet"""
+        with self.lock:
+            if self.samples:
+                return self.samples[-1]
+        return self.sample()
+
+    def summary(self, window=60.0):
+        """min/avg/max of each numeric field over the last ``window`` seconds"""
+        cutoff = time.time() - window
+        with self.lock:
+            recent = [s for s in self.samples if s.timestamp >= cutoff]
+        result = {}
+        for field in NUMERIC_FIELDS:
+            values = [getattr(s, field) for s in recent if getattr(s, field) is not None]
+            if values:
+                result[field] = {'min': min(values), 'avg': sum(values) / len(values), 'max': max(values)}
+        result['samples'] = len(recent)
+        return result
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='system-stats', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Error sampling system stats: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_collector = None
+_collector_lock = threading.Lock()
+
+
+def get_stats_collector():
+    """The process-wide collector, started on first use"""
+    global _collector
+    with _collector_lock:
+        if _collector is None:
+            _collector = SystemStatsCollector().start()
+        return _collector
@@ -0,0 +1,315 @@
+"""Per-stage latency tracing for voice commands.
+
+Every utterance gets a ``Trace`` that collects monotonic stage durations as
+it moves from the voice thread (calibrate, listen, vad) through recognition
+(recognize_wait, recognize, normalize) and the command runner (queue,
+dispatch, subprocess) to the speech queue (speech_wait, speak). Several threads can hold a trace; it is finished when
+the last one releases it. Finished traces feed per-stage histograms with
+p50/p95/p99 and can be appended to a JSONL file. ``response`` is the time
+from the end of the user's speech to the last stage completing.
+
+Tracing is off unless ``$VPM_TRACE=1`` or ``$VPM_TRACE_FILE`` is set; while
+it is off ``begin`` hands out a shared no-op trace, so instrumented code
+costs a couple of attribute lookups. ``$VPM_METRICS_PORT`` serves the
+histograms in Prometheus text format on 127.0.0.1.
+"""
+import collections
+import itertools
+import json
+import os
+import threading
+import time
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+STAGE_ORDER = ['calibrate', 'listen', 'vad', 'recognize_wait', 'recognize', 'normalize', 'notification', 'queue', 'dispatch',
+               'subprocess', 'launch', 'control', 'speech_wait', 'speak', 'response', 'total']
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullTrace:
+    """Stand-in used while tracing is disabled; every method is a no-op"""
+    id = None
+    enabled = False
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def add(self, name, seconds):
+        pass
+
+    def mark(self, name, at=None):
+        pass
+
+    def set(self, **attrs):
+        pass
+
+    def hold(self):
+        return self
+
+    def release(self):
+        pass
+
+    def discard(self):
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+class _Stage:
+    __slots__ = ('trace', 'name', 'started')
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.name, time.monotonic() - self.started)
+        return False
+
+
+class Trace:
+    enabled = True
+
+    def __init__(self, tracer, trace_id, kind):
+        self.tracer = tracer
+        self.id = trace_id
+        self.kind = kind
+        self.started = time.monotonic()
+        self.wall_started = time.time()
+        self.stages = {}
+        self.marks = {}
+        self.attrs = {}
+        self._holds = 1  # the creator's
+        self._lock = threading.Lock()
+        self._done = False
+
+    def stage(self, name):
+        """Context manager timing one stage; repeated stages accumulate"""
+        return _Stage(self, name)
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def mark(self, name, at=None):
+        """Remember a point in time (``time.monotonic``), e.g. where the user stopped talking"""
+        self.marks[name] = time.monotonic() if at is None else at
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def hold(self):
+        """Another thread takes a share; the trace finishes when every share is released"""
+        with self._lock:
+            self._holds += 1
+        return self
+
+    def release(self):
+        with self._lock:
+            self._holds -= 1
+            finished = self._holds == 0 and not self._done
+            if finished:
+                self._done = True
+        if finished:
+            self.tracer._finish(self)
+
+    def discard(self):
+        """Drop the trace without recording it (e.g. a listen that timed out)"""
+        with self._lock:
+            self._done = True
+
+
+class Histogram:
+    """Cumulative bucket counts for export plus a window of recent values for percentiles"""
+
+    def __init__(self, window=2048):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.recent = collections.deque(maxlen=window)
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += seconds
+        self.count += 1
+        self.recent.append(seconds)
+
+    def percentiles(self, quantiles=QUANTILES):
+        ordered = sorted(self.recent)
+        if not ordered:
+            return [None] * len(quantiles)
+        return [ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in quantiles]
+
+
+class Tracer:
+    def __init__(self, enabled=False, path=None):
+        self.enabled = enabled or bool(path)
+        self.path = path
+        self.histograms = {}
+        self.traces = 0
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def begin(self, kind='utterance'):
+        if not self.enabled:
+            return NULL_TRACE
+        return Trace(self, next(self._ids), kind)
+
+    def _histogram(self, stage):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        return histogram
+
+    def observe(self, stage, seconds):
+        """Record a duration that does not belong to any one trace"""
+        if self.enabled:
+            with self.lock:
+                self._histogram(stage).observe(seconds)
+
+    def _finish(self, trace):
+        finished = time.monotonic()
+        stages = dict(trace.stages)
+        stages['total'] = finished - trace.started
+        if 'speech_end' in trace.marks:
+            stages['response'] = finished - trace.marks['speech_end']
+        with self.lock:
+            self.traces += 1
+            for name, seconds in stages.items():
+                self._histogram(name).observe(seconds)
+        if self.path:
+            record = {'trace': trace.id, 'kind': trace.kind, 'started': trace.wall_started,
+                      'stages_ms': {name: round(seconds * 1000, 3) for name, seconds in stages.items()}}
+            record.update(trace.attrs)
+            try:
+                with self.lock, open(self.path, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+            except OSError as e:
+                print(f"Could not write trace to {self.path}: {e}")
+
+    def _ordered_stages(self):
+        names = list(self.histograms)
+        return sorted(names, key=lambda n: (STAGE_ORDER.index(n) if n in STAGE_ORDER else len(STAGE_ORDER), n))
+
+    def percentiles_ms(self):
+        """``{stage: {'p50': ms, 'p95': ms, 'p99': ms}}`` over recent traces"""
+        with self.lock:
+            return {name: {f"p{int(q * 100)}": value * 1000
+                           for q, value in zip(QUANTILES, self.histograms[name].percentiles())}
+                    for name in self._ordered_stages()}
+
+    def summary_lines(self):
+        """Text table of per-stage percentiles for the output view"""
+        if not self.enabled:
+            return ["Latency tracing is off. Set VPM_TRACE=1 (or VPM_TRACE_FILE) and restart to enable it."]
+        lines = [f"Latency per stage over {self.traces} traces (ms):",
+                 f"{'stage':<14}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}"]
+        with self.lock:
+            for name in self._ordered_stages():
+                histogram = self.histograms[name]
+                p50, p95, p99 = histogram.percentiles()
+                lines.append(f"{name:<14}{histogram.count:>8}{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}{p99 * 1000:>10.1f}")
+        return lines
+
+    def prometheus_text(self):
+        lines = ['# HELP vpm_stage_seconds Time spent in each stage of a voice command',
+                 '# TYPE vpm_stage_seconds histogram']
+        with self.lock:
+            stages = self._ordered_stages()
+            for name in stages:
+                histogram = self.histograms[name]
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'vpm_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'vpm_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'vpm_stage_seconds_sum{{stage="{name}"}} {histogram.total}')
+                lines.append(f'vpm_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+            lines += ['# HELP vpm_stage_latency_seconds Recent per-stage latency quantiles',
+                      '# TYPE vpm_stage_latency_seconds summary']
+            for name in stages:
+                histogram = self.histograms[name]
+                for q, value in zip(QUANTILES, histogram.percentiles()):
+                    if value is not None:
+                        lines.append(f'vpm_stage_latency_seconds{{stage="{name}",quantile="{q}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+_local = threading.local()
+
+
+def current_trace():
+    """The trace of the command running on this thread, or the no-op trace"""
+    return getattr(_local, 'trace', NULL_TRACE)
+
+
+def activate(trace):
+    """Make ``trace`` current on this thread; returns the previous one to restore"""
+    previous = getattr(_local, 'trace', NULL_TRACE)
+    _local.trace = trace
+    return previous
+
+
+def start_metrics_server(tracer, port, host='127.0.0.1'):
+    """Serve ``/metrics`` in Prometheus text format from a daemon thread"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = tracer.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """The process-wide tracer, configured from the environment on first use"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(enabled=os.environ.get('VPM_TRACE', '') not in ('', '0'),
+                             path=os.environ.get('VPM_TRACE_FILE') or None)
+            port = os.environ.get('VPM_METRICS_PORT')
+            if port and _tracer.enabled:
+                try:
+                    start_metrics_server(_tracer, int(port))
+                except (OSError, ValueError) as e:
+                    print(f"Could not serve metrics on port {port}: {e}")
+        return _tracer
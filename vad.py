@@ -0,0 +1,121 @@
+"""Voice-activity gate that runs before any recognizer call.
+
+Utterances are split into short frames and classified in one batch with
+NumPy, using energy, zero-crossing rate and spectral flatness. Clips that are
+too short or do not look like speech are dropped so they never reach
+``recognize_google``.
+"""
+import sys
+
+import numpy as np
+
+
+class VoiceActivityDetector:
+    """Frame-batched speech/non-speech classifier for 16-bit mono audio"""
+
+    def __init__(self, sample_rate=16000, frame_ms=20, min_speech_ms=150, min_speech_ratio=0.1,
+                 energy_floor=200.0, energy_ratio=2.5, max_flatness=0.5, zcr_range=(0.01, 0.5)):
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.frame_ms = frame_ms
+        self.min_speech_ms = min_speech_ms
+        self.min_speech_ratio = min_speech_ratio
+        self.energy_floor = energy_floor
+        self.energy_ratio = energy_ratio
+        self.max_flatness = max_flatness
+        self.zcr_range = zcr_range
+        self.window = np.hanning(self.frame_length).astype(np.float32)
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.checked = 0
+        self.accepted = 0
+        self.rejected_too_short = 0
+        self.rejected_not_speech = 0
+
+    @property
+    def recognizer_calls_saved(self):
+        return self.rejected_too_short + self.rejected_not_speech
+
+    def stats(self):
+        return {
+            'checked': self.checked,
+            'accepted': self.accepted,
+            'rejected_too_short': self.rejected_too_short,
+            'rejected_not_speech': self.rejected_not_speech,
+            'recognizer_calls_saved': self.recognizer_calls_saved,
+        }
+
+    def frame_features(self, samples):
+        """Return per-frame (rms, zero-crossing rate, spectral flatness) arrays"""
+        n = len(samples) // self.frame_length
+        frames = samples[:n * self.frame_length].reshape(n, self.frame_length)
+        rms = np.sqrt(np.mean(frames ** 2, axis=1))
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame_length
+        power = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2 + 1e-10
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        return rms, zcr, flatness
+
+    def speech_frames(self, samples):
+        """Boolean mask of frames that look like speech"""
+        rms, zcr, flatness = self.frame_features(samples)
+        if len(rms) == 0:
+            return np.zeros(0, dtype=bool)
+        # The quietest frames of the clip approximate its background level; the
+        # median cap keeps clips that are speech from end to end from gating themselves out
+        noise = np.percentile(rms, 10)
+        loud = rms > max(self.energy_floor, min(noise * self.energy_ratio, np.median(rms)))
+        voiced = (zcr >= self.zcr_range[0]) & (zcr <= self.zcr_range[1])
+        tonal = flatness < self.max_flatness
+        return loud & voiced & tonal
+
+    def check(self, data, sample_rate=None):
+        """Why raw int16 audio is not worth sending to a recognizer: 'too_short', 'not_speech' or None"""
+        if sample_rate is not None and sample_rate != self.sample_rate:
+            raise ValueError(f"VAD configured for {self.sample_rate} Hz audio, got {sample_rate} Hz")
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        min_samples = self.sample_rate * self.min_speech_ms // 1000
+        if len(samples) < min_samples:
+            return 'too_short'
+        mask = self.speech_frames(samples)
+        speech_ms = np.count_nonzero(mask) * self.frame_ms
+        if speech_ms < self.min_speech_ms:
+            return 'too_short' if mask.any() else 'not_speech'
+        if np.count_nonzero(mask) < len(mask) * self.min_speech_ratio:
+            return 'not_speech'
+        return None
+
+    def accept(self, data, sample_rate=None):
+        """Decide whether raw int16 audio is worth sending to a recognizer, and count the decision"""
+        verdict = self.check(data, sample_rate)
+        self.checked += 1
+        if verdict == 'too_short':
+            self.rejected_too_short += 1
+        elif verdict == 'not_speech':
+            self.rejected_not_speech += 1
+        else:
+            self.accepted += 1
+        return verdict is None
+
+
+def main(argv=None):
+    """Classify recorded clips offline: python vad.py noise.wav speech.wav ..."""
+    from wake_word import load_wav
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: python vad.py clip.wav [clip.wav ...]")
+        return 2
+    vad = VoiceActivityDetector()
+    for path in argv:
+        samples = load_wav(path, vad.sample_rate)
+        pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes()
+        verdict = 'speech' if vad.accept(pcm) else 'skip'
+        print(f"{verdict:7} {path}")
+    print(vad.stats())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
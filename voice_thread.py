@@ -0,0 +1,425 @@
+"""Microphone listening loop: wake word, command capture and recognition.
+
+Imported only when voice recognition is first started, so the speech stack
+(speech_recognition, PyAudio, numpy) stays out of application startup.
+
+The thread itself only captures: each utterance is handed to a
+RecognitionPipeline and the thread goes straight back to the microphone.
+Transcripts come back in capture order on the pipeline's result thread,
+which runs the wake word / command state machine. With a streaming
+recognizer (``$VPM_STREAMING``) the command is transcribed while it is being
+spoken and queued as soon as it can only mean one thing.
+"""
+import os
+import threading
+import time
+
+import speech_recognition as sr
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from wake_word import create_wake_word_engine
+from audio_capture import ContinuousCapture
+from vad import VoiceActivityDetector
+from commands import EarlyCommit, registry
+from normalizer import get_normalizer
+from recognition import RecognitionError, RecognitionPipeline, create_streaming_backend, default_backend
+from tracing import NULL_TRACE, get_tracer
+
+class StreamingCommand:
+    """Feeds one command utterance to a streaming recognizer while it is captured.
+
+    ``on_commit(text)`` fires, at most once, as soon as a partial transcript
+    is safe to run; the rest of the utterance is still consumed. If given,
+    ``accept(audio)`` must also pass for the phrase's audio so far, so noise
+    or our own voice that the recognizer turned into words is not run.
+    """
+
+    def __init__(self, backend, on_commit, sample_rate=16000, accept=None):
+        self.backend = backend
+        self.on_commit = on_commit
+        self.sample_rate = sample_rate
+        self.accept = accept
+        self.session = None
+        self.phrase_start = None
+        self.audio = bytearray()  # this phrase so far
+        self.committed = None
+        self.early = None
+
+    def on_audio(self, data, phrase_start):
+        if phrase_start != self.phrase_start:
+            # A new phrase, or the previous onset was dropped as a click
+            self.phrase_start = phrase_start
+            self.session = self.backend.start(self.sample_rate)
+            self.early = EarlyCommit(registry)
+            self.audio = bytearray()
+        self.audio += data
+        partial = self.session.feed(data)
+        if self.committed is None and self.early.feed(partial, len(self.audio) / (self.sample_rate * 2)):
+            if self.accept is not None and not self.accept(bytes(self.audio)):
+                return
+            self.committed = partial
+            self.on_commit(partial)
+
+    def finish(self):
+        """The final transcript if nothing was committed early"""
+        if self.committed is not None or self.session is None:
+            return self.committed
+        return self.session.finish()
+
+
+class VoiceThread(QThread):
+    # The command text and its latency trace, which the receiver must release
+    command_received = pyqtSignal(str, object)
+    status_update = pyqtSignal(str)
+    
+    def __init__(self, process_manager):
+        super().__init__()
+        self.recognizer = sr.Recognizer()
+        self.wake_word = "hey chanti"
+        self.is_running = True
+        self.microphone = None
+        self.is_listening_for_command = False
+        self.process_manager = process_manager  # shared with the window
+        # Offline wake word engine; None falls back to recognize_google on every phrase
+        self.wake_word_engine = create_wake_word_engine()
+        # 'continuous' reads the mic through a PyAudio callback ring buffer,
+        # 'blocking' uses sr.Microphone with per-listen calibration
+        self.capture_mode = os.environ.get('VPM_CAPTURE_MODE', 'continuous')
+        self.capture = None
+        # Drops clicks and background noise before they cost a recognizer call
+        self.vad = VoiceActivityDetector(sample_rate=16000)
+        # Correction table compiled once and shared by every voice thread
+        self.normalizer = get_normalizer()
+        self.tracer = get_tracer()
+        # Recognition runs off the capture thread; results arrive in order in handle_transcript
+        self.recognition = RecognitionPipeline(
+            default_backend(self.recognizer), self.handle_transcript,
+            workers=int(os.environ.get('VPM_RECOGNITION_WORKERS', 2))
+        )
+        # Optional: recognize commands while they are spoken and act before the user stops
+        self.streaming = create_streaming_backend() if self.capture_mode == 'continuous' else None
+        self.early_commits = 0
+        self.fast_path_commands = 0
+        # Guards the command-mode flags, which both the capture and result threads change
+        self.state_lock = threading.Lock()
+        # Set when a wake phrase is recognized after the command was already captured
+        self.command_expected = False
+        
+        # Much more sensitive recognition settings
+        self.recognizer.energy_threshold = 300  # Even lower threshold for better sensitivity
+        self.recognizer.dynamic_energy_threshold = True
+        self.recognizer.dynamic_energy_adjustment_damping = 0.1  # More responsive to changes
+        self.recognizer.dynamic_energy_ratio = 1.2  # More sensitive to quieter sounds
+        self.recognizer.pause_threshold = 0.5  # Shorter pause threshold
+        self.recognizer.phrase_threshold = 0.1  # Lower phrase threshold
+        self.recognizer.non_speaking_duration = 0.3  # Shorter non-speaking duration
+        
+    def normalize_text(self, text):
+        """Normalize detected text for better matching"""
+        return self.normalizer.normalize(text)
+
+    def wait_for_wake_word(self, source):
+        """Feed raw microphone frames to the offline engine until the wake word fires"""
+        self.wake_word_engine.reset()
+        while self.is_running:
+            frame = source.stream.read(source.CHUNK)
+            if self.wake_word_engine.process(frame):
+                return True
+        return False
+
+    def activate_command_mode(self, source=None, initial_energy=None):
+        started = time.monotonic()
+        print("\n🎤 Wake word detected!")
+        # Barge-in: stop talking as soon as the user addresses us
+        self.process_manager.speech.interrupt()
+        if source is not None:
+            # Quick recalibration
+            self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+        # Play notification sound
+        self.process_manager.play_notification()
+        if self.capture:
+            # Don't treat our own notification sound as the start of the command
+            self.capture.skip_to_now()
+        self.tracer.observe('notification', time.monotonic() - started)
+        print("Please speak your command... (you have 5 seconds)")
+        if initial_energy is not None:
+            # Adjust energy threshold for command
+            self.recognizer.energy_threshold = max(initial_energy * 0.8, 300)
+
+    def handle_audio(self, audio, initial_energy=None, trace=NULL_TRACE):
+        """Queue one utterance for recognition and return to the microphone straight away.
+
+        Whether it is the wake phrase or a command is decided when the
+        transcript comes back; an utterance captured in command mode is the
+        one command for that wake word.
+        """
+        with trace.stage('vad'):
+            accepted = self.vad.accept(audio.frame_data, audio.sample_rate)
+        with self.state_lock:
+            command_mode = self.is_listening_for_command
+            self.is_listening_for_command = False  # one utterance per wake word
+            if accepted:
+                queued = self.recognition.submit(audio, (command_mode, initial_energy, trace), trace)
+        if not accepted:
+            trace.discard()
+            print(f"Skipped non-speech audio ({self.vad.recognizer_calls_saved} recognizer calls saved)")
+            if command_mode:
+                print("No command detected, please try again or say 'Hey Chanti' for a new command")
+        elif not queued:
+            trace.discard()
+            print("⚠️ Speech recognition is falling behind; dropped an utterance")
+
+    def queue_streamed(self, text, trace, early=True):
+        """Queue a command transcribed by the streaming recognizer, in order with anything still in flight"""
+        if early:
+            self.early_commits += 1
+            trace.set(early_commit=True)
+            print(f"⚡ Running '{text}' before the end of the utterance")
+        with self.state_lock:
+            self.is_listening_for_command = False  # one utterance per wake word
+            queued = self.recognition.submit_text(text, (True, None, trace), trace)
+        if not queued:
+            trace.discard()
+
+    def accept_streamed(self, audio, listen_started):
+        """Whether a streamed partial may run early: not while we talk, and only once it sounds like speech.
+
+        Not counted in the VAD stats; the whole utterance is, if nothing was run early.
+        """
+        return not self.process_manager.speech.busy_since(listen_started) and self.vad.check(audio, 16000) is None
+
+    def finish_streamed(self, stream, trace, listen_started):
+        """Run a streamed command that was not committed early, gated like ``handle_audio``"""
+        if self.process_manager.speech.busy_since(listen_started):
+            trace.discard()
+            return  # the utterance overlaps our own speech output
+        with trace.stage('vad'):
+            accepted = self.vad.accept(bytes(stream.audio), 16000)
+        text = stream.finish()
+        if accepted:
+            self.queue_streamed(text, trace, early=False)
+            return
+        with self.state_lock:
+            self.is_listening_for_command = False  # one utterance per wake word
+        trace.discard()
+        print(f"Skipped non-speech audio ({self.vad.recognizer_calls_saved} recognizer calls saved)")
+        print("No command detected, please try again or say 'Hey Chanti' for a new command")
+
+    def handle_transcript(self, context, text, error):
+        """Act on one recognition result; called in capture order on the pipeline thread.
+
+        The trace goes out with ``command_received`` if the utterance was a
+        command; otherwise it is dropped here.
+        """
+        command_mode, initial_energy, trace = context
+        try:
+            if isinstance(error, RecognitionError):
+                print(f"❌ Error with the speech recognition service; {error}")
+                with self.state_lock:
+                    self.command_expected = False
+                return
+            with self.state_lock:
+                if self.command_expected:
+                    # The wake phrase just before this utterance was recognized late
+                    command_mode = True
+                    self.command_expected = False
+            if text is None:
+                if command_mode:
+                    print("No command detected, please try again or say 'Hey Chanti' for a new command")
+                return
+            
+            # Normalize the detected text
+            with trace.stage('normalize'):
+                normalized_text = self.normalize_text(text)
+            print(f"Detected: {text}")
+            if text != normalized_text:
+                print(f"Normalized to: {normalized_text}")
+            
+            # Check for wake word
+            if not command_mode:
+                command = self.normalizer.command_after_wake_word(normalized_text)
+                if command and registry.match(command):
+                    # "hey chanti, system stats" in one breath: no second listen needed
+                    print(f"\n🎤 Wake word and command: {command}")
+                    self.process_manager.speech.interrupt()
+                    trace.set(transcript=command, fast_path=True)
+                    self.command_received.emit(command, trace)
+                    trace = NULL_TRACE  # the receiver owns it now
+                    self.fast_path_commands += 1
+                elif command is not None:
+                    with self.state_lock:
+                        # Anything queued behind the wake phrase was said after it: that is the command
+                        already_spoken = self.recognition.pending() > 1
+                        if already_spoken:
+                            self.command_expected = True
+                        else:
+                            self.is_listening_for_command = True
+                    if already_spoken:
+                        print("\n🎤 Wake word detected!")
+                        self.process_manager.speech.interrupt()
+                    else:
+                        self.activate_command_mode(initial_energy=initial_energy)
+            # If we are listening for a command, process it
+            elif text.strip():  # If there's any text detected
+                print(f"Processing command: {text}")
+                trace.set(transcript=text)
+                self.command_received.emit(text, trace)
+                trace = NULL_TRACE  # the receiver owns it now
+                print("\nListening for wake word 'Hey Chanti'...")
+        finally:
+            trace.discard()  # wake phrases and failed recognitions are not command latency
+
+    def handle_timeout(self, command_mode):
+        # If we were waiting for a command and nothing came, reset
+        with self.state_lock:
+            if command_mode and self.is_listening_for_command:
+                print("Command timeout. Please say 'Hey Chanti' and try again.")
+                self.is_listening_for_command = False
+        
+    def run(self):
+        try:
+            if self.capture_mode == 'continuous':
+                self.run_continuous()
+            else:
+                self.run_blocking()
+        except Exception as e:
+            print(f"❌ Critical error in voice thread: {e}")
+        finally:
+            self.capture = None
+            if self.microphone:
+                del self.microphone
+            if hasattr(self.recognizer, '_audio_buffer'):
+                self.recognizer._audio_buffer = []
+
+    def run_continuous(self):
+        """Read the microphone through a callback into a ring buffer, with no gaps between listens"""
+        with ContinuousCapture(sample_rate=16000,
+                               pause_threshold=self.recognizer.pause_threshold,
+                               phrase_threshold=self.recognizer.phrase_threshold) as capture:
+            self.capture = capture
+            if self.wake_word_engine:
+                print(f"Using offline wake word engine '{self.wake_word_engine.name}'")
+            print("\nListening for wake word 'Hey Chanti'... (speak clearly and at a normal pace)")
+            
+            speech = self.process_manager.speech
+            while self.is_running:
+                # Wake word is spotted locally; only the command goes to the recognizer.
+                # It keeps running while we talk so the user can barge in.
+                if self.wake_word_engine and (speech.is_speaking() or not self.is_listening_for_command):
+                    frame = capture.next_chunk(timeout=0.5, track_noise=not speech.is_speaking())
+                    if frame is not None and self.wake_word_engine.process(frame):
+                        self.is_listening_for_command = True
+                        self.activate_command_mode()
+                    continue
+                
+                if speech.is_speaking():
+                    # Mute input while speaking so we don't transcribe ourselves
+                    capture.next_chunk(timeout=0.1, track_noise=False)
+                    continue
+                
+                # Different timeouts for wake word and command
+                listen_started = time.monotonic()
+                command_mode = self.is_listening_for_command
+                trace = self.tracer.begin()
+                stream = None
+                with trace.stage('listen'):
+                    if not command_mode:
+                        # Long enough for "hey chanti" and a command in one breath
+                        utterance = capture.listen(timeout=5, phrase_time_limit=5)
+                    elif self.streaming:
+                        print("Listening for command... (you have 5 seconds)")
+                        stream = StreamingCommand(self.streaming, lambda text: self.queue_streamed(text, trace),
+                                                  accept=lambda audio: self.accept_streamed(audio, listen_started))
+                        utterance = capture.listen(timeout=5, phrase_time_limit=5, on_audio=stream.on_audio)
+                    else:
+                        print("Listening for command... (you have 5 seconds)")
+                        utterance = capture.listen(timeout=5, phrase_time_limit=5)
+                
+                if utterance is None:
+                    trace.discard()
+                    self.handle_timeout(command_mode)
+                    continue
+                if stream is not None:
+                    if stream.committed is None:
+                        trace.mark('speech_end', time.monotonic() - self.recognizer.pause_threshold)
+                        self.finish_streamed(stream, trace, listen_started)
+                    continue
+                # The phrase ended one pause_threshold of silence before listen returned
+                trace.mark('speech_end', time.monotonic() - self.recognizer.pause_threshold)
+                if speech.busy_since(listen_started):
+                    trace.discard()
+                    continue  # the utterance overlaps our own speech output
+                # Recognition may still be queued when the ring buffer laps, so hand over a copy
+                self.handle_audio(utterance.detach().to_audio_data(), trace=trace)
+
+    def run_blocking(self):
+        # Use a lower sample rate for better performance
+        self.microphone = sr.Microphone(sample_rate=16000)
+        with self.microphone as source:
+            print("Please wait - Calibrating microphone for background noise...")
+            # Shorter initial calibration but more frequent adjustments
+            started = time.monotonic()
+            self.recognizer.adjust_for_ambient_noise(source, duration=2)
+            self.tracer.observe('calibrate', time.monotonic() - started)
+            initial_energy = self.recognizer.energy_threshold
+            print(f"Microphone calibrated. Energy threshold: {initial_energy}")
+            if self.wake_word_engine:
+                print(f"Using offline wake word engine '{self.wake_word_engine.name}'")
+            print("\nListening for wake word 'Hey Chanti'... (speak clearly and at a normal pace)")
+            
+            while self.is_running:
+                trace = NULL_TRACE
+                command_mode = False
+                try:
+                    # Wake word is spotted locally; only the command goes to the recognizer
+                    if self.wake_word_engine and not self.is_listening_for_command:
+                        if self.wait_for_wake_word(source):
+                            self.is_listening_for_command = True
+                            self.activate_command_mode(source, initial_energy)
+                        continue
+                    
+                    # Don't listen to ourselves while a confirmation is being spoken
+                    self.process_manager.speech.wait_until_quiet(timeout=10)
+                    
+                    # Clear audio buffer
+                    if hasattr(self.recognizer, '_audio_buffer'):
+                        self.recognizer._audio_buffer = []
+                    
+                    trace = self.tracer.begin()
+                    command_mode = self.is_listening_for_command
+                    # Adjust noise level more frequently
+                    if not command_mode:
+                        with trace.stage('calibrate'):
+                            self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+                    
+                    # Different timeouts for wake word and command
+                    with trace.stage('listen'):
+                        if not command_mode:
+                            print("Listening...")
+                            # Long enough for "hey chanti" and a command in one breath
+                            audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=5)
+                        else:
+                            print("Listening for command... (you have 5 seconds)")
+                            audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=5)
+                    trace.mark('speech_end', time.monotonic() - self.recognizer.pause_threshold)
+                    
+                    self.handle_audio(audio, initial_energy, trace)
+                    del audio  # Clean up audio data
+                        
+                except sr.WaitTimeoutError:
+                    trace.discard()
+                    self.handle_timeout(command_mode)
+                    continue
+                
+    def stop(self):
+        print("Stopping voice recognition...")
+        print(f"Voice activity gate: {self.vad.stats()}")
+        recognition = dict(self.recognition.stats(), early_commits=self.early_commits,
+                           fast_path_commands=self.fast_path_commands)
+        print(f"Recognition pipeline: {recognition}")
+        self.is_running = False
+        self.is_listening_for_command = False
+        if hasattr(self.recognizer, '_audio_buffer'):
+            self.recognizer._audio_buffer = []
+        self.wait()
+        self.recognition.close()
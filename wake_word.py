@@ -0,0 +1,383 @@
+"""Offline wake-word detection for the voice thread.
+
+Engines consume raw 16-bit mono frames straight from the microphone and only
+report when the wake word was heard, so no audio leaves the machine until the
+user actually addresses the assistant.
+"""
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+DEFAULT_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wake_word_templates')
+
+
+class WakeWordEngine:
+    """Base class for wake-word engines.
+
+    Subclasses receive raw little-endian int16 frames through ``process`` and
+    return True from it on the frame where the wake word fires.
+    """
+    name = 'base'
+
+    def __init__(self, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+
+    def process(self, frame):
+        raise NotImplementedError
+
+    def reset(self):
+        pass
+
+
+def _hz_to_mel(hz):
+    return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+
+def _mel_to_hz(mel):
+    return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+
+class MFCC:
+    """Small NumPy MFCC extractor with the filterbank and DCT built once.
+
+    Each mel band has its noise level (the ``noise_quantile`` of that band
+    over the analysis window) subtracted and is floored ``floor_db`` below
+    the loudest band, so a clip enrolled in a quiet room still matches the
+    same word said over a fan or a laptop's hiss.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_ms=25, hop_ms=10, n_fft=512, n_mels=26, n_mfcc=13,
+                 noise_quantile=10, floor_db=20):
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.hop_length = int(sample_rate * hop_ms / 1000)
+        self.n_fft = n_fft
+        self.noise_quantile = noise_quantile
+        self.floor = 10 ** (-floor_db / 10)
+        self.window = np.hamming(self.frame_length).astype(np.float32)
+
+        # Triangular mel filterbank
+        mel_points = np.linspace(_hz_to_mel(0), _hz_to_mel(sample_rate / 2), n_mels + 2)
+        bins = np.floor((n_fft + 1) * _mel_to_hz(mel_points) / sample_rate).astype(int)
+        filterbank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+        for m in range(1, n_mels + 1):
+            left, center, right = bins[m - 1], bins[m], bins[m + 1]
+            if center > left:
+                filterbank[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+            if right > center:
+                filterbank[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+        self.filterbank = filterbank
+
+        # DCT-II basis, dropping c0 so loudness does not dominate the distance
+        n = np.arange(n_mels)
+        k = np.arange(1, n_mfcc + 1)[:, None]
+        self.dct = (np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2.0 / n_mels)).astype(np.float32)
+
+    def __call__(self, samples):
+        """Return an (n_frames, n_mfcc) matrix for float samples in [-1, 1]"""
+        if len(samples) < self.frame_length:
+            return np.zeros((0, self.dct.shape[0]), dtype=np.float32)
+        emphasized = np.append(samples[0], samples[1:] - 0.97 * samples[:-1])
+        n_frames = 1 + (len(emphasized) - self.frame_length) // self.hop_length
+        frames = np.lib.stride_tricks.as_strided(
+            emphasized,
+            shape=(n_frames, self.frame_length),
+            strides=(emphasized.strides[0] * self.hop_length, emphasized.strides[0])
+        ) * self.window
+        power = np.abs(np.fft.rfft(frames, self.n_fft)) ** 2 / self.n_fft
+        energies = power @ self.filterbank.T
+        noise = np.percentile(energies, self.noise_quantile, axis=0)
+        energies = np.maximum(energies - noise, energies.max() * self.floor)
+        return np.log(energies + 1e-10) @ self.dct.T
+
+
+def _normalize_features(features):
+    # Unit-length frames, so the distance ignores gain and does not depend on
+    # how much silence surrounds the word in the analysis window
+    return features / (np.linalg.norm(features, axis=1, keepdims=True) + 1e-6)
+
+
+def subsequence_dtw(template, window, tail=10):
+    """Best average alignment cost of ``template`` ending at the end of ``window``.
+
+    Uses a slope-constrained recurrence (the window may advance 0, 1 or 2
+    frames per template frame) so every row only depends on the previous one
+    and can be computed as a single vectorized NumPy operation. The match is
+    free to start anywhere in the window and to end in its last ``tail``
+    frames, or anywhere if ``tail`` is None.
+    """
+    cost = np.sqrt(((template[:, None, :] - window[None, :, :]) ** 2).sum(axis=2))
+    acc = cost[0].copy()
+    inf = np.full(2, np.inf)
+    for row in cost[1:]:
+        shifted1 = np.concatenate((inf[:1], acc[:-1]))
+        shifted2 = np.concatenate((inf, acc[:-2]))
+        acc = row + np.minimum(np.minimum(acc, shifted1), shifted2)
+    # Allow the match to end a few frames before the newest one
+    ends = acc[-tail:] if tail else acc
+    return float(ends.min()) / len(template)
+
+
+def load_wav(path, sample_rate=SAMPLE_RATE):
+    """Load a 16-bit mono WAV file as float32 samples in [-1, 1]"""
+    with wave.open(path, 'rb') as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            raise ValueError(f"{path}: expected 16-bit mono audio")
+        if wav.getframerate() != sample_rate:
+            raise ValueError(f"{path}: expected {sample_rate} Hz audio, got {wav.getframerate()} Hz")
+        data = wav.readframes(wav.getnframes())
+    return np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def _wav_files(directory):
+    if not directory or not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.lower().endswith('.wav'))
+
+
+class TemplateWakeWordEngine(WakeWordEngine):
+    """MFCC + DTW template matcher against a few enrolled recordings of the wake word.
+
+    Record three to five clips of yourself saying "hey chanti" (16 kHz, 16-bit
+    mono WAV) into ``wake_word_templates/`` and the engine will match live
+    audio against them without any network access. Recordings of things that
+    must not wake it (the room, the TV, similar phrases) can go into
+    ``wake_word_templates/background/`` to tune the threshold.
+    """
+    name = 'template'
+
+    def __init__(self, templates, sample_rate=SAMPLE_RATE, threshold=None, background=(),
+                 step_ms=100, energy_floor=0.01, refractory_ms=1000):
+        super().__init__(sample_rate)
+        if not templates:
+            raise ValueError("At least one wake word template is required")
+        self.mfcc = MFCC(sample_rate)
+        clips = [self._trim(t) for t in templates]
+        self.templates = [_normalize_features(self.mfcc(clip)) for clip in clips]
+        longest = max(len(t) for t in self.templates)
+        # Window long enough for the slowest accepted pronunciation
+        self.window_samples = int(longest * 1.5) * self.mfcc.hop_length + self.mfcc.frame_length
+        self.step_samples = int(sample_rate * step_ms / 1000)
+        self.refractory_samples = int(sample_rate * refractory_ms / 1000)
+        self.energy_floor = energy_floor
+        self.threshold = threshold if threshold is not None else self._calibrate(clips, background)
+        self.buffer = np.zeros(self.window_samples, dtype=np.float32)
+        self.last_distance = None
+        self.reset()
+
+    @classmethod
+    def from_directory(cls, directory=DEFAULT_TEMPLATE_DIR, **options):
+        if 'background' not in options:
+            options['background'] = [load_wav(path) for path in _wav_files(os.path.join(directory, 'background'))]
+        return cls([load_wav(path) for path in _wav_files(directory)], **options)
+
+    def _trim(self, samples):
+        """Strip leading/trailing silence from an enrollment clip"""
+        frame = self.mfcc.hop_length
+        n = len(samples) // frame
+        if n == 0:
+            return samples
+        rms = np.sqrt((samples[:n * frame].reshape(n, frame) ** 2).mean(axis=1))
+        voiced = np.nonzero(rms > max(rms.max() * 0.1, 1e-4))[0]
+        if len(voiced) == 0:
+            return samples
+        return samples[voiced[0] * frame:(voiced[-1] + 1) * frame]
+
+    def _calibrate(self, clips, background=()):
+        """Put the threshold halfway between the wake word and its near misses.
+
+        The wake word side is each enrolled clip, in padding and white noise
+        30 dB below it, against the other templates (or itself if it is the
+        only one). The near miss side is parts of the same clips ("hey",
+        "anti", "hey chan", the halves swapped), scored the same way, and
+        every stretch of the ``background`` recordings against all templates.
+        """
+        rng = np.random.default_rng(0)
+        pad = np.zeros(self.step_samples, dtype=np.float32)
+        genuine = []
+        near_misses = []
+        for i, clip in enumerate(clips):
+            others = [template for j, template in enumerate(self.templates) if j != i] or self.templates
+            noise = np.sqrt(np.mean(clip ** 2)) * 10 ** (-30 / 20)
+
+            def score(audio):
+                audio = np.concatenate((pad, audio, pad))
+                features = _normalize_features(self.mfcc(audio + rng.normal(0, noise, len(audio))))
+                return min(subsequence_dtw(template, features) for template in others)
+            n = len(clip)
+            genuine.append(score(clip))
+            for part in (clip[:n // 2], clip[n // 2:], clip[:2 * n // 3], clip[n // 3:],
+                         np.concatenate((clip[n // 2:], clip[:n // 2]))):
+                near_misses.append(score(part))
+        for audio in background:
+            features = _normalize_features(self.mfcc(audio))
+            if len(features):
+                near_misses.append(min(subsequence_dtw(template, features, tail=None) for template in self.templates))
+        return (max(genuine) + min(near_misses)) / 2
+
+    def reset(self):
+        self.buffer[:] = 0
+        self.filled = 0
+        self.pending = 0
+        self.cooldown = 0
+
+    def process(self, frame):
+        samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32) / 32768.0
+        n = len(samples)
+        if n == 0:
+            return False  # buffer[:-0] is empty, so shifting by nothing would not leave the buffer alone
+        if n >= self.window_samples:
+            self.buffer[:] = samples[-self.window_samples:]
+        else:
+            self.buffer[:-n] = self.buffer[n:]
+            self.buffer[-n:] = samples
+        self.filled = min(self.window_samples, self.filled + n)
+        if self.cooldown > 0:
+            self.cooldown -= n
+            return False
+        self.pending += n
+        if self.pending < self.step_samples:
+            return False
+        self.pending = 0
+
+        # Skip the DTW entirely unless the recent audio is loud enough to be speech
+        recent = self.buffer[-self.step_samples:]
+        if np.sqrt(np.mean(recent ** 2)) < self.energy_floor:
+            return False
+
+        window = self.buffer[self.window_samples - self.filled:]
+        features = self.mfcc(window)
+        if len(features) < min(len(t) for t in self.templates) // 2:
+            return False
+        features = _normalize_features(features)
+        self.last_distance = min(subsequence_dtw(t, features) for t in self.templates)
+        if self.last_distance <= self.threshold:
+            self.buffer[:] = 0
+            self.filled = 0
+            self.cooldown = self.refractory_samples
+            return True
+        return False
+
+
+WAKE_WORD_ENGINES = {
+    TemplateWakeWordEngine.name: TemplateWakeWordEngine.from_directory,
+}
+
+
+def register_wake_word_engine(name, factory):
+    """Register a wake word engine factory, e.g. a keyword-spotting library wrapper"""
+    WAKE_WORD_ENGINES[name] = factory
+
+
+def create_wake_word_engine(name=None, **options):
+    """Build the configured wake word engine, or None if it cannot be used.
+
+    The engine is selected with ``name`` or the ``VPM_WAKE_WORD_ENGINE``
+    environment variable. Returning None makes the voice thread fall back to
+    recognizer-based wake word detection.
+    """
+    name = name or os.environ.get('VPM_WAKE_WORD_ENGINE', TemplateWakeWordEngine.name)
+    if name == 'recognizer':
+        return None
+    factory = WAKE_WORD_ENGINES.get(name)
+    if factory is None:
+        print(f"Unknown wake word engine '{name}', falling back to the speech recognizer")
+        return None
+    if name == TemplateWakeWordEngine.name and 'directory' not in options:
+        options['directory'] = os.environ.get('VPM_WAKE_WORD_TEMPLATES', DEFAULT_TEMPLATE_DIR)
+    try:
+        return factory(**options)
+    except (ValueError, OSError) as e:
+        print(f"Offline wake word engine unavailable ({e}), falling back to the speech recognizer")
+        return None
+
+
+def _voiced_end(samples, sample_rate, threshold=0.02):
+    """Position in seconds of the last voiced 10 ms frame, within 20 dB of the loudest one"""
+    frame = sample_rate // 100
+    n = len(samples) // frame
+    if n == 0:
+        return 0.0
+    rms = np.sqrt((samples[:n * frame].reshape(n, frame) ** 2).mean(axis=1))
+    voiced = np.nonzero(rms > max(threshold, rms.max() * 0.1))[0]
+    return (voiced[-1] + 1) * frame / sample_rate if len(voiced) else n * frame / sample_rate
+
+
+def evaluate(engine, positive_files, negative_files, chunk=1024):
+    """Replay WAV fixtures through an engine and measure detection quality.
+
+    Returns a dict with the hit rate on positive clips, the detection latency
+    measured from the end of speech in each clip, the false accepts on
+    negative clips (per clip and per hour of audio) and the processing cost.
+    """
+    def replay(path):
+        samples = load_wav(path, engine.sample_rate)
+        pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes()
+        engine.reset()
+        fired = []
+        started = time.perf_counter()
+        for offset in range(0, len(pcm), chunk * 2):
+            if engine.process(pcm[offset:offset + chunk * 2]):
+                fired.append(min(offset + chunk * 2, len(pcm)) / 2 / engine.sample_rate)
+        return samples, fired, time.perf_counter() - started
+
+    hits = 0
+    latencies = []
+    cpu_time = 0.0
+    audio_time = 0.0
+    for path in positive_files:
+        samples, fired, elapsed = replay(path)
+        cpu_time += elapsed
+        audio_time += len(samples) / engine.sample_rate
+        if fired:
+            hits += 1
+            latencies.append(fired[0] - _voiced_end(samples, engine.sample_rate))
+
+    false_accepts = 0
+    negative_clips_triggered = 0
+    negative_audio = 0.0
+    for path in negative_files:
+        samples, fired, elapsed = replay(path)
+        cpu_time += elapsed
+        duration = len(samples) / engine.sample_rate
+        audio_time += duration
+        negative_audio += duration
+        false_accepts += len(fired)
+        negative_clips_triggered += bool(fired)
+
+    return {
+        'positives': len(positive_files),
+        'hit_rate': hits / len(positive_files) if positive_files else None,
+        'mean_latency_s': float(np.mean(latencies)) if latencies else None,
+        'max_latency_s': float(np.max(latencies)) if latencies else None,
+        'negatives': len(negative_files),
+        'false_accepts': false_accepts,
+        'false_accept_rate': negative_clips_triggered / len(negative_files) if negative_files else None,
+        'false_accepts_per_hour': false_accepts / (negative_audio / 3600) if negative_audio else None,
+        'real_time_factor': cpu_time / audio_time if audio_time else None,
+    }
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Evaluate the offline wake word engine on WAV fixtures")
+    parser.add_argument('--templates', default=DEFAULT_TEMPLATE_DIR, help="directory of enrolled wake word clips")
+    parser.add_argument('--positive', required=True, help="directory of clips that contain the wake word")
+    parser.add_argument('--negative', required=True, help="directory of clips that must not trigger")
+    parser.add_argument('--threshold', type=float, default=None)
+    args = parser.parse_args(argv)
+
+    engine = TemplateWakeWordEngine.from_directory(args.templates, threshold=args.threshold)
+    print(f"Threshold: {engine.threshold:.3f}")
+    results = evaluate(engine, _wav_files(args.positive), _wav_files(args.negative))
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())